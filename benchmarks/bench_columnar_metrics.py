@@ -0,0 +1,139 @@
+# Benchmark do avaliador colunar (metrics/columnar.py) contra o caminho escalar
+#
+# Gera um lote sintético no esquema de OCR (OCR_FIELDS), com ruído típico
+# (caixa, espaços, campos ausentes, vazios, None, valores errados), e compara
+# o MetricsAccumulator (metrics/engine.py: ExactMatchResult + TP/FP/FN),
+# documento a documento, com evaluate_columnar, conferindo que os resultados
+# e as contagens por campo e micro são idênticos (modo exato e tolerante).
+#
+# calculate_extraction_metrics de ocr_ground_truth_check.py não entra na
+# comparação: no notebook, TP é igualdade após str().strip() (sensível a
+# caixa, sem normalização), enquanto o motor e o avaliador colunar usam o
+# match do ExactMatchTool.
+#
+# Uso:
+#   python benchmarks/bench_columnar_metrics.py --documents 100000
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from eval_tests_with_groundedtruths.metrics.columnar import OCR_FIELDS, evaluate_columnar  # noqa: E402
+from eval_tests_with_groundedtruths.metrics.engine import MetricsAccumulator  # noqa: E402
+from eval_tests_with_groundedtruths.metrics.normalizers import compile_spec  # noqa: E402
+
+
+def random_groundtruth(rng: random.Random) -> dict:
+    return {
+        "cuit_emisor": f"{rng.randint(20, 34)}{rng.randint(10**8, 10**9 - 1)}",
+        "cuit_receptor": rng.choice(["33508358259", "30701009548", "N/A"]),
+        "razon_social": rng.choice(["SANITARY PROCESS INTEGRATION LATIN AMERICA SRL", "BIGBOX S.A.", "ACME SRL"]),
+        "punto_de_venta": f"{rng.randint(1, 20):05d}",
+        "nro_comprobante": f"{rng.randint(1, 10**8):08d}",
+        "fecha_comprobante": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024",
+        "codigo_afip": rng.choice(["001", "201", "N/A"]),
+        "letra_afip": rng.choice(["A", "B", "C"]),
+        "orden_compra": rng.choice(["N/A", str(rng.randint(10**9, 10**10 - 1))]),
+        "importe": f"{rng.randint(1, 99999)},{rng.randint(0, 99):02d}",
+        "moneda": rng.choice(["ARS", "USD", "EUR"]),
+    }
+
+
+def noisy_response(groundtruth: dict, rng: random.Random) -> dict:
+    response = {}
+    for field, value in groundtruth.items():
+        roll = rng.random()
+        if roll < 0.03:
+            continue                                  # campo ausente
+        elif roll < 0.05:
+            response[field] = None
+        elif roll < 0.07:
+            response[field] = ""
+        elif roll < 0.12:
+            response[field] = f" {value.lower()} "    # caixa/espaços: match tolerante
+        elif roll < 0.17:
+            response[field] = value + "X"             # valor errado
+        else:
+            response[field] = value
+    if rng.random() < 0.05:
+        response["campo_extra"] = "valor"
+    if rng.random() < 0.01:
+        response["itens"] = [1, 2.0, {"a": "B"}]      # coluna não textual (caminho célula a célula)
+    return response
+
+
+def build_corpus(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    groundtruths = [random_groundtruth(rng) for _ in range(count)]
+    responses = [noisy_response(groundtruth, rng) for groundtruth in groundtruths]
+    ids = [f"doc-{i}" for i in range(count)]
+    return responses, groundtruths, ids
+
+
+def assert_same_metrics(evaluation, accumulator, label: str) -> None:
+    """Contagens por campo e micro do avaliador colunar iguais às do MetricsAccumulator."""
+    report = accumulator.report()
+    columnar_fields = evaluation.field_extraction_metrics()
+    for field, metrics in report.per_field.items():
+        counts = columnar_fields[field]
+        assert (counts["TP"], counts["FP"], counts["FN"]) == (metrics.tp, metrics.fp, metrics.fn), \
+            f"TP/FP/FN divergentes do MetricsAccumulator em {field} ({label})"
+    micro = evaluation.micro_extraction_metrics()
+    assert (micro["TP"], micro["FP"], micro["FN"]) == (report.tp, report.fp, report.fn), \
+        f"TP/FP/FN micro divergentes do MetricsAccumulator ({label})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do avaliador colunar")
+    parser.add_argument("--documents", type=int, default=100_000)
+    args = parser.parse_args()
+
+    responses, groundtruths, ids = build_corpus(args.documents)
+
+    start = time.perf_counter()
+    accumulator = MetricsAccumulator()
+    scalar_results = [accumulator.add(r, g, i) for r, g, i in zip(responses, groundtruths, ids)]
+    accumulator.report()
+    scalar_time = time.perf_counter() - start
+
+    # Métricas: máscaras + TP/FP/FN por documento, por campo e micro-average
+    start = time.perf_counter()
+    evaluation = evaluate_columnar(responses, groundtruths, ids)
+    evaluation.extraction_metrics()
+    evaluation.field_extraction_metrics()
+    evaluation.field_accuracy()
+    evaluation.micro_extraction_metrics()
+    metrics_time = time.perf_counter() - start
+
+    # Materialização de um ExactMatchResult (pydantic) por documento, como no caminho escalar
+    columnar_results = evaluation.to_exact_match_results()
+    columnar_time = time.perf_counter() - start
+
+    assert columnar_results == scalar_results, "ExactMatchResult divergente do caminho escalar"
+    assert_same_metrics(evaluation, accumulator, "modo exato")
+
+    # Modo tolerante: mesma conferência, sem medir o tempo
+    normalizer = compile_spec()
+    tolerant_accumulator = MetricsAccumulator(normalizer)
+    tolerant_results = [tolerant_accumulator.add(r, g, i) for r, g, i in zip(responses, groundtruths, ids)]
+    tolerant_evaluation = evaluate_columnar(responses, groundtruths, ids, normalizer)
+    assert tolerant_evaluation.to_exact_match_results() == tolerant_results, "ExactMatchResult divergente (modo tolerante)"
+    assert_same_metrics(tolerant_evaluation, tolerant_accumulator, "modo tolerante")
+
+    print(f"Documentos: {args.documents} | campos do esquema: {len(OCR_FIELDS)} | colunas: {len(evaluation.fields)}")
+    print(f"{'caminho':>24} | {'tempo (s)':>10} | {'docs/s':>10}")
+    print("-" * 52)
+    print(f"{'escalar (motor)':>24} | {scalar_time:>10.3f} | {args.documents / scalar_time:>10.0f}")
+    print(f"{'colunar (métricas)':>24} | {metrics_time:>10.3f} | {args.documents / metrics_time:>10.0f}")
+    print(f"{'colunar (c/ resultados)':>24} | {columnar_time:>10.3f} | {args.documents / columnar_time:>10.0f}")
+    print(f"Speedup (métricas): {scalar_time / metrics_time:.2f}x | com ExactMatchResult: {scalar_time / columnar_time:.2f}x")
+    print(f"Micro F1: {evaluation.micro_extraction_metrics()['F1_Score']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
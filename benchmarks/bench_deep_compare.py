@@ -0,0 +1,165 @@
+# Benchmark do comparador iterativo (values_match) contra a versão recursiva
+#
+# Gera payloads sintéticos aninhados (faturas com centenas de itens, cada um
+# com objetos e listas internas, e uma cadeia profunda que passa do limite de
+# recursão do Python) e compara, nos casos igual / diferença no início /
+# diferença no fim:
+#   - values_match recursivo (implementação anterior, copiada abaixo)
+#   - values_match iterativo de tools/exact_match_tool.py
+# conferindo que os resultados são idênticos. Também mede diff_paths, que só
+# roda para os campos sem match.
+#
+# Uso:
+#   python benchmarks/bench_deep_compare.py --items 500 --repeat 200
+
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from eval_tests_with_groundedtruths.tools.exact_match_tool import diff_paths, values_match  # noqa: E402
+
+
+def recursive_values_match(value1, value2) -> bool:
+    """values_match anterior (recursivo, com set() das chaves a cada dict)."""
+    if value1 is None and value2 is None:
+        return True
+    if value1 is None or value2 is None:
+        return False
+
+    if isinstance(value1, str) and isinstance(value2, str):
+        return value1.strip().lower() == value2.strip().lower()
+
+    if isinstance(value1, (int, float)) and isinstance(value2, (int, float)):
+        if isinstance(value1, float) or isinstance(value2, float):
+            return abs(float(value1) - float(value2)) < 1e-10
+        return value1 == value2
+
+    if isinstance(value1, list) and isinstance(value2, list):
+        if len(value1) != len(value2):
+            return False
+        for v1, v2 in zip(value1, value2):
+            if not recursive_values_match(v1, v2):
+                return False
+        return True
+
+    if isinstance(value1, dict) and isinstance(value2, dict):
+        if set(value1.keys()) != set(value2.keys()):
+            return False
+        for key in value1.keys():
+            if not recursive_values_match(value1[key], value2[key]):
+                return False
+        return True
+
+    return value1 == value2
+
+
+def random_item(rng: random.Random, position: int) -> dict:
+    return {
+        "linea": position,
+        "descripcion": rng.choice(["Servicio de limpieza", "Insumos sanitarios", "Flete"]),
+        "cantidad": rng.randint(1, 50),
+        "precio": round(rng.uniform(1, 9999), 2),
+        "impuestos": [
+            {"tipo": "IVA", "alicuota": 21.0, "importe": round(rng.uniform(0, 2000), 2)},
+            {"tipo": "IIBB", "alicuota": 3.5, "importe": round(rng.uniform(0, 300), 2)},
+        ],
+        "producto": {"codigo": f"P{rng.randint(1, 10**6):07d}", "unidad": "UN", "tags": ["a", "b", None]},
+    }
+
+
+def invoice_payload(items: int, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    return {
+        "cabecera": {"cuit_emisor": "30715592904", "letra_afip": "A", "fecha_comprobante": "26/06/2024"},
+        "items": [random_item(rng, position) for position in range(items)],
+        "totales": {"neto": 1000.0, "iva": 210.0, "total": 1210.0},
+    }
+
+
+def deep_chain(depth: int) -> dict:
+    """Cadeia {'nodo': {'nodo': ...}} mais profunda que o limite de recursão."""
+    payload = {"valor": "fim"}
+    for level in range(depth):
+        payload = {"nivel": level, "nodo": payload}
+    return payload
+
+
+def reordered(payload: dict) -> dict:
+    """Mesmo conteúdo com as chaves de cada dict na ordem inversa."""
+    if isinstance(payload, dict):
+        return {key: reordered(payload[key]) for key in reversed(list(payload))}
+    if isinstance(payload, list):
+        return [reordered(value) for value in payload]
+    return payload
+
+
+def timed(function, left, right, repeat: int):
+    """Melhor tempo entre `repeat` chamadas (menos sensível a ruído que a média)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(left, right)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do comparador iterativo")
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    expected = invoice_payload(args.items)
+    late_mismatch = copy.deepcopy(expected)
+    late_mismatch["items"][-1]["impuestos"][1]["importe"] += 1
+    early_mismatch = copy.deepcopy(expected)
+    early_mismatch["cabecera"]["letra_afip"] = "B"
+
+    cases = {
+        "igual": reordered(expected),
+        "diferença no início": early_mismatch,
+        "diferença no fim": late_mismatch,
+    }
+
+    print(f"Itens por fatura: {args.items} | repetições: {args.repeat}")
+    print(f"{'caso':>22} | {'recursivo (ms)':>15} | {'iterativo (ms)':>15} | {'speedup':>8}")
+    print("-" * 70)
+    for case, actual in cases.items():
+        recursive_result, recursive_time = timed(recursive_values_match, actual, expected, args.repeat)
+        iterative_result, iterative_time = timed(values_match, actual, expected, args.repeat)
+        assert recursive_result == iterative_result, f"Resultado divergente no caso '{case}'"
+        print(f"{case:>22} | {recursive_time * 1000:>15.3f} | {iterative_time * 1000:>15.3f} | {recursive_time / iterative_time:>7.2f}x")
+
+    _, paths_time = timed(lambda a, b: diff_paths(a, b, "fatura"), late_mismatch, expected, args.repeat)
+    paths = diff_paths(late_mismatch, expected, "fatura")
+    assert paths == [f"fatura.items[{args.items - 1}].impuestos[1].importe"], paths
+    print(f"diff_paths (diferença no fim): {paths_time * 1000:.3f} ms -> {paths}")
+
+    # Cadeia profunda: a versão recursiva estoura a pilha, a iterativa não
+    depth = sys.getrecursionlimit() * 5
+    chain = deep_chain(depth)
+    chain_mismatch = deep_chain(depth)
+    node = chain_mismatch
+    while "nodo" in node:
+        node = node["nodo"]
+    node["valor"] = "outro"
+
+    try:
+        recursive_values_match(chain, deep_chain(depth))
+        recursive_outcome = "ok"
+    except RecursionError:
+        recursive_outcome = "RecursionError"
+    assert values_match(chain, deep_chain(depth)) is True
+    assert values_match(chain, chain_mismatch) is False
+    assert diff_paths(chain_mismatch, chain)[0].endswith(".nodo.valor")
+    print(f"Cadeia com profundidade {depth}: recursivo -> {recursive_outcome}, iterativo -> ok")
+
+
+if __name__ == "__main__":
+    main()
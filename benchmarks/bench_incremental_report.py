@@ -0,0 +1,111 @@
+# Benchmark da atualização incremental do relatório (ReportGeneratorTool com incremental=True)
+#
+# Gera o relatório de uma base de avaliações com estado salvo e, em seguida,
+# acrescenta um lote pequeno de avaliações novas, comparando o tempo de:
+#   - refazer o relatório completo com todas as avaliações
+#   - atualizar o relatório a partir do estado, passando só as novas
+#   - atualizar passando o conjunto completo (as já incluídas são ignoradas)
+#   - idem, com os digests do conjunto (chaves do cache de avaliações, como no
+#     modo direto): as já incluídas são ignoradas sem serializar
+# conferindo que os relatórios são idênticos (fora a data/hora).
+#
+# Uso:
+#   python benchmarks/bench_incremental_report.py --documents 20000 --new 20 --top-k 50
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from eval_tests_with_groundedtruths.storage.evaluation_cache import EvaluationCache  # noqa: E402
+from eval_tests_with_groundedtruths.tools.exact_match_tool import compare_pair  # noqa: E402
+from eval_tests_with_groundedtruths.tools.report_generator_tool import ReportGeneratorTool  # noqa: E402
+
+from bench_similarity import build_corpus  # noqa: E402
+
+
+def report_body(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return "".join(line for line in f if not line.startswith("**Data/Hora**"))
+
+
+def timed(run):
+    start = time.perf_counter()
+    report = run()
+    assert report["success"], report.get("error")
+    return time.perf_counter() - start, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da atualização incremental do relatório")
+    parser.add_argument("--documents", type=int, default=20_000)
+    parser.add_argument("--new", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=None)
+    args = parser.parse_args()
+
+    responses, groundtruths = build_corpus(args.documents + args.new)
+    results = [
+        compare_pair(response, groundtruth, str(i), None, False, 0.5)
+        for i, (response, groundtruth) in enumerate(zip(responses, groundtruths))
+    ]
+    base, new = results[:args.documents], results[args.documents:]
+    digests = {
+        result.id: EvaluationCache.make_key(response, groundtruth, "bench")
+        for result, response, groundtruth in zip(results, responses, groundtruths)
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        full_file = os.path.join(directory, "full.md")
+        incremental_file = os.path.join(directory, "incremental.md")
+        detail_file = os.path.join(directory, "details.jsonl.gz") if args.top_k else None
+
+        full_time, _ = timed(lambda: ReportGeneratorTool(top_k=args.top_k, detail_file=detail_file)._run(
+            results, output_file=full_file))
+
+        tool = ReportGeneratorTool(top_k=args.top_k, detail_file=detail_file, incremental=True)
+        base_time, _ = timed(lambda: tool._run(base, output_file=incremental_file, reset_state=True))
+        state_dir = os.path.join(directory, "incremental.state")
+        snapshot = os.path.join(directory, "snapshot")
+        shutil.copytree(state_dir, snapshot)
+        if detail_file:
+            shutil.copy(detail_file, f"{snapshot}.details")
+
+        new_time, report = timed(lambda: tool._run(new, output_file=incremental_file))
+        assert report["incremental"] and report["new_evaluations"] == args.new
+        assert report_body(incremental_file) == report_body(full_file), "Relatório incremental divergente"
+
+        # Mesmo ponto de partida, agora recebendo todas as avaliações
+        shutil.rmtree(state_dir)
+        shutil.copytree(snapshot, state_dir)
+        if detail_file:
+            shutil.copy(f"{snapshot}.details", detail_file)
+        all_time, report = timed(lambda: tool._run(results, output_file=incremental_file))
+        assert report["incremental"] and report["new_evaluations"] == args.new
+        assert report_body(incremental_file) == report_body(full_file), "Relatório incremental divergente"
+
+        # Estado inicial com digests informados e atualização com o conjunto completo
+        timed(lambda: tool._run(base, output_file=incremental_file, reset_state=True, digests=digests))
+        digests_time, report = timed(lambda: tool._run(results, output_file=incremental_file, digests=digests))
+        assert report["incremental"] and report["new_evaluations"] == args.new
+        assert report_body(incremental_file) == report_body(full_file), "Relatório incremental divergente"
+
+    print(f"Avaliações: {args.documents} + {args.new} novas | top_k: {args.top_k}")
+    print(f"{'modo':>34} | {'tempo (s)':>10} | {'x completo':>10}")
+    print("-" * 62)
+    for label, elapsed in (
+        ("relatório completo", full_time),
+        ("estado inicial (base)", base_time),
+        ("incremental (só as novas)", new_time),
+        ("incremental (conjunto completo)", all_time),
+        ("incremental (completo + digests)", digests_time),
+    ):
+        print(f"{label:>34} | {elapsed:>10.3f} | {elapsed / full_time:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Benchmark do matching por ID entre respostas e gabaritos (JSONFileReaderTool)
+#
+# Compara o laço aninhado original (respostas x gabaritos + varredura dos pares
+# para achar órfãos) com o hash join de match_by_id, em 1k/10k/100k arquivos.
+# O laço original é quadrático; acima de --max-baseline ele não é executado.
+#
+# Uso:
+#   python benchmarks/bench_match_files.py --sizes 1000 10000 100000
+
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from eval_tests_with_groundedtruths.tools.json_reader_tool import match_by_id  # noqa: E402
+
+
+def nested_loop_match(responses, groundtruths):
+    """Implementação original: laço aninhado + órfãos por varredura dos pares."""
+    matched_pairs = []
+    for response in responses:
+        for groundtruth in groundtruths:
+            if response.id == groundtruth.id:
+                matched_pairs.append((response, groundtruth))
+                break
+    unmatched_responses = [r.id for r in responses if not any(r.id == pair[0].id for pair in matched_pairs)]
+    unmatched_groundtruths = [g.id for g in groundtruths if not any(g.id == pair[1].id for pair in matched_pairs)]
+    return matched_pairs, unmatched_responses, unmatched_groundtruths
+
+
+def build_dataset(size: int, orphan_rate: float = 0.05, seed: int = 7):
+    """~5% de órfãos de cada lado, ordem embaralhada."""
+    rng = random.Random(seed)
+    ids = [f"doc-{i:07d}" for i in range(size)]
+    responses = [SimpleNamespace(id=i) for i in ids if rng.random() > orphan_rate]
+    groundtruths = [SimpleNamespace(id=i) for i in ids if rng.random() > orphan_rate]
+    rng.shuffle(responses)
+    rng.shuffle(groundtruths)
+    return responses, groundtruths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do matching por ID")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--max-baseline", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"{'arquivos':>9} | {'laço aninhado (s)':>18} | {'hash join (s)':>14}")
+    print("-" * 48)
+    for size in args.sizes:
+        responses, groundtruths = build_dataset(size)
+
+        start = time.perf_counter()
+        match = match_by_id(responses, groundtruths)
+        hash_time = time.perf_counter() - start
+
+        baseline = "não executado"
+        if size <= args.max_baseline:
+            start = time.perf_counter()
+            pairs, unmatched_r, unmatched_g = nested_loop_match(responses, groundtruths)
+            baseline = f"{time.perf_counter() - start:.3f}"
+            assert [(r.id, g.id) for r, g in pairs] == [(r.id, g.id) for r, g in match.matched_pairs]
+            assert unmatched_r == match.unmatched_responses
+            assert sorted(unmatched_g) == sorted(match.unmatched_groundtruths)
+
+        print(f"{size:>9} | {baseline:>18} | {hash_time:>14.4f}")
+
+
+if __name__ == "__main__":
+    main()
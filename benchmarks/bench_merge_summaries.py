@@ -0,0 +1,68 @@
+# Benchmark da consolidação de resumos (metrics/summary_state.py)
+#
+# Divide um lote sintético no esquema de OCR em N partes (como os jobs por
+# país/família de documentos), grava o estado de resumo de cada uma e compara
+# o tempo de combinar os estados com o de reavaliar o conjunto inteiro,
+# conferindo que EvaluationSummary e MetricsReport são idênticos.
+#
+# Uso:
+#   python benchmarks/bench_merge_summaries.py --documents 100000 --parts 8
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from eval_tests_with_groundedtruths.metrics.engine import evaluate_sharded  # noqa: E402
+from eval_tests_with_groundedtruths.metrics.summary_state import SummaryState, merge_summary_states  # noqa: E402
+from eval_tests_with_groundedtruths.models.evaluation_models import GroundTruthData, ResponseData  # noqa: E402
+
+from bench_columnar_metrics import build_corpus  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da consolidação de resumos")
+    parser.add_argument("--documents", type=int, default=100_000)
+    parser.add_argument("--parts", type=int, default=8)
+    args = parser.parse_args()
+
+    responses, groundtruths, ids = build_corpus(args.documents)
+    matched_pairs = [
+        (ResponseData(id=evaluation_id, response_data=response), GroundTruthData(id=evaluation_id, expected_response=groundtruth))
+        for response, groundtruth, evaluation_id in zip(responses, groundtruths, ids)
+    ]
+
+    start = time.perf_counter()
+    _, accumulator = evaluate_sharded(matched_pairs)
+    summary, metrics = accumulator.summary(), accumulator.report()
+    full_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        size = -(-len(matched_pairs) // args.parts)
+        for part in range(args.parts):
+            _, part_accumulator = evaluate_sharded(matched_pairs[part * size:(part + 1) * size])
+            path = os.path.join(directory, f"part{part}.summary.json")
+            SummaryState.from_accumulator(part_accumulator, f"part{part}").save(path)
+            paths.append(path)
+        state_bytes = sum(os.path.getsize(path) for path in paths)
+
+        start = time.perf_counter()
+        merged = merge_summary_states(paths)
+        merged_summary, merged_metrics = merged.summary(), merged.metrics()
+        merge_time = time.perf_counter() - start
+
+    assert merged_summary == summary, "Resumo combinado divergente"
+    assert merged_metrics == metrics, "Métricas combinadas divergentes"
+
+    print(f"Documentos: {args.documents} | partes: {args.parts} | estados: {state_bytes / 1024:.1f} KB")
+    print(f"reavaliar o conjunto: {full_time:.3f}s | combinar os estados: {merge_time * 1000:.2f}ms")
+    print(f"Acurácia geral: {merged_summary.overall_accuracy}% | F1 micro: {merged_metrics.micro.f1_score:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Benchmark do modo tolerante (metrics/normalizers.py) contra o match exato
+#
+# Gera um lote no esquema de OCR em que parte das respostas traz variações de
+# formato (vírgula decimal, CUIT com hífens, data ISO, N/A) e compara o tempo
+# de compare_pair sem e com normalização, além da taxa de acerto do cache LRU.
+#
+# Uso:
+#   python benchmarks/bench_normalizers.py --documents 100000
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from eval_tests_with_groundedtruths.metrics.normalizers import compile_spec  # noqa: E402
+from eval_tests_with_groundedtruths.tools.exact_match_tool import compare_pair  # noqa: E402
+
+from bench_columnar_metrics import random_groundtruth  # noqa: E402
+
+
+def reformat(field: str, value: str, rng: random.Random) -> str:
+    """Mesmo valor em outro formato, como o OCR costuma devolver."""
+    if field.startswith("cuit_") and value.isdigit() and len(value) == 11:
+        return f"{value[:2]}-{value[2:10]}-{value[10]}"
+    if field == "importe":
+        return value.replace(",", ".")
+    if field == "fecha_comprobante":
+        day, month, year = value.split("/")
+        return f"{year}-{month}-{day}"
+    if value == "N/A":
+        return rng.choice(["n/a", " N/A ", "null"])
+    return value
+
+
+def build_corpus(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    groundtruths = [random_groundtruth(rng) for _ in range(count)]
+    responses = [
+        {field: reformat(field, value, rng) if rng.random() < 0.3 else value for field, value in groundtruth.items()}
+        for groundtruth in groundtruths
+    ]
+    return responses, groundtruths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do modo tolerante")
+    parser.add_argument("--documents", type=int, default=100_000)
+    args = parser.parse_args()
+
+    responses, groundtruths = build_corpus(args.documents)
+    normalizer = compile_spec()
+
+    assert normalizer("importe", "146,65") == normalizer("importe", "146.65")
+    assert normalizer("cuit_emisor", "30-71559290-4") == normalizer("cuit_emisor", "30715592904")
+    assert normalizer("fecha_comprobante", "26/06/2024") == normalizer("fecha_comprobante", "2024-06-26")
+    assert normalizer("orden_compra", "N/A") is None
+
+    timings = {}
+    accuracy = {}
+    for mode, mode_normalizer in (("exato", None), ("tolerante", normalizer)):
+        start = time.perf_counter()
+        results = [
+            compare_pair(response, groundtruth, str(i), mode_normalizer)
+            for i, (response, groundtruth) in enumerate(zip(responses, groundtruths))
+        ]
+        timings[mode] = time.perf_counter() - start
+        accuracy[mode] = sum(result.accuracy_percentage for result in results) / len(results)
+
+    print(f"Documentos: {args.documents}")
+    print(f"{'modo':>10} | {'tempo (s)':>10} | {'docs/s':>10} | {'acurácia média':>15}")
+    print("-" * 55)
+    for mode, elapsed in timings.items():
+        print(f"{mode:>10} | {elapsed:>10.3f} | {args.documents / elapsed:>10.0f} | {accuracy[mode]:>14.2f}%")
+    print(f"Custo do modo tolerante: {timings['tolerante'] / timings['exato']:.2f}x o do exato")
+    for kind, info in sorted(normalizer.cache_info().items()):
+        total = info.hits + info.misses
+        print(f"  cache {kind:>7}: {info.hits}/{total} acertos ({info.hits / total * 100 if total else 0:.1f}%), {info.currsize} valores")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# Benchmark do decodificador do payload duplamente serializado ('data' da API de OCR)
+#
+# Compara extract_fields_from_data_reference (json padrão, caminho original)
+# com extract_fields_from_data (caminho rápido, orjson quando instalado) em um
+# corpus sintético no formato de ocr_raw_results_base_for_ground_truth.json, e
+# confere que resultados e mensagens de erro são idênticos.
+#
+# Uso:
+#   python benchmarks/bench_payload_decoder.py --documents 100000
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import ocr_proccess_document_2 as collection  # noqa: E402
+
+# Payloads malformados: o caminho rápido precisa reportar exatamente o mesmo erro
+MALFORMED_PAYLOADS = [
+    "",
+    "{not json",
+    "[]",
+    '"choices"',
+    json.dumps({}),
+    json.dumps({"choices": []}),
+    json.dumps({"choices": "abc"}),
+    json.dumps({"choices": [{}]}),
+    json.dumps({"choices": [{"message": {"content": None}}]}),
+    json.dumps({"choices": [{"message": {"content": 42}}]}),
+    json.dumps({"choices": [{"message": {"content": ["a"]}}]}),
+    json.dumps({"choices": [{"message": {"content": "{bad"}}]}),
+    json.dumps({"choices": [{"message": {"content": "Infinity"}}]}),
+    json.dumps({"choices": [{"message": {"content": "[1, 2]"}}]}),
+]
+
+
+def random_fields(rng: random.Random) -> dict:
+    return {
+        "cuit_emisor": f"{rng.randint(20, 34)}{rng.randint(10**8, 10**9 - 1)}",
+        "cuit_receptor": rng.choice(["33508358259", "30701009548", "N/A"]),
+        "razon_social": rng.choice(["SANITARY PROCESS INTEGRATION LATIN AMERICA SRL", "BIGBOX S.A.", "ACME SRL"]),
+        "punto_de_venta": f"{rng.randint(1, 20):05d}",
+        "nro_comprobante": f"{rng.randint(1, 10**8):08d}",
+        "fecha_comprobante": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024",
+        "codigo_afip": rng.choice(["001", "201", "N/A"]),
+        "letra_afip": rng.choice(["A", "B", "C"]),
+        "orden_compra": rng.choice(["N/A", str(rng.randint(10**9, 10**10 - 1))]),
+        "importe": f"{rng.randint(1, 99999)},{rng.randint(0, 99):02d}",
+        "moneda": rng.choice(["ARS", "USD", "EUR"]),
+    }
+
+
+def build_corpus(count: int, seed: int = 42) -> list:
+    """Gera respostas brutas com 'content' ora como dict, ora como string JSON."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        fields = random_fields(rng)
+        content = fields if i % 2 == 0 else json.dumps(fields)
+        data = {
+            "choices": [{
+                "finish_reason": "stop",
+                "index": 0,
+                "message": {"content": content, "role": "assistant", "tool_call_id": None, "tool_calls": None},
+            }],
+            "extra": None,
+            "model": "openai/gpt-4-vision",
+            "snippets": [],
+            "usage": {"completion_tokens": 145, "prompt_tokens": 4453, "total_tokens": 4598},
+            "uuid": [f"uuid-{i}"],
+        }
+        corpus.append(json.dumps(data))
+    return corpus
+
+
+def time_decoder(decoder, corpus: list) -> tuple:
+    start = time.perf_counter()
+    results = [decoder(payload) for payload in corpus]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do decodificador de payloads")
+    parser.add_argument("--documents", type=int, default=100_000)
+    args = parser.parse_args()
+
+    for payload in MALFORMED_PAYLOADS:
+        expected = collection.extract_fields_from_data_reference(payload)
+        actual = collection.extract_fields_from_data(payload)
+        assert actual == expected, f"Divergência para {payload!r}: {actual} != {expected}"
+
+    corpus = build_corpus(args.documents)
+    reference_time, reference_results = time_decoder(collection.extract_fields_from_data_reference, corpus)
+    fast_time, fast_results = time_decoder(collection.extract_fields_from_data, corpus)
+    assert fast_results == reference_results, "Resultados divergentes entre os decodificadores"
+
+    backend = "orjson" if collection.orjson is not None else "json (stdlib)"
+    print(f"Documentos: {args.documents} | backend rápido: {backend}")
+    print(f"{'decodificador':>14} | {'tempo (s)':>10} | {'docs/s':>10}")
+    print("-" * 40)
+    print(f"{'referência':>14} | {reference_time:>10.3f} | {args.documents / reference_time:>10.0f}")
+    print(f"{'rápido':>14} | {fast_time:>10.3f} | {args.documents / fast_time:>10.0f}")
+    print(f"Speedup: {reference_time / fast_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
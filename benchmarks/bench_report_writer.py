@@ -0,0 +1,258 @@
+# Benchmark do relatório Markdown em streaming (reporting/markdown_writer.py)
+#
+# Gera um lote no esquema de OCR com divergências (ver bench_similarity) e
+# compara, em tempo e pico de memória (tracemalloc):
+#   - referência: o ReportGeneratorTool anterior ao writer (lista em memória,
+#     relatório montado com `report += ...` e gravado de uma vez)
+#   - writer completo: mesmo conteúdo, escrito seção a seção
+#   - writer limitado: top-K piores avaliações/divergências + detalhamento em .jsonl.gz
+# A partir de um gerador de resultados, como no ReportGeneratorTool, com a
+# seção de métricas. Confere que o writer completo gera o mesmo relatório da
+# referência (fora a data/hora).
+#
+# Uso:
+#   python benchmarks/bench_report_writer.py --documents 50000 --top-k 50
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from eval_tests_with_groundedtruths.metrics.aggregator import ResultAggregator  # noqa: E402
+from eval_tests_with_groundedtruths.metrics.engine import MetricsAccumulator  # noqa: E402
+from eval_tests_with_groundedtruths.models.evaluation_models import EvaluationSummary, ExactMatchResult  # noqa: E402
+from eval_tests_with_groundedtruths.reporting.markdown_writer import MarkdownReportWriter  # noqa: E402
+
+from bench_similarity import build_corpus  # noqa: E402
+
+
+# ----------------------------------------------------------------------
+# Referência: o ReportGeneratorTool anterior ao relatório em streaming
+# (src/eval_tests_with_groundedtruths/tools/report_generator_tool.py em
+# 4ca63dc^), copiado sem alterações além de sair da classe: lista de
+# resultados em memória e relatório montado em uma string com `+=`.
+# ----------------------------------------------------------------------
+
+def reference_report(results, output_file: str, metrics: Optional[Dict[str, Any]] = None) -> None:
+    aggregator = ResultAggregator()
+    results_list = []
+    for result in results:
+        aggregator.add(result)
+        results_list.append(result)
+
+    summary = aggregator.summary()
+    qualitative_analysis = aggregator.qualitative_analysis()
+    report_content = _generate_markdown_report(summary, qualitative_analysis, results_list, metrics,
+                                               aggregator.average_similarity)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(report_content)
+
+
+def _generate_metrics_section(metrics: Dict[str, Any]) -> str:
+    """Gera a seção de métricas de extração (micro, macro e por campo)."""
+    micro = metrics['micro']
+    macro = metrics['macro']
+    section = f"""
+## 🧮 Métricas de Extração
+
+| Média | Precision | Recall | F1 |
+|-------|-----------|--------|----|
+| **Micro** (TP={metrics['tp']}, FP={metrics['fp']}, FN={metrics['fn']}) | {micro['precision']:.4f} | {micro['recall']:.4f} | {micro['f1_score']:.4f} |
+| **Macro** | {macro['precision']:.4f} | {macro['recall']:.4f} | {macro['f1_score']:.4f} |
+
+"""
+    with_similarity = any(field_metrics.get('similarity') is not None for field_metrics in metrics['per_field'].values())
+    if with_similarity:
+        section += "| Campo | Acurácia | TP | FP | FN | Precision | Recall | F1 | Similaridade |\n"
+        section += "|-------|----------|----|----|----|-----------|--------|----|--------------|\n"
+    else:
+        section += "| Campo | Acurácia | TP | FP | FN | Precision | Recall | F1 |\n"
+        section += "|-------|----------|----|----|----|-----------|--------|----|\n"
+
+    for field, field_metrics in metrics['per_field'].items():
+        scores = field_metrics['scores']
+        row = (
+            f"| {field} | {field_metrics['accuracy_percentage']}% | {field_metrics['tp']} | {field_metrics['fp']} | "
+            f"{field_metrics['fn']} | {scores['precision']:.4f} | {scores['recall']:.4f} | {scores['f1_score']:.4f} |"
+        )
+        if with_similarity:
+            similarity = field_metrics.get('similarity')
+            row += f" {similarity:.4f} |" if similarity is not None else " - |"
+        section += row + "\n"
+    return section
+
+
+def _generate_markdown_report(summary: EvaluationSummary, qualitative: Dict[str, Any], results: List[ExactMatchResult],
+                              metrics: Optional[Dict[str, Any]] = None, average_similarity: Optional[float] = None) -> str:
+    """Gera o conteúdo do relatório em formato Markdown."""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    report = f"""# Relatório de Avaliação de Agents
+
+**Data/Hora**: {timestamp}  
+**Total de Avaliações**: {summary.total_evaluations}
+
+## 📊 Resumo Quantitativo
+
+| Métrica | Valor |
+|---------|-------|
+| **Acurácia Geral** | {summary.overall_accuracy}% |
+| **Matches Perfeitos** | {summary.perfect_matches} ({summary.perfect_matches/summary.total_evaluations*100:.1f}%) |
+| **Matches Parciais** | {summary.partial_matches} ({summary.partial_matches/summary.total_evaluations*100:.1f}%) |
+| **Falhas Completas** | {summary.complete_mismatches} ({summary.complete_mismatches/summary.total_evaluations*100:.1f}%) |
+"""
+    if average_similarity is not None:
+        report += f"| **Similaridade Média (campos de texto)** | {average_similarity:.2f}% |\n"
+
+    report += f"""
+## 🎯 Análise Qualitativa
+
+### Performance Geral
+**{qualitative['performance_assessment']}**
+
+### Principais Achados
+"""
+    
+    for finding in qualitative['key_findings']:
+        report += f"- {finding}\n"
+    
+    report += f"""
+### Recomendações
+"""
+    
+    for rec in qualitative['recommendations']:
+        report += f"- {rec}\n"
+    
+    if metrics:
+        report += _generate_metrics_section(metrics)
+
+    report += f"""
+## 🔍 Padrões de Erro Identificados
+
+"""
+    
+    for pattern in summary.common_error_patterns:
+        if pattern.endswith(':'):
+            report += f"### {pattern}\n"
+        else:
+            report += f"{pattern}\n"
+    
+    report += f"""
+## 📋 Detalhamento por Avaliação
+
+"""
+    if average_similarity is not None:
+        report += "| ID | Acurácia | Similaridade | Campos Corretos | Total Campos | Status |\n"
+        report += "|-----|----------|--------------|----------------|--------------|---------|\n"
+    else:
+        report += "| ID | Acurácia | Campos Corretos | Total Campos | Status |\n"
+        report += "|-----|----------|----------------|--------------|---------|\n"
+
+    for result in results:
+        status = "✅ Perfeito" if result.accuracy_percentage == 100 else (
+            "⚠️ Parcial" if result.accuracy_percentage > 0 else "❌ Falha"
+        )
+        similarity = ""
+        if average_similarity is not None:
+            similarity = f" {result.similarity_percentage}% |" if result.similarity_percentage is not None else " - |"
+        report += f"| {result.id} | {result.accuracy_percentage}% |{similarity} {result.matching_fields} | {result.total_fields} | {status} |\n"
+    
+    report += f"""
+## 🔧 Campos com Divergências
+
+"""
+    
+    for result in results:
+        if result.mismatched_fields:
+            report += f"### Avaliação {result.id}\n"
+            for field, mismatch in result.mismatched_fields.items():
+                expected = mismatch.get('expected', 'N/A')
+                actual = mismatch.get('actual', 'N/A')
+                report += f"- **{field}**\n"
+                report += f"  - Esperado: `{expected}`\n"
+                report += f"  - Obtido: `{actual}`\n"
+                if field in result.field_similarity:
+                    report += f"  - Similaridade: {result.field_similarity[field]:.4f}\n"
+                if mismatch.get('paths'):
+                    report += f"  - Diferenças em: {', '.join(f'`{path}`' for path in mismatch['paths'])}\n"
+                report += f"\n"
+    
+    report += f"""
+---
+*Relatório gerado automaticamente pelo sistema de avaliação de agents*
+"""
+    
+    return report
+
+
+def streamed_report(results, output_file: str, top_k=None, metrics: Optional[Dict[str, Any]] = None) -> None:
+    with MarkdownReportWriter(output_file, top_k) as writer:
+        for result in results:
+            writer.add(result)
+        writer.write(metrics=metrics)
+
+
+def report_body(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return "".join(line for line in f if not line.startswith("**Data/Hora**"))
+
+
+def measure(label, run, make_results, output_file):
+    start = time.perf_counter()
+    run(make_results(), output_file)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    run(make_results(), output_file)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return label, elapsed, peak, os.path.getsize(output_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do relatório em streaming")
+    parser.add_argument("--documents", type=int, default=50_000)
+    parser.add_argument("--top-k", type=int, default=50)
+    args = parser.parse_args()
+
+    responses, groundtruths = build_corpus(args.documents)
+    accumulator = MetricsAccumulator(None, 0.5)
+    results = [
+        accumulator.add(response, groundtruth, str(i))
+        for i, (response, groundtruth) in enumerate(zip(responses, groundtruths))
+    ]
+    metrics = accumulator.report().dict()
+
+    def make_results():
+        # Gerador: o writer não precisa da lista; a referência a materializa
+        return (result for result in results)
+
+    with tempfile.TemporaryDirectory() as directory:
+        reference_file = os.path.join(directory, "REFERENCE_REPORT.md")
+        output_file = os.path.join(directory, "EVALUATION_REPORT.md")
+        rows = [
+            measure("referência (+=)", lambda items, path: reference_report(items, path, metrics),
+                    make_results, reference_file),
+            measure("writer completo", lambda items, path: streamed_report(items, path, None, metrics),
+                    make_results, output_file),
+        ]
+        assert report_body(output_file) == report_body(reference_file), "Relatório do writer divergente da referência"
+        rows.append(measure(f"writer top-{args.top_k}", lambda items, path: streamed_report(items, path, args.top_k, metrics),
+                            make_results, output_file))
+
+    print(f"Documentos: {args.documents}")
+    print(f"{'modo':>18} | {'tempo (s)':>10} | {'pico (MB)':>10} | {'relatório (KB)':>14}")
+    print("-" * 62)
+    for label, elapsed, peak, size in rows:
+        print(f"{label:>18} | {elapsed:>10.3f} | {peak / 2**20:>10.1f} | {size / 1024:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Benchmark do fan-out/fan-in em shards (metrics/engine.evaluate_sharded)
+#
+# Avalia o mesmo lote sintético no esquema de OCR com 1..N processos,
+# conferindo que resultados, métricas e EvaluationSummary são idênticos aos
+# da execução em um único processo, e mostra o tempo e o speedup de cada um.
+#
+# Uso:
+#   python benchmarks/bench_sharded_evaluation.py --documents 200000 --max-workers 8
+
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from eval_tests_with_groundedtruths.metrics.engine import evaluate_sharded  # noqa: E402
+from eval_tests_with_groundedtruths.models.evaluation_models import GroundTruthData, ResponseData  # noqa: E402
+
+from bench_columnar_metrics import build_corpus  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da avaliação em shards")
+    parser.add_argument("--documents", type=int, default=200_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    responses, groundtruths, ids = build_corpus(args.documents)
+    matched_pairs = [
+        (ResponseData(id=evaluation_id, response_data=response), GroundTruthData(id=evaluation_id, expected_response=groundtruth))
+        for response, groundtruth, evaluation_id in zip(responses, groundtruths, ids)
+    ]
+
+    baseline = None
+    timings = {}
+    for workers in range(1, args.max_workers + 1):
+        start = time.perf_counter()
+        results, accumulator = evaluate_sharded(matched_pairs, workers=workers)
+        report, summary = accumulator.report(), accumulator.summary()
+        timings[workers] = time.perf_counter() - start
+
+        if baseline is None:
+            baseline = (results, report, summary)
+        else:
+            assert results == baseline[0], f"Resultados divergentes com {workers} processos"
+            assert report == baseline[1], f"Métricas divergentes com {workers} processos"
+            assert summary == baseline[2], f"Resumo divergente com {workers} processos"
+
+    print(f"Documentos: {args.documents} | núcleos disponíveis: {os.cpu_count()}")
+    print(f"{'processos':>10} | {'tempo (s)':>10} | {'docs/s':>10} | {'speedup':>8}")
+    print("-" * 48)
+    for workers, elapsed in timings.items():
+        print(f"{workers:>10} | {elapsed:>10.3f} | {args.documents / elapsed:>10.0f} | {timings[1] / elapsed:>7.2f}x")
+    print(f"Acurácia geral: {baseline[2].overall_accuracy}% | F1 micro: {baseline[1].micro.f1_score:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# Benchmark do modo de similaridade (metrics/similarity.py) contra o match exato
+#
+# Gera um lote no esquema de OCR em que parte dos campos de texto vem com
+# erros típicos de OCR (troca de caracteres parecidos, letras perdidas ou
+# repetidas) e parte com valores totalmente diferentes, e compara o tempo de
+# compare_pair:
+#   - só match exato
+#   - com similaridade limitada (min_similarity padrão, cálculo interrompido abaixo dele)
+#   - com similaridade sem limite (min_similarity=0, distância completa)
+# conferindo que a versão limitada coincide com a completa sempre que a
+# similaridade passa do limiar.
+#
+# Uso:
+#   python benchmarks/bench_similarity.py --documents 100000 --repeat 3
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from eval_tests_with_groundedtruths.metrics import similarity  # noqa: E402
+from eval_tests_with_groundedtruths.tools.exact_match_tool import compare_pair  # noqa: E402
+
+from bench_columnar_metrics import random_groundtruth  # noqa: E402
+
+OCR_CONFUSIONS = {"O": "0", "0": "O", "I": "1", "1": "l", "S": "5", "5": "S", "B": "8", "E": "F", "A": "4"}
+RAZON_SOCIAL = [
+    "SANITARY PROCESS INTEGRATION LATIN AMERICA SRL",
+    "DISTRIBUIDORA DE INSUMOS MEDICOS DEL NORTE SOCIEDAD ANONIMA",
+    "BIGBOX S.A.",
+    "ACME SRL",
+]
+
+
+def ocr_noise(value: str, rng: random.Random) -> str:
+    """Erros de OCR: caracteres confundidos, perdidos ou repetidos."""
+    chars = list(value)
+    for _ in range(rng.randint(1, 3)):
+        if not chars:
+            break
+        position = rng.randrange(len(chars))
+        roll = rng.random()
+        if roll < 0.6:
+            chars[position] = OCR_CONFUSIONS.get(chars[position], chars[position])
+        elif roll < 0.8:
+            del chars[position]
+        else:
+            chars.insert(position, chars[position])
+    return "".join(chars)
+
+
+def build_corpus(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    groundtruths = []
+    responses = []
+    for _ in range(count):
+        groundtruth = random_groundtruth(rng)
+        groundtruth["razon_social"] = rng.choice(RAZON_SOCIAL)
+        response = {}
+        for field, value in groundtruth.items():
+            roll = rng.random()
+            if roll < 0.15:
+                response[field] = ocr_noise(value, rng)          # quase igual
+            elif roll < 0.20:
+                response[field] = rng.choice(RAZON_SOCIAL)       # claramente diferente
+            else:
+                response[field] = value
+        groundtruths.append(groundtruth)
+        responses.append(response)
+    return responses, groundtruths
+
+
+def run(responses, groundtruths, min_similarity, repeat: int):
+    """Melhor tempo entre `repeat` passadas, cada uma com o cache de pares vazio."""
+    best = float("inf")
+    for _ in range(repeat):
+        similarity._similarity.cache_clear()
+        start = time.perf_counter()
+        results = [
+            compare_pair(response, groundtruth, str(i), None, False, min_similarity)
+            for i, (response, groundtruth) in enumerate(zip(responses, groundtruths))
+        ]
+        best = min(best, time.perf_counter() - start)
+    return results, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do modo de similaridade")
+    parser.add_argument("--documents", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    responses, groundtruths = build_corpus(args.documents)
+    threshold = similarity.DEFAULT_MIN_SIMILARITY
+
+    exact_results, exact_time = run(responses, groundtruths, None, args.repeat)
+    bounded_results, bounded_time = run(responses, groundtruths, threshold, args.repeat)
+    bounded_cache = similarity.similarity_cache_info()
+    full_results, full_time = run(responses, groundtruths, 0.0, args.repeat)
+
+    compared = 0
+    for exact, bounded, full in zip(exact_results, bounded_results, full_results):
+        assert bounded.accuracy_percentage == exact.accuracy_percentage
+        for field, full_similarity in full.field_similarity.items():
+            expected = full_similarity if full_similarity >= threshold else 0.0
+            assert bounded.field_similarity[field] == expected, (field, bounded.field_similarity[field], full_similarity)
+            compared += 1
+
+    average = sum(result.similarity_percentage for result in bounded_results) / len(bounded_results)
+    print(f"Documentos: {args.documents} | campos de texto conferidos: {compared} | min_similarity: {threshold}")
+    print(f"{'modo':>22} | {'tempo (s)':>10} | {'docs/s':>10} | {'x exato':>8}")
+    print("-" * 60)
+    for mode, elapsed in (("exato", exact_time), ("similaridade limitada", bounded_time), ("similaridade completa", full_time)):
+        print(f"{mode:>22} | {elapsed:>10.3f} | {args.documents / elapsed:>10.0f} | {elapsed / exact_time:>7.2f}x")
+    print(f"Similaridade média (limitada): {average:.2f}%")
+    print(f"Cache de pares: {bounded_cache.hits}/{bounded_cache.hits + bounded_cache.misses} acertos, {bounded_cache.currsize} pares")
+
+
+if __name__ == "__main__":
+    main()
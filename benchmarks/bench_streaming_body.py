@@ -0,0 +1,89 @@
+# Benchmark de memória: pico de RSS por tamanho de arquivo no envio de um documento
+#
+# Compara o caminho original (encode_file_to_base64 + create_api_body + json=)
+# com o body em streaming (StreamingAPIBody). Cada medição roda em um
+# subprocesso novo, já que ru_maxrss só cresce ao longo da vida do processo.
+#
+# Uso:
+#   python benchmarks/bench_streaming_body.py --sizes-mb 1 10 30 80
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss é reportado em KB no Linux e em bytes no macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return peak / divisor
+
+
+def run_child(mode: str, file_path: str) -> None:
+    """Envia um único arquivo ao mock local e imprime o acréscimo de pico de RSS."""
+    import requests
+    import ocr_proccess_document_1 as submission
+    from mock_ocr_api import start_mock_server, mock_base_url
+
+    server, _ = start_mock_server(latency=0)
+    api_url = f"{mock_base_url(server)}/request_ocr"
+    baseline = peak_rss_mb()
+
+    with requests.Session() as session:
+        if mode == "legacy":
+            base64_content = submission.encode_file_to_base64(file_path)
+            body = submission.create_api_body(base64_content, submission.FIELDS_TEMPLATE)
+            response = session.post(api_url, json=body, timeout=300)
+        else:
+            body = submission.StreamingAPIBody(file_path, submission.FIELDS_TEMPLATE)
+            response = session.post(api_url, data=body, timeout=300)
+        response.raise_for_status()
+
+    server.shutdown()
+    print(f"{peak_rss_mb() - baseline:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pico de RSS vs tamanho do arquivo")
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[1, 10, 30, 80])
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size_mb in args.sizes_mb:
+            file_path = os.path.join(workdir, f"doc_{size_mb}mb.pdf")
+            with open(file_path, "wb") as f:
+                for _ in range(size_mb):
+                    f.write(os.urandom(1024 * 1024))
+
+            measured = {}
+            for mode in ("legacy", "streaming"):
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--child", mode, file_path],
+                    check=True, capture_output=True, text=True, cwd=ROOT_DIR,
+                ).stdout
+                measured[mode] = float(output.strip().splitlines()[-1])
+            rows.append((size_mb, measured["legacy"], measured["streaming"]))
+            os.remove(file_path)
+
+    print(f"{'arquivo (MB)':>12} | {'original (MB)':>14} | {'streaming (MB)':>15}")
+    print("-" * 48)
+    for size_mb, legacy, streaming in rows:
+        print(f"{size_mb:>12} | {legacy:>14.1f} | {streaming:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
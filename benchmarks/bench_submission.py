@@ -0,0 +1,73 @@
+# Benchmark de vazão do envio de documentos (ocr_proccess_document_1.process_documents)
+#
+# Sobe o mock local da API, gera N documentos sintéticos e mede o tempo total
+# para diferentes níveis de concorrência.
+#
+# Uso:
+#   python benchmarks/bench_submission.py --documents 200 --latency 0.2 --concurrency 1 4 8 16
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ocr_proccess_document_1 as submission  # noqa: E402
+from mock_ocr_api import start_mock_server, mock_base_url  # noqa: E402
+
+
+def create_synthetic_documents(folder: str, count: int, size_bytes: int) -> None:
+    payload = os.urandom(size_bytes)
+    for i in range(count):
+        with open(os.path.join(folder, f"doc_{i:05d}.pdf"), "wb") as f:
+            f.write(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de envio concorrente")
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--size-kb", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--rate", type=float, default=0, help="Limite de req/s (0 = sem limite)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    server, _ = start_mock_server(latency=args.latency)
+    api_url = f"{mock_base_url(server)}/request_ocr"
+
+    # display() só existe no Databricks
+    submission.display = lambda df: None
+
+    with tempfile.TemporaryDirectory() as workdir:
+        docs_folder = os.path.join(workdir, "docs")
+        os.makedirs(docs_folder)
+        create_synthetic_documents(docs_folder, args.documents, args.size_kb * 1024)
+        submission.LOG_FILE = os.path.join(workdir, "correlation_ids_log.csv")
+        submission.JOURNAL_FILE = os.path.join(workdir, "correlation_ids_journal.jsonl")
+
+        timings = []
+        for concurrency in args.concurrency:
+            start = time.perf_counter()
+            submission.process_documents(
+                docs_folder, submission.FIELDS_TEMPLATE, api_url,
+                max_concurrent_requests=concurrency,
+                max_requests_per_second=args.rate or None,
+                use_dedupe_cache=False,
+            )
+            elapsed = time.perf_counter() - start
+            timings.append((concurrency, elapsed))
+
+    server.shutdown()
+
+    print(f"\n{'concorrência':>12} | {'tempo (s)':>10} | {'docs/s':>8}")
+    print("-" * 38)
+    for concurrency, elapsed in timings:
+        print(f"{concurrency:>12} | {elapsed:>10.2f} | {args.documents / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
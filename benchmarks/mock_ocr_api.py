@@ -0,0 +1,154 @@
+# Endpoint local que simula a API de OCR (APIM) para benchmarks e testes manuais
+#
+# Uso:
+#   python benchmarks/mock_ocr_api.py --port 8765 --latency 0.2 --completion-delay 5
+# e aponte API_URL para http://127.0.0.1:8765/request_ocr e
+# OCR_STATUS_ENDPOINT para http://127.0.0.1:8765/requests/{correlation_id}/status
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+# Campos devolvidos pelo mock como resultado da extração
+MOCK_EXTRACTED_FIELDS = {
+    "cuit_emisor": "30715592904",
+    "cuit_receptor": "33508358259",
+    "razon_social": "SANITARY PROCESS INTEGRATION LATIN AMERICA SRL",
+    "punto_de_venta": "00001",
+    "nro_comprobante": "00000574",
+    "fecha_comprobante": "26/06/2024",
+    "codigo_afip": "001",
+    "letra_afip": "A",
+    "orden_compra": "N/A",
+    "importe": "146,65",
+    "moneda": "EUR",
+}
+
+
+def build_completed_status(correlation_id: str) -> dict:
+    """Resposta de status concluída, com 'data' duplamente serializado como na API real."""
+    data = {
+        "choices": [{
+            "finish_reason": "stop",
+            "index": 0,
+            "message": {"content": json.dumps(MOCK_EXTRACTED_FIELDS), "role": "assistant"},
+        }],
+        "model": "openai/gpt-4-vision",
+    }
+    return {
+        "correlation_id": correlation_id,
+        "request_id": correlation_id,
+        "data": json.dumps(data),
+        "error_details": None,
+        "status": "COMPLETED",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+class MockOCRHandler(BaseHTTPRequestHandler):
+    """
+    Aceita submissões (POST) simulando a latência de aceite da API e responde
+    GET /requests/{correlation_id}/status com PROCESSING até que
+    `completion_delay` segundos tenham passado desde a primeira vez que o ID
+    foi visto, e COMPLETED depois disso.
+    """
+
+    # Keep-alive habilitado para que o pool de conexões do cliente seja exercitado
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        # Consome o body em blocos para não manter o documento inteiro em memória
+        remaining = length
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+
+        time.sleep(self.server.latency)
+        correlation_id = str(uuid.uuid4())
+        with self.server.lock:
+            self.server.request_count += 1
+            self.server.submitted_at[correlation_id] = time.monotonic()
+
+        self._send_json(200, {
+            "correlation_id": correlation_id,
+            "data": "",
+            "message": "Request queued successfully",
+            "status": "QUEUED",
+        })
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        if len(parts) != 3 or parts[0] != "requests" or parts[2] != "status":
+            self._send_json(404, {"detail": "Not Found"})
+            return
+
+        correlation_id = parts[1]
+        with self.server.lock:
+            self.server.status_request_count += 1
+            submitted_at = self.server.submitted_at.setdefault(correlation_id, time.monotonic())
+
+        if time.monotonic() - submitted_at < self.server.completion_delay:
+            self._send_json(200, {"correlation_id": correlation_id, "data": "", "status": "PROCESSING"})
+        else:
+            self._send_json(200, build_completed_status(correlation_id))
+
+    def _send_json(self, status_code: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Silencia o log padrão por requisição para não distorcer o benchmark
+        pass
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, latency: float = 0.2,
+                      completion_delay: float = 0.0) -> Tuple[ThreadingHTTPServer, threading.Thread]:
+    """Sobe o servidor mock em uma thread daemon e retorna (servidor, thread)."""
+    server = ThreadingHTTPServer((host, port), MockOCRHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.completion_delay = completion_delay
+    server.request_count = 0
+    server.status_request_count = 0
+    server.submitted_at = {}
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+
+def mock_base_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Mock local da API de OCR")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Latência de aceite simulada (s)")
+    parser.add_argument("--completion-delay", type=float, default=5.0, help="Tempo até o status ficar COMPLETED (s)")
+    args = parser.parse_args(argv)
+
+    server, thread = start_mock_server(args.host, args.port, args.latency, args.completion_delay)
+    print(f"Mock OCR API em {mock_base_url(server)}/request_ocr (latência {args.latency}s)")
+    try:
+        thread.join()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Stand-in local da API de OCR que reenvia (replay) callbacks de webhook
+#
+# Lê respostas brutas já coletadas (formato de ocr_raw_results_base_for_ground_truth.json,
+# com a resposta de status em 'raw_api_response') e as envia por POST para o
+# receptor do Passo 2 (ocr_proccess_document_2.py no modo webhook).
+#
+# Uso:
+#   python benchmarks/replay_webhook_callbacks.py --url http://127.0.0.1:8080/webhook --token <WEBHOOK_TOKEN>
+#   python benchmarks/replay_webhook_callbacks.py --write-log correlation_ids_log.csv
+
+import argparse
+import csv
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SOURCE = os.path.join(ROOT_DIR, "ocr_raw_results_base_for_ground_truth.json")
+
+
+def load_callbacks(source_file: str) -> List[Dict[str, Any]]:
+    """Carrega os payloads de callback (uma resposta de status final por correlation_id)."""
+    with open(source_file, "r", encoding="utf-8") as f:
+        raw_results = json.load(f)
+
+    callbacks = []
+    for correlation_id, record in raw_results.items():
+        payload = dict(record.get("raw_api_response") or {})
+        payload.setdefault("correlation_id", correlation_id)
+        payload["_file_name"] = record.get("file_name", correlation_id)
+        callbacks.append(payload)
+    return callbacks
+
+
+def write_log(callbacks: List[Dict[str, Any]], log_file: str) -> None:
+    """Gera um correlation_ids_log.csv equivalente ao do Passo 1 para os callbacks."""
+    with open(log_file, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["file_name", "correlation_id", "status", "api_response"])
+        writer.writeheader()
+        for payload in callbacks:
+            writer.writerow({
+                "file_name": payload["_file_name"],
+                "correlation_id": payload["correlation_id"],
+                "status": "SENT_SUCCESS",
+                "api_response": json.dumps({"correlation_id": payload["correlation_id"], "status": "QUEUED"}),
+            })
+
+
+def replay(callbacks: List[Dict[str, Any]], url: str, delay: float = 0.0, repeat: int = 1,
+           token: str = "", token_header: str = "X-Webhook-Token") -> None:
+    with requests.Session() as session:
+        session.headers[token_header] = token
+        for _ in range(repeat):
+            for payload in callbacks:
+                body = {k: v for k, v in payload.items() if not k.startswith("_")}
+                try:
+                    response = session.post(url, json=body, timeout=30)
+                    print(f"  -> {body['correlation_id']}: HTTP {response.status_code} {response.text}")
+                except requests.exceptions.RequestException as e:
+                    # O receptor encerra assim que todos os IDs pendentes chegam
+                    print(f"  -> {body['correlation_id']}: ERRO ao enviar callback: {e}")
+                if delay:
+                    time.sleep(delay)
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Replay de callbacks de webhook da API de OCR")
+    parser.add_argument("--url", default="http://127.0.0.1:8080/webhook")
+    parser.add_argument("--token", default="", help="Token do receptor (WEBHOOK_TOKEN do Passo 2)")
+    parser.add_argument("--source", default=DEFAULT_SOURCE)
+    parser.add_argument("--delay", type=float, default=0.0, help="Intervalo entre callbacks (s)")
+    parser.add_argument("--repeat", type=int, default=1, help="Reenvia cada callback N vezes (testa duplicados)")
+    parser.add_argument("--write-log", metavar="CSV", help="Apenas gera o log do Passo 1 para os callbacks e sai")
+    args = parser.parse_args(argv)
+
+    callbacks = load_callbacks(args.source)
+    if args.write_log:
+        write_log(callbacks, args.write_log)
+        print(f"Log com {len(callbacks)} correlation_ids salvo em {args.write_log}")
+        return
+
+    replay(callbacks, args.url, args.delay, args.repeat, args.token)
+
+
+if __name__ == "__main__":
+    main()
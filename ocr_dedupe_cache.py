@@ -0,0 +1,139 @@
+# Cache local de deduplicação: conteúdo do documento + template de campos -> correlation_id / resultado
+#
+# Usado pelo Passo 1 (ocr_proccess_document_1.py) para não reenviar documentos
+# já processados e pelo Passo 2 (ocr_proccess_document_2.py) para registrar o
+# resultado de cada correlation_id coletado.
+
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+
+# ----------------------------------------------------------------------
+# CONFIGURAÇÕES GLOBAIS
+# ----------------------------------------------------------------------
+
+# Arquivo persistente do cache (mesma pasta dos logs dos Passos 1 e 2)
+DEDUPE_CACHE_FILE = "./ocr_dedupe_cache.json"
+
+# Tamanho do bloco lido do disco ao calcular o hash (o arquivo nunca é lido inteiro)
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Número de threads para calcular hashes em paralelo (hashlib libera o GIL)
+HASH_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# ----------------------------------------------------------------------
+# 1. FUNÇÕES DE HASH
+# ----------------------------------------------------------------------
+
+def hash_file(file_path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """Calcula o SHA-256 do conteúdo do arquivo lendo-o em blocos."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_files_parallel(file_paths: List[str], max_workers: int = HASH_MAX_WORKERS) -> Dict[str, Optional[str]]:
+    """
+    Calcula o SHA-256 de vários arquivos em paralelo.
+    Arquivos que não puderem ser lidos ficam com hash None.
+    """
+    def safe_hash(file_path: str) -> Optional[str]:
+        try:
+            return hash_file(file_path)
+        except OSError as e:
+            print(f"Erro ao calcular hash do arquivo {file_path}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        return dict(zip(file_paths, executor.map(safe_hash, file_paths)))
+
+def hash_fields_template(fields: List[Dict[str, str]]) -> str:
+    """Hash estável do template de campos (mudou o template, muda a chave do cache)."""
+    canonical = json.dumps(fields, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def make_cache_key(file_hash: str, template_hash: str) -> str:
+    return f"{file_hash}:{template_hash}"
+
+def is_valid_correlation_id(correlation_id: Optional[str]) -> bool:
+    """Só correlation_ids reais entram no cache ("N/A" é o marcador de envio sem ID)."""
+    return isinstance(correlation_id, str) and correlation_id.strip() not in ("", "N/A")
+
+# ----------------------------------------------------------------------
+# 2. CACHE PERSISTENTE
+# ----------------------------------------------------------------------
+
+class DedupeCache:
+    """
+    Mapeia chave de conteúdo (hash do arquivo + hash do template) para o
+    correlation_id já enviado e, quando disponível, o resultado coletado.
+
+    Estrutura do arquivo:
+        {"entries": {chave: {"correlation_id", "file_name", "result"}}}
+    """
+
+    def __init__(self, cache_file: str = DEDUPE_CACHE_FILE):
+        self.cache_file = cache_file
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # Índice reverso correlation_id -> chaves, para registrar resultados em O(1)
+        self.keys_by_correlation_id: Dict[str, List[str]] = {}
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("entries", {})
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"AVISO: Cache de deduplicação '{self.cache_file}' ignorado: {e}")
+            self.entries = {}
+
+        # Entradas sem correlation_id real (gravadas por versões anteriores)
+        # fariam o arquivo ser pulado para sempre sem nunca ter sido enviado
+        self.entries = {
+            key: entry for key, entry in self.entries.items()
+            if is_valid_correlation_id(entry.get("correlation_id"))
+        }
+        self.keys_by_correlation_id = {}
+        for key, entry in self.entries.items():
+            self.keys_by_correlation_id.setdefault(entry.get("correlation_id"), []).append(key)
+
+    def save(self) -> None:
+        """Grava o cache de forma atômica (arquivo temporário + rename)."""
+        with self.lock:
+            payload = {"entries": self.entries}
+            temp_file = f"{self.cache_file}.tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(temp_file, self.cache_file)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            return self.entries.get(key)
+
+    def record_submission(self, key: str, correlation_id: str, file_name: str) -> bool:
+        """Registra o envio; retorna False (sem registrar) se o correlation_id não é real."""
+        if not is_valid_correlation_id(correlation_id):
+            return False
+        with self.lock:
+            self.entries[key] = {
+                "correlation_id": correlation_id,
+                "file_name": file_name,
+                "result": None,
+            }
+            self.keys_by_correlation_id.setdefault(correlation_id, []).append(key)
+        return True
+
+    def record_result(self, correlation_id: str, result: Dict[str, Any]) -> bool:
+        """Associa o resultado coletado a todas as chaves que apontam para o correlation_id."""
+        with self.lock:
+            keys = self.keys_by_correlation_id.get(correlation_id, [])
+            for key in keys:
+                self.entries[key]["result"] = result
+            return bool(keys)
@@ -4,7 +4,7 @@
 import pandas as pd
 import json
 from sklearn.metrics import precision_recall_fscore_support
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable, Optional
 
 # ----------------------------------------------------------------------
 # 1. FUNÇÕES DE SUPORTE
@@ -24,7 +24,8 @@ def load_json_data(file_path: str) -> Dict[str, Any]:
 
 def calculate_extraction_metrics(
     ground_truth_json: Dict[str, Any],
-    prediction_json: Dict[str, Any]
+    prediction_json: Dict[str, Any],
+    normalize_value: Optional[Callable[[str, Any], Any]] = None
 ) -> Dict[str, float]:
     """
     Calcula Precision, Recall e F1 Score comparando dois dicionários JSON
@@ -41,6 +42,12 @@ def calculate_extraction_metrics(
       INCORRETAMENTE.
 
     O score é calculado no NÍVEL DO CAMPO (field-level).
+
+    Com `normalize_value(campo, valor)` (ex.: o FieldNormalizer de
+    eval_tests_with_groundedtruths.metrics.normalizers), os valores são
+    normalizados antes da classificação: "146,65" == "146.65",
+    "30-71559290-4" == "30715592904", "26/06/2024" == "2024-06-26" e
+    "N/A" conta como não extraído.
     """
 
     # 1. Obter todos os campos únicos de ambos os JSONs
@@ -55,6 +62,9 @@ def calculate_extraction_metrics(
     for field_name in all_fields:
         gt_value = ground_truth_json.get(field_name)
         pred_value = prediction_json.get(field_name)
+        if normalize_value is not None:
+            gt_value = normalize_value(field_name, gt_value)
+            pred_value = normalize_value(field_name, pred_value)
 
         # Tratar valores None/vazios para simplificar a comparação
         # Assumimos que None/vazio significa que o campo não foi extraído (FN)
@@ -1,11 +1,19 @@
 # Docs teste -> base64 -> envio para API -> registro do correlation_id -> salvar logs
 
 import os
+import sys
+import argparse
 import base64
 import json
+import threading
+import time
 import requests
 import pandas as pd
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import List, Dict, Any, Iterator, Optional
+
+from ocr_dedupe_cache import DedupeCache, hash_files_parallel, hash_fields_template, is_valid_correlation_id, make_cache_key
 
 # ----------------------------------------------------------------------
 # CONFIGURAÇÕES GLOBAIS
@@ -78,6 +86,29 @@ FIELDS_TEMPLATE = [
 # Arquivo de log para guardar os IDs de correlação
 LOG_FILE = "./correlation_ids_log.csv"
 
+# Journal append-only (uma linha JSON por submissão, gravada com fsync assim que
+# o envio termina). Sobrevive a quedas do processo/kernel antes do LOG_FILE final.
+JOURNAL_FILE = "./correlation_ids_journal.jsonl"
+
+# Retomar a partir do journal, pulando arquivos já registrados como enviados
+# (também pode ser ativado com o argumento --resume)
+RESUME = False
+
+# Número máximo de requisições simultâneas (1 = modo sequencial original)
+MAX_CONCURRENT_REQUESTS = 8
+
+# Limite de requisições por segundo no cliente, para respeitar a cota do APIM
+# (None ou 0 desativa o limitador)
+MAX_REQUESTS_PER_SECOND = 5.0
+
+# Tamanho do bloco lido do disco ao montar o body em streaming. Precisa ser
+# múltiplo de 3 para que cada bloco codifique em Base64 sem padding no meio.
+STREAM_CHUNK_SIZE = 3 * 256 * 1024
+
+# Reaproveita correlation_ids de documentos idênticos (mesmo conteúdo e mesmo
+# FIELDS_TEMPLATE) já enviados, em vez de reenviá-los para OCR
+USE_DEDUPE_CACHE = True
+
 # ----------------------------------------------------------------------
 # 1. FUNÇÕES DE SUPORTE
 # ----------------------------------------------------------------------
@@ -102,9 +133,217 @@ def create_api_body(base64_content: str, fields: List[Dict[str, str]]) -> Dict[s
         }]
     }
 
-def process_documents(folder_path: str, fields: List[Dict[str, str]], api_url: str):
+def iter_base64_chunks(file_path: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Lê o arquivo em blocos e devolve o Base64 de cada bloco, sem carregar o arquivo inteiro."""
+    if chunk_size % 3 != 0:
+        raise ValueError("chunk_size deve ser múltiplo de 3")
+    with open(file_path, "rb") as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield base64.b64encode(chunk)
+
+class StreamingAPIBody:
+    """
+    Body JSON da API gerado em blocos a partir do arquivo em disco.
+
+    Equivale a json.dumps(create_api_body(...)), mas o conteúdo Base64 nunca é
+    materializado: o pico de memória por documento fica em torno de um bloco
+    (STREAM_CHUNK_SIZE) em vez de ~4x o tamanho do arquivo. Como o tamanho
+    final é conhecido de antemão, o requests envia Content-Length normalmente
+    (sem chunked transfer encoding).
+    """
+
+    _PLACEHOLDER = "__BASE64_FILE_PLACEHOLDER__"
+
+    def __init__(self, file_path: str, fields: List[Dict[str, str]], chunk_size: int = STREAM_CHUNK_SIZE):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.file_size = os.path.getsize(file_path)
+
+        template = json.dumps(create_api_body(self._PLACEHOLDER, fields)).encode("utf-8")
+        self.prefix, self.suffix = template.split(self._PLACEHOLDER.encode("utf-8"), 1)
+
+    def __len__(self) -> int:
+        base64_length = 4 * ((self.file_size + 2) // 3)
+        return len(self.prefix) + base64_length + len(self.suffix)
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self.prefix
+        yield from iter_base64_chunks(self.file_path, self.chunk_size)
+        yield self.suffix
+
+class SubmissionJournal:
+    """
+    Journal append-only das submissões, em JSON Lines.
+
+    Cada registro é gravado e sincronizado em disco (fsync) individualmente,
+    então uma queda no meio do lote perde no máximo o envio em andamento.
+    Ao fim de cada execução que chega até o final (mesmo com envios que
+    falharam, API_ERROR) o journal é compactado (compact), para não crescer
+    indefinidamente entre execuções; a compactação mantém exatamente o que
+    load() usa. Uma execução interrompida por exceção não compacta.
+    """
+
+    def __init__(self, journal_file: str = JOURNAL_FILE):
+        self.journal_file = journal_file
+        self.lock = threading.Lock()
+        self.file = open(journal_file, "a", encoding="utf-8")
+
+    def append(self, entry: Dict[str, str]) -> None:
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def load(journal_file: str = JOURNAL_FILE) -> Dict[str, Dict[str, str]]:
+        """
+        Lê o journal e devolve o último registro de cada arquivo (file_name).
+        Uma última linha truncada (queda durante a escrita) é ignorada.
+        """
+        entries = {}
+        if not os.path.exists(journal_file):
+            return entries
+        with open(journal_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                entries[entry["file_name"]] = entry
+        return entries
+
+    @staticmethod
+    def compact(journal_file: str = JOURNAL_FILE) -> int:
+        """
+        Reescreve o journal só com o último registro de cada arquivo, que é
+        tudo o que load() usa. A troca é atômica (arquivo temporário +
+        os.replace): uma queda durante a compactação mantém o journal antigo.
+        Retorna o número de registros mantidos.
+        """
+        entries = SubmissionJournal.load(journal_file)
+        temporary = f"{journal_file}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            for entry in entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, journal_file)
+        return len(entries)
+
+class RateLimiter:
+    """
+    Limitador de taxa (token bucket) compartilhado entre as threads de envio.
+    Garante no máximo `rate` requisições por segundo, com rajadas de até `burst`.
+    """
+
+    def __init__(self, rate: Optional[float], burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Bloqueia até que um token esteja disponível."""
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_seconds = (1 - self.tokens) / self.rate
+            time.sleep(wait_seconds)
+
+def create_session(pool_size: int) -> requests.Session:
+    """Cria uma sessão HTTP com pool de conexões keep-alive do tamanho da concorrência."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def submit_document(session: requests.Session, rate_limiter: RateLimiter, file_path: str,
+                    fields: List[Dict[str, str]], api_url: str, api_headers: Dict[str, str]) -> Optional[Dict[str, str]]:
+    """
+    Codifica (em streaming) e envia um único documento para a API.
+    Retorna a linha de log correspondente, ou None se o arquivo não pôde ser codificado.
+    """
+    filename = os.path.basename(file_path)
+    print(f"\n[PROCESSANDO] {filename}...")
+
+    # 1. Preparar o body em streaming (Base64 gerado sob demanda durante o envio)
+    try:
+        body = StreamingAPIBody(file_path, fields)
+    except OSError as e:
+        print(f"Erro ao codificar o arquivo {file_path}: {e}")
+        return None
+    if body.file_size == 0:
+        return None
+
+    # 2. Enviar para a API (respeitando o limite de taxa)
+    try:
+        rate_limiter.acquire()
+        response = session.post(api_url, headers=api_headers, data=body, timeout=30)
+        response.raise_for_status() # Lança exceção para status codes 4xx/5xx
+
+        # 3. Processar a Resposta
+        response_json = response.json()
+        correlation_id = response_json.get("correlation_id", "N/A")
+
+        print(f"  -> Sucesso! {filename} Correlation ID: {correlation_id}")
+
+        return {
+            "file_name": filename,
+            "correlation_id": correlation_id,
+            "status": "SENT_SUCCESS",
+            "api_response": json.dumps(response_json)
+        }
+
+    except requests.exceptions.RequestException as e:
+        print(f"  -> ERRO na requisição da API para {filename}: {e}")
+        return {
+            "file_name": filename,
+            "correlation_id": "N/A",
+            "status": "API_ERROR",
+            "api_response": str(e)
+        }
+
+def process_documents(folder_path: str, fields: List[Dict[str, str]], api_url: str,
+                      max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS,
+                      max_requests_per_second: Optional[float] = MAX_REQUESTS_PER_SECOND,
+                      use_dedupe_cache: bool = USE_DEDUPE_CACHE,
+                      resume: bool = RESUME):
     """
     Processa todos os arquivos na pasta, envia para a API e registra os IDs.
+
+    Os envios são feitos em paralelo (até `max_concurrent_requests` em voo),
+    reaproveitando conexões keep-alive de uma sessão compartilhada e
+    respeitando `max_requests_per_second` no lado do cliente.
+
+    Com `use_dedupe_cache`, arquivos com conteúdo idêntico a um documento já
+    enviado (mesmo SHA-256 e mesmo template de campos) reaproveitam o
+    correlation_id registrado em DEDUPE_CACHE_FILE e não são reenviados.
+
+    Cada submissão é registrada em JOURNAL_FILE assim que termina. Com `resume`,
+    arquivos cujo último registro no journal é SENT_SUCCESS (ou CACHED_SUCCESS)
+    não são reenviados e entram no log final com o registro do journal.
     """
     
     if not os.path.isdir(folder_path):
@@ -120,52 +359,104 @@ def process_documents(folder_path: str, fields: List[Dict[str, str]], api_url: s
         'Authorization': AUTHORIZATION_TOKEN, 
     }
 
-    log_data = []
+    all_file_paths = [
+        os.path.join(folder_path, filename)
+        for filename in os.listdir(folder_path)
+        if os.path.isfile(os.path.join(folder_path, filename))
+    ]
 
-    for filename in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, filename)
+    journaled = {}
+    if resume:
+        journaled = {
+            file_name: entry
+            for file_name, entry in SubmissionJournal.load(JOURNAL_FILE).items()
+            if entry["status"] in ("SENT_SUCCESS", "CACHED_SUCCESS")
+        }
+        print(f"[RESUME] {len(journaled)} arquivos já enviados encontrados em {JOURNAL_FILE}")
+    file_paths = [p for p in all_file_paths if os.path.basename(p) not in journaled]
 
-        if os.path.isfile(file_path):
-            print(f"\n[PROCESSANDO] {filename}...")
-            
-            # 1. Codificar em Base64
-            base64_content = encode_file_to_base64(file_path)
-            if not base64_content:
+    max_workers = max(1, max_concurrent_requests)
+    rate_limiter = RateLimiter(max_requests_per_second)
+
+    # Agrupar arquivos por conteúdo: só o primeiro de cada grupo sem cache é enviado
+    dedupe_cache = DedupeCache() if use_dedupe_cache else None
+    cache_keys = {}
+    if dedupe_cache is not None:
+        template_hash = hash_fields_template(fields)
+        for file_path, file_hash in hash_files_parallel(file_paths).items():
+            if file_hash is not None:
+                cache_keys[file_path] = make_cache_key(file_hash, template_hash)
+
+    to_submit = []
+    first_file_by_key = {}
+    for file_path in file_paths:
+        key = cache_keys.get(file_path)
+        if key is None:
+            to_submit.append(file_path)
+        elif dedupe_cache.get(key) is None and key not in first_file_by_key:
+            first_file_by_key[key] = file_path
+            to_submit.append(file_path)
+
+    journal = SubmissionJournal(JOURNAL_FILE)
+
+    def submit_and_journal(file_path: str) -> Optional[Dict[str, str]]:
+        entry = submit_document(session, rate_limiter, file_path, fields, api_url, api_headers)
+        if entry is not None:
+            # Registrado assim que o envio termina, não apenas no fim do lote
+            journal.append(entry)
+        return entry
+
+    with journal, create_session(max_workers) as session:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            submitted = dict(zip(to_submit, executor.map(submit_and_journal, to_submit)))
+
+        log_data = []
+        for file_path in all_file_paths:
+            filename = os.path.basename(file_path)
+            key = cache_keys.get(file_path)
+
+            if filename in journaled:
+                log_data.append(journaled[filename])
                 continue
 
-            # 2. Criar Body da Requisição
-            body = create_api_body(base64_content, fields)
-            # print(f"body = {body}")
-
-            # 3. Enviar para a API
-            try:
-                print(f"headers = {api_headers}")
-                response = requests.post(api_url, headers=api_headers, json=body, timeout=30)
-                response.raise_for_status() # Lança exceção para status codes 4xx/5xx
-                
-                # 4. Processar a Resposta
-                response_json = response.json()
-                correlation_id = response_json.get("correlation_id", "N/A")
-                
-                print(f"  -> Sucesso! Correlation ID: {correlation_id}")
-                
-                # 5. Registrar Log
-                log_data.append({
-                    "file_name": filename,
-                    "correlation_id": correlation_id,
-                    "status": "SENT_SUCCESS",
-                    "api_response": json.dumps(response_json)
-                })
-
-            except requests.exceptions.RequestException as e:
-                print(f"  -> ERRO na requisição da API para {filename}: {e}")
-                log_data.append({
+            if file_path in submitted:
+                entry = submitted[file_path]
+                if entry is None:
+                    continue
+                # Resposta de sucesso sem correlation_id ("N/A") não entra no cache:
+                # o documento seria pulado nas próximas execuções sem resultado a buscar
+                if key is not None and entry["status"] == "SENT_SUCCESS" and is_valid_correlation_id(entry["correlation_id"]):
+                    dedupe_cache.record_submission(key, entry["correlation_id"], filename)
+                log_data.append(entry)
+                continue
+
+            # Documento idêntico a outro já enviado (nesta execução ou em execuções anteriores)
+            cached = dedupe_cache.get(key)
+            if cached is None:
+                # A cópia enviada nesta execução falhou (ou veio sem correlation_id): replica a entrada
+                original = submitted[first_file_by_key[key]]
+                if original is None:
+                    continue
+                entry = {**original, "file_name": filename}
+            else:
+                print(f"\n[CACHE] {filename} -> Correlation ID: {cached['correlation_id']}")
+                entry = {
                     "file_name": filename,
-                    "correlation_id": "N/A",
-                    "status": "API_ERROR",
-                    "api_response": str(e)
-                })
-            
+                    "correlation_id": cached["correlation_id"],
+                    # Com resultado já coletado o Passo 2 não precisa consultar a API novamente
+                    "status": "CACHED_SUCCESS" if cached.get("result") is not None else "SENT_SUCCESS",
+                    "api_response": json.dumps({"dedupe_cache_key": key, "source_file_name": cached["file_name"]})
+                }
+            journal.append(entry)
+            log_data.append(entry)
+
+    # Execução concluída (com ou sem envios com erro): os registros repetidos
+    # (reenvios, retomadas) já não são necessários
+    SubmissionJournal.compact(JOURNAL_FILE)
+
+    if dedupe_cache is not None:
+        dedupe_cache.save()
+
     # Salvar o log final
     if log_data:
         df_log = pd.DataFrame(log_data)
@@ -180,13 +471,21 @@ def process_documents(folder_path: str, fields: List[Dict[str, str]], api_url: s
 # 2. EXECUÇÃO PRINCIPAL
 # ----------------------------------------------------------------------
 
-# Criar a pasta de documentos se ela não existir (útil para testes locais)
-# No Databricks, você deve garantir que o caminho DBFS já exista.
-if not os.path.exists(DOCUMENTS_FOLDER):
-    os.makedirs(DOCUMENTS_FOLDER)
-    print(f"A pasta '{DOCUMENTS_FOLDER}' foi criada. Coloque seus arquivos nela.")
-    
-if API_URL == "SUA_URL_DA_API_DE_EXTRACAO_AQUI":
-    print("\nATENÇÃO: Por favor, substitua a variável 'API_URL' pela URL real da sua API antes de executar.")
-else:
-    process_documents(DOCUMENTS_FOLDER, FIELDS_TEMPLATE, API_URL)
\ No newline at end of file
+# Em notebooks (Databricks/Jupyter) __name__ também é "__main__"; a guarda
+# apenas evita disparar envios quando o módulo é importado (ex.: benchmarks).
+if __name__ == "__main__":
+    # Criar a pasta de documentos se ela não existir (útil para testes locais)
+    # No Databricks, você deve garantir que o caminho DBFS já exista.
+    if not os.path.exists(DOCUMENTS_FOLDER):
+        os.makedirs(DOCUMENTS_FOLDER)
+        print(f"A pasta '{DOCUMENTS_FOLDER}' foi criada. Coloque seus arquivos nela.")
+        
+    # parse_known_args ignora os argumentos que o kernel do notebook injeta
+    parser = argparse.ArgumentParser(description="Envio de documentos para OCR")
+    parser.add_argument("--resume", action="store_true", help=f"Pula arquivos já enviados segundo {JOURNAL_FILE}")
+    cli_args, _ = parser.parse_known_args(sys.argv[1:])
+
+    if API_URL == "SUA_URL_DA_API_DE_EXTRACAO_AQUI":
+        print("\nATENÇÃO: Por favor, substitua a variável 'API_URL' pela URL real da sua API antes de executar.")
+    else:
+        process_documents(DOCUMENTS_FOLDER, FIELDS_TEMPLATE, API_URL, resume=RESUME or cli_args.resume)
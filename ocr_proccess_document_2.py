@@ -1,11 +1,30 @@
 # Pegar resultado processamento por correlation_id -> salvar em json
 
 import os
+import sys
 import json
+import random
+import hmac
+import asyncio
+import argparse
+import threading
 import requests
 import pandas as pd
-import time
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Optional
+
+from ocr_dedupe_cache import DedupeCache
+
+# Backend JSON opcional mais rápido para decodificar os payloads de resultado.
+# Sem ele, o caminho rápido usa o json da biblioteca padrão.
+try:
+    import orjson
+    fast_json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    fast_json_loads = json.loads
 
 # ----------------------------------------------------------------------
 # CONFIGURAÇÕES GLOBAIS
@@ -22,34 +41,82 @@ LOG_FILE = "./correlation_ids_log.csv"
 FILES_OUTPUT_DIR = "./files"
 GROUNDTRUTH_OUTPUT_DIR = "./groundedtruths"
 
-# Tempo de espera em segundos entre as checagens (polling)
-POLLING_INTERVAL_SECONDS = 15
+# Formato de saída: "files" grava um JSON (indent=2) por correlation_id;
+# "jsonl" acrescenta os registros em shards JSONL com índice por id dentro
+# dos mesmos diretórios (lidos nativamente pelo JSONFileReaderTool). Para
+# editar gabaritos manualmente, exporte com: uv run export_store <dir> <saida>
+STORAGE_BACKEND = "files"
+
+# Backoff exponencial por correlation_id: a primeira checagem é imediata, depois
+# a espera começa em POLLING_INITIAL_DELAY_SECONDS e dobra a cada checagem sem
+# conclusão, até POLLING_MAX_DELAY_SECONDS (com jitter de ±POLLING_JITTER)
+POLLING_INITIAL_DELAY_SECONDS = 2
+POLLING_MAX_DELAY_SECONDS = 60
+POLLING_JITTER = 0.25
+
+# Tempo máximo de espera por correlation_id (None = sem limite, não recomendado). Os IDs que
+# não terminarem nesse prazo permanecem pendentes e são listados no fim da coleta.
+POLLING_MAX_WAIT_SECONDS = 3600
+
+# Número máximo de consultas de status em voo (também é o tamanho do pool de conexões)
+MAX_CONCURRENT_STATUS_REQUESTS = 16
 
 # Status que indicam que a extração terminou
 COMPLETED_STATUSES = ["COMPLETED", "FAILED", "ERROR", "WEBHOOK_FAILED"]
 
+# Modo de coleta: "polling" consulta OCR_STATUS_ENDPOINT; "webhook" sobe um
+# receptor HTTP local para os callbacks da API e usa polling apenas como
+# fallback para os IDs que não chamarem de volta em WEBHOOK_WAIT_TIMEOUT_SECONDS.
+# (também pode ser escolhido com o argumento --mode)
+# IMPORTANTE: no modo webhook, o WEBHOOK_URL usado no Passo 1 precisa apontar
+# para este receptor (ex: http://<host>:8080/webhook).
+# O receptor escuta só em 127.0.0.1; para receber callbacks de outra máquina,
+# exponha-o por um proxy/túnel ou ajuste WEBHOOK_HOST conscientemente.
+# Todo callback precisa trazer o header WEBHOOK_TOKEN_HEADER com WEBHOOK_TOKEN
+# (o mesmo segredo configurado no webhook da API); sem token o receptor não sobe.
+COLLECTION_MODE = "polling"
+WEBHOOK_HOST = "127.0.0.1"
+WEBHOOK_PORT = 8080
+WEBHOOK_PATH = "/webhook"
+WEBHOOK_TOKEN = ""
+WEBHOOK_TOKEN_HEADER = "X-Webhook-Token"
+WEBHOOK_WAIT_TIMEOUT_SECONDS = 300
+
 # ----------------------------------------------------------------------
 # 1. FUNÇÕES DE SUPORTE
 # ----------------------------------------------------------------------
 
-def get_request_status(correlation_id: str) -> Dict[str, Any]:
+def create_session(pool_size: int) -> requests.Session:
+    """Cria uma sessão HTTP com pool de conexões keep-alive compartilhado entre as consultas."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_request_status(correlation_id: str, session: Optional[requests.Session] = None) -> Dict[str, Any]:
     """
     Bate no endpoint de status para obter o resultado da extração.
     """
     url = OCR_STATUS_ENDPOINT.format(correlation_id=correlation_id)
+    http = session if session is not None else requests
     try:
-        response = requests.get(url, timeout=30)
+        response = http.get(url, timeout=30)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
         print(f"  -> ERRO de requisição para {correlation_id}: {e}")
         return {"status": "REQUEST_ERROR", "error_details": str(e)}
 
-def extract_fields_from_data(data_content: str) -> Dict[str, Any]:
+def extract_fields_from_data_reference(data_content: str) -> Dict[str, Any]:
     """
     Analisa o conteúdo complexo da chave 'data', lida com a dupla serialização
     e extrai o dicionário de campos que está dentro de 'content', assumindo que
     o conteúdo é um JSON dinâmico.
+
+    Implementação de referência: é ela que define o formato das mensagens de
+    erro, e o caminho rápido (extract_fields_from_data) recorre a ela sempre
+    que o payload não segue a estrutura esperada.
     """
     try:
         # 1. Desserializar o conteúdo de 'data' (que é uma string JSON)
@@ -86,6 +153,40 @@ def extract_fields_from_data(data_content: str) -> Dict[str, Any]:
     except Exception as e:
         return {"extraction_error": f"Unexpected error during field extraction: {e}"}
 
+def extract_fields_from_data(data_content: str) -> Dict[str, Any]:
+    """
+    Extrai o dicionário de campos de 'data' (data -> choices[0] -> message ->
+    content, com 'content' como dict ou string JSON).
+
+    Caminho rápido: acessa diretamente o bloco de campos, usando orjson quando
+    instalado. Qualquer desvio da estrutura esperada (ou JSON inválido) é
+    delegado a extract_fields_from_data_reference, então o resultado e as
+    mensagens de erro são idênticos aos da implementação de referência.
+    """
+    try:
+        data_json = fast_json_loads(data_content)
+        content_block = data_json["choices"][0]["message"]["content"]
+        if type(content_block) is str:
+            return fast_json_loads(content_block)
+        if type(content_block) is dict:
+            return content_block
+    except Exception:
+        pass
+    return extract_fields_from_data_reference(data_content)
+
+# Stores JSONL abertos, um por diretório de saída
+result_stores = {}
+result_stores_lock = threading.Lock()
+
+def get_result_store(directory: str):
+    """Abre (uma única vez por diretório) o store JSONL usado quando STORAGE_BACKEND == "jsonl"."""
+    from eval_tests_with_groundedtruths.storage.sharded_store import ShardedJSONLStore
+
+    with result_stores_lock:
+        if directory not in result_stores:
+            result_stores[directory] = ShardedJSONLStore(directory)
+        return result_stores[directory]
+
 def create_response_file(correlation_id: str, file_name: str, extracted_data: Dict[str, Any], status_response: Dict[str, Any]) -> None:
     """
     Cria arquivo individual no formato esperado na pasta /files
@@ -103,6 +204,10 @@ def create_response_file(correlation_id: str, file_name: str, extracted_data: Di
         }
     }
     
+    if STORAGE_BACKEND == "jsonl":
+        get_result_store(FILES_OUTPUT_DIR).append(file_structure)
+        return
+
     # Garantir que o diretório existe
     os.makedirs(FILES_OUTPUT_DIR, exist_ok=True)
     
@@ -122,6 +227,10 @@ def create_groundtruth_file(correlation_id: str, file_name: str, extracted_data:
         "expected_response": extracted_data
     }
     
+    if STORAGE_BACKEND == "jsonl":
+        get_result_store(GROUNDTRUTH_OUTPUT_DIR).append(groundtruth_structure)
+        return
+
     # Garantir que o diretório existe
     os.makedirs(GROUNDTRUTH_OUTPUT_DIR, exist_ok=True)
     
@@ -131,11 +240,260 @@ def create_groundtruth_file(correlation_id: str, file_name: str, extracted_data:
         json.dump(groundtruth_structure, f, indent=2, ensure_ascii=False)
 
 
+def handle_completed_result(corr_id: str, file_name: str, status_response: Dict[str, Any],
+                            dedupe_cache: Optional[DedupeCache] = None) -> bool:
+    """
+    Processa o resultado final de um correlation_id e cria os arquivos em
+    /files e /groundedtruths. Retorna True se os arquivos foram criados.
+    """
+    current_status = status_response.get("status", "UNKNOWN")
+    extraction_data = {}
+    
+    # Tenta extrair dados se existirem, independente do status
+    if status_response.get("data"):
+        extraction_data = extract_fields_from_data(status_response["data"])
+        print(f"  -> Dados extraídos com sucesso para {corr_id}")
+    
+    else:
+        # Registra o erro para que o humano saiba que precisa de entrada manual
+        extraction_data = {"extraction_status": current_status, "error_details": status_response.get("error_details", "N/A")}
+        print(f"  -> Nenhum dado encontrado para {corr_id}, status: {current_status}")
+
+    # Criar arquivos individuais nas pastas /files e /groundedtruths
+    try:
+        create_response_file(corr_id, file_name, extraction_data, status_response)
+        create_groundtruth_file(corr_id, file_name, extraction_data)
+        if dedupe_cache is not None:
+            dedupe_cache.record_result(corr_id, {"status": current_status, "response_data": extraction_data})
+        print(f"  -> Arquivos criados para {corr_id}")
+        return True
+    except Exception as e:
+        print(f"  -> ERRO ao criar arquivos para {corr_id}: {e}")
+        return False
+
+def next_polling_delay(previous_delay: float) -> float:
+    """Backoff exponencial limitado a POLLING_MAX_DELAY_SECONDS."""
+    return min(previous_delay * 2, POLLING_MAX_DELAY_SECONDS)
+
+def with_jitter(delay: float) -> float:
+    return delay * random.uniform(1 - POLLING_JITTER, 1 + POLLING_JITTER)
+
+async def poll_until_complete(corr_id: str, file_name: str, session: requests.Session, executor: ThreadPoolExecutor,
+                              pending: Dict[str, str], dedupe_cache: Optional[DedupeCache],
+                              max_wait: Optional[float] = None) -> bool:
+    """
+    Consulta um único correlation_id com backoff próprio até que ele termine
+    ou até `max_wait` segundos; nesse caso o ID continua em `pending`.
+    """
+    loop = asyncio.get_running_loop()
+    delay = POLLING_INITIAL_DELAY_SECONDS
+    deadline = None if max_wait is None else loop.time() + max_wait
+
+    while True:
+        # A requisição roda no pool de threads, que também limita a concorrência
+        status_response = await loop.run_in_executor(executor, get_request_status, corr_id, session)
+        current_status = status_response.get("status", "UNKNOWN")
+
+        print(f"  -> {file_name} ({corr_id}): Status atual: {current_status}")
+
+        if current_status in COMPLETED_STATUSES:
+            created = handle_completed_result(corr_id, file_name, status_response, dedupe_cache)
+            pending.pop(corr_id, None)
+            return created
+
+        sleep = with_jitter(delay)
+        if deadline is not None:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                print(f"  -> {file_name} ({corr_id}): TIMEOUT após {max_wait}s, último status: {current_status}")
+                return False
+            # A última checagem acontece no prazo, em vez de esperar o backoff inteiro
+            sleep = min(sleep, remaining)
+        await asyncio.sleep(sleep)
+        delay = next_polling_delay(delay)
+
+async def poll_pending_requests(pending: Dict[str, str], dedupe_cache: Optional[DedupeCache] = None,
+                                max_concurrency: int = MAX_CONCURRENT_STATUS_REQUESTS,
+                                max_wait: Optional[float] = None) -> int:
+    """
+    Consulta todos os correlation_ids pendentes ({correlation_id: file_name}) em
+    paralelo. Cada ID tem seu próprio ciclo de backoff, então o tempo total
+    acompanha o documento mais lento e não o tamanho do lote. IDs concluídos
+    saem de `pending` em O(1); os que não terminam em `max_wait` segundos
+    (padrão: POLLING_MAX_WAIT_SECONDS) permanecem nele. Retorna quantos
+    resultados geraram arquivos.
+    """
+    max_concurrency = max(1, max_concurrency)
+    if max_wait is None:
+        max_wait = POLLING_MAX_WAIT_SECONDS
+    with create_session(max_concurrency) as session, ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        results = await asyncio.gather(*(
+            poll_until_complete(corr_id, file_name, session, executor, pending, dedupe_cache, max_wait)
+            for corr_id, file_name in list(pending.items())
+        ))
+    return sum(1 for created in results if created)
+
+def run_async(coroutine):
+    """
+    Executa a corrotina até o fim. Em notebooks (Databricks/Jupyter) já existe
+    um event loop rodando, então ela é executada em uma thread separada.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Recebe os callbacks da API (mesmo formato da resposta de status)."""
+
+    def do_POST(self):
+        receiver = self.server.receiver
+        if self.path.split("?")[0] != receiver.path:
+            self._send_json(404, {"detail": "Not Found"})
+            return
+
+        # Comparação em tempo constante, para não vazar o token por temporização
+        token = self.headers.get(WEBHOOK_TOKEN_HEADER, "")
+        if not hmac.compare_digest(token.encode("utf-8"), receiver.token.encode("utf-8")):
+            self._send_json(401, {"detail": "Invalid webhook token"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {"detail": f"Invalid JSON body: {e}"})
+            return
+
+        # JSON válido mas fora do formato da resposta de status (ex.: [1, 2])
+        if not isinstance(payload, dict):
+            self._send_json(400, {"detail": "JSON body must be an object"})
+            return
+        corr_id = payload.get("correlation_id") or payload.get("request_id")
+        if not isinstance(corr_id, str):
+            self._send_json(400, {"detail": "Missing or invalid 'correlation_id'"})
+            return
+
+        accepted = receiver.handle_callback(payload)
+        self._send_json(200, {"received": True, "processed": accepted})
+
+    def _send_json(self, status_code: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class WebhookReceiver:
+    """
+    Receptor HTTP local para os callbacks da API de OCR.
+
+    Cada callback final de um correlation_id pendente é processado com
+    handle_completed_result (mesmos arquivos em /files e /groundedtruths do
+    polling) assim que chega. Callbacks de IDs desconhecidos, já processados
+    ou com status intermediário são apenas confirmados; callbacks sem o
+    token (header WEBHOOK_TOKEN_HEADER) são recusados com 401.
+    """
+
+    def __init__(self, pending: Dict[str, str], dedupe_cache: Optional[DedupeCache] = None,
+                 host: Optional[str] = None, port: Optional[int] = None, path: Optional[str] = None,
+                 token: Optional[str] = None):
+        # Configurações globais lidas na criação, para que possam ser ajustadas no notebook
+        host = WEBHOOK_HOST if host is None else host
+        port = WEBHOOK_PORT if port is None else port
+        self.token = WEBHOOK_TOKEN if token is None else token
+        if not self.token:
+            raise ValueError("WEBHOOK_TOKEN não configurado: o receptor de webhook exige um token")
+        self.pending = pending
+        self.dedupe_cache = dedupe_cache
+        self.path = WEBHOOK_PATH if path is None else path
+        self.lock = threading.Lock()
+        self.all_received = threading.Event()
+        self.processed_count = 0
+
+        self.server = ThreadingHTTPServer((host, port), WebhookHandler)
+        # Threads não-daemon e block_on_close: server_close() (em stop) aguarda
+        # os callbacks em andamento, antes que o fallback de polling olhe `pending`
+        self.server.daemon_threads = False
+        self.server.block_on_close = True
+        self.server.receiver = self
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+
+    def start(self) -> "WebhookReceiver":
+        if not self.pending:
+            self.all_received.set()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Para de aceitar callbacks e aguarda os que ainda estão sendo processados."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle_callback(self, payload: Dict[str, Any]) -> bool:
+        corr_id = payload.get("correlation_id") or payload.get("request_id")
+        current_status = payload.get("status", "UNKNOWN")
+        if current_status not in COMPLETED_STATUSES:
+            return False
+
+        # Retira o ID dos pendentes antes de processar: callbacks repetidos são ignorados
+        with self.lock:
+            file_name = self.pending.pop(corr_id, None)
+        if file_name is None:
+            return False
+
+        print(f"  -> [WEBHOOK] {file_name} ({corr_id}): Status atual: {current_status}")
+        created = handle_completed_result(corr_id, file_name, payload, self.dedupe_cache)
+        with self.lock:
+            if created:
+                self.processed_count += 1
+            if not self.pending:
+                self.all_received.set()
+        return created
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """Aguarda todos os callbacks pendentes; retorna False se o tempo acabar antes."""
+        return self.all_received.wait(timeout)
+
+def collect_via_webhook(pending: Dict[str, str], dedupe_cache: Optional[DedupeCache] = None,
+                        wait_timeout: Optional[float] = None) -> int:
+    """
+    Aguarda os callbacks dos IDs pendentes e usa polling apenas para os IDs
+    que não chamaram de volta dentro de `wait_timeout`. Retorna quantos
+    resultados geraram arquivos.
+    """
+    if wait_timeout is None:
+        wait_timeout = WEBHOOK_WAIT_TIMEOUT_SECONDS
+    receiver = WebhookReceiver(pending, dedupe_cache).start()
+    print(f"[WEBHOOK] Aguardando callbacks em {receiver.url} (timeout: {wait_timeout}s)...")
+    try:
+        receiver.wait(wait_timeout)
+    finally:
+        receiver.stop()
+
+    processed_count = receiver.processed_count
+    if pending:
+        print(f"\n[FALLBACK] {len(pending)} IDs sem callback; consultando {OCR_STATUS_ENDPOINT}...")
+        processed_count += run_async(poll_pending_requests(pending, dedupe_cache))
+    return processed_count
+
 # ----------------------------------------------------------------------
 # 2. EXECUÇÃO PRINCIPAL
 # ----------------------------------------------------------------------
 
-def collect_results():
+def collect_results(mode: str = COLLECTION_MODE):
     if not os.path.exists(LOG_FILE):
         print(f"ERRO: Arquivo de log '{LOG_FILE}' não encontrado.")
         print("Certifique-se de que o script do Passo 1 foi executado e salvou o log.")
@@ -144,8 +502,10 @@ def collect_results():
     # 1. Carregar IDs de correlação do Passo 1
     try:
         df_log = pd.read_csv(LOG_FILE)
-        # Filtra apenas os IDs que foram enviados com sucesso, caso haja erros no log
-        ids_to_process = df_log[df_log['status'] == 'SENT_SUCCESS']
+        # Filtra apenas os IDs que foram enviados com sucesso, caso haja erros no log.
+        # Documentos idênticos compartilham o mesmo correlation_id (cache de
+        # deduplicação do Passo 1), então cada ID é consultado uma única vez.
+        ids_to_process = df_log[df_log['status'] == 'SENT_SUCCESS'].drop_duplicates(subset='correlation_id')
         if ids_to_process.empty:
              print("Nenhum ID de correlação válido encontrado para processamento.")
              return
@@ -153,61 +513,27 @@ def collect_results():
         print(f"ERRO ao ler o arquivo de log CSV: {e}")
         return
 
-    pending_requests = ids_to_process.to_dict('records')
-    processed_count = 0
+    # Pendentes indexados por correlation_id: remoção em O(1) quando concluídos
+    pending_requests = dict(zip(ids_to_process['correlation_id'], ids_to_process['file_name']))
+    dedupe_cache = DedupeCache()
     
     print(f"Iniciando coleta de resultados para {len(pending_requests)} requisições...")
     
-    # Loop de polling até que todos os resultados sejam coletados
-    while pending_requests:
-        print(f"\n[POLLING] Checando {len(pending_requests)} requisições pendentes...")
-        
-        # Usamos uma cópia para iterar enquanto modificamos a lista original
-        for request_info in list(pending_requests):
-            
-            file_name = request_info['file_name']
-            corr_id = request_info['correlation_id']
-            
-            status_response = get_request_status(corr_id)
-            current_status = status_response.get("status", "UNKNOWN")
-            
-            print(f"  -> {file_name} ({corr_id}): Status atual: {current_status}")
-
-            if current_status in COMPLETED_STATUSES:
-                
-                # 2. Processamento do Resultado Final
-                extraction_data = {}
-                
-                # Tenta extrair dados se existirem, independente do status
-                if status_response.get("data"):
-                    extraction_data = extract_fields_from_data(status_response["data"])
-                    print(f"  -> Dados extraídos com sucesso para {corr_id}")
-                
-                else:
-                    # Registra o erro para que o humano saiba que precisa de entrada manual
-                    extraction_data = {"extraction_status": current_status, "error_details": status_response.get("error_details", "N/A")}
-                    print(f"  -> Nenhum dado encontrado para {corr_id}, status: {current_status}")
-
-                # 3. Criar arquivos individuais nas pastas /files e /groundedtruths
-                try:
-                    create_response_file(corr_id, file_name, extraction_data, status_response)
-                    create_groundtruth_file(corr_id, file_name, extraction_data)
-                    processed_count += 1
-                    print(f"  -> Arquivos criados para {corr_id}")
-                except Exception as e:
-                    print(f"  -> ERRO ao criar arquivos para {corr_id}: {e}")
-                
-                # Remove da lista de pendentes
-                pending_requests.remove(request_info)
-
-        if pending_requests:
-            # Espera antes de checar novamente
-            print(f"\nAguardando {POLLING_INTERVAL_SECONDS} segundos...")
-            time.sleep(POLLING_INTERVAL_SECONDS)
-        else:
-            print("\nTodos os resultados foram coletados.")
+    # 2. Coleta por webhook (com fallback) ou polling concorrente até o fim
+    if mode == "webhook":
+        processed_count = collect_via_webhook(pending_requests, dedupe_cache)
+    else:
+        processed_count = run_async(poll_pending_requests(pending_requests, dedupe_cache))
+    if pending_requests:
+        print(f"\nATENÇÃO: {len(pending_requests)} requisições não terminaram no prazo e não foram coletadas:")
+        for corr_id, file_name in pending_requests.items():
+            print(f"  -> {file_name} ({corr_id})")
+    else:
+        print("\nTodos os resultados foram coletados.")
+
+    dedupe_cache.save()
 
-    # 4. Relatório final
+    # 3. Relatório final
     if processed_count > 0:
         print(f"\n--- Processo de Coleta Concluído ---")
         print(f"Arquivos processados: {processed_count}")
@@ -219,7 +545,16 @@ def collect_results():
 # ----------------------------------------------------------------------
 # INICIAR COLETA
 # ----------------------------------------------------------------------
-if OCR_STATUS_ENDPOINT == "https://seu-servidor-stg.com/requests/{correlation_id}/status":
-    print("\nATENÇÃO: Por favor, substitua a variável 'OCR_STATUS_ENDPOINT' pela URL real da sua API antes de executar.")
-else:
-    collect_results()
+# Em notebooks (Databricks/Jupyter) __name__ também é "__main__"; a guarda
+# apenas evita disparar a coleta quando o módulo é importado.
+if __name__ == "__main__":
+    # parse_known_args ignora os argumentos que o kernel do notebook injeta
+    parser = argparse.ArgumentParser(description="Coleta dos resultados de OCR")
+    parser.add_argument("--mode", choices=["polling", "webhook"], default=COLLECTION_MODE)
+    cli_args, _ = parser.parse_known_args(sys.argv[1:])
+
+    if OCR_STATUS_ENDPOINT == "https://seu-servidor-stg.com/requests/{correlation_id}/status":
+        print("\nATENÇÃO: Por favor, substitua a variável 'OCR_STATUS_ENDPOINT' pela URL real da sua API antes de executar.")
+    else:
+        collect_results(cli_args.mode)
+
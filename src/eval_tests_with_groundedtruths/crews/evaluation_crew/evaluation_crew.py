@@ -5,6 +5,7 @@ from typing import List
 
 from ...tools.json_reader_tool import JSONFileReaderTool
 from ...tools.exact_match_tool import ExactMatchTool
+from ...tools.batch_exact_match_tool import BatchExactMatchTool
 from ...tools.report_generator_tool import ReportGeneratorTool
 
 
@@ -31,7 +32,7 @@ class EvaluationCrew:
     def exact_match_evaluator(self) -> Agent:
         return Agent(
             config=self.agents_config["exact_match_evaluator"],
-            tools=[ExactMatchTool()],
+            tools=[BatchExactMatchTool(), ExactMatchTool()],
             verbose=True,
             llm="anthropic/claude-sonnet-4-20250514"
         )
@@ -5,14 +5,70 @@ from crewai import LLM
 
 from eval_tests_with_groundedtruths.models.evaluation_models import EvaluationState
 from eval_tests_with_groundedtruths.crews.evaluation_crew.evaluation_crew import EvaluationCrew
+from eval_tests_with_groundedtruths.storage.artifact_store import get_artifact_store
+from eval_tests_with_groundedtruths.storage.flow_checkpoint import DEFAULT_CHECKPOINT_DIR, FlowCheckpoint, inputs_fingerprint
+from eval_tests_with_groundedtruths.reporting.report_state import result_digest
+from eval_tests_with_groundedtruths.tools.exact_match_tool import ExactMatchTool
+from eval_tests_with_groundedtruths.tools.json_reader_tool import JSONFileReaderTool
+from eval_tests_with_groundedtruths.metrics.engine import evaluate_sharded
+from eval_tests_with_groundedtruths.metrics.normalizers import compile_spec
+from eval_tests_with_groundedtruths.metrics.similarity import DEFAULT_MIN_SIMILARITY
+from eval_tests_with_groundedtruths.metrics.summary_state import SUMMARY_STATE_SUFFIX, SummaryState
+from eval_tests_with_groundedtruths.tools.report_generator_tool import ReportGeneratorTool
 
 
 class AgentEvaluationFlow(Flow[EvaluationState]):
-    """Flow para avaliação de agents com gabaritos"""
+    """
+    Flow para avaliação de agents com gabaritos.
+
+    O estado é gravado em checkpoint (ver storage.flow_checkpoint) ao fim de
+    cada etapa; com `resume`, as etapas já concluídas para as mesmas
+    entradas são puladas e o estado delas é restaurado do disco.
+    """
+
+    def _get_checkpoint(self) -> FlowCheckpoint:
+        return FlowCheckpoint(os.getenv("EVALUATION_CHECKPOINT_DIR", DEFAULT_CHECKPOINT_DIR))
+
+    def _inputs_fingerprint(self) -> str:
+        """Impressão digital das pastas de entrada e das opções que alteram o resultado."""
+        return inputs_fingerprint(["files", "groundedtruths"], {
+            "execution_mode": self.state.execution_mode,
+            "tolerant": os.getenv("EVALUATION_TOLERANT", "0"),
+            "similarity": os.getenv("EVALUATION_SIMILARITY", "0"),
+        })
+
+    def _stage_completed(self, stage: str) -> bool:
+        if stage in self.state.completed_stages:
+            print(f"⏭️ Etapa '{stage}' já concluída (checkpoint)")
+            return True
+        return False
+
+    def _save_stage(self, stage: str, *fields: str) -> None:
+        """Grava no checkpoint os campos produzidos pela etapa."""
+        self._get_checkpoint().save(stage, self.state, fields)
+        self.state.completed_stages.append(stage)
 
     @start()
     def start_evaluation(self):
-        """Inicia o processo de avaliação"""
+        """Inicia o processo de avaliação (ou retoma do checkpoint)"""
+        checkpoint = self._get_checkpoint()
+        fingerprint = self._inputs_fingerprint()
+        self.state.completed_stages = []
+
+        if self.state.resume:
+            completed = checkpoint.completed_stages(fingerprint)
+            if completed:
+                print(f"🔁 Retomando do checkpoint: {', '.join(completed)} concluída(s)")
+                for stage in completed:
+                    checkpoint.restore(stage, self.state)
+                self.state.completed_stages = completed
+            else:
+                print("ℹ️ Nenhum checkpoint válido para estas entradas; iniciando do zero")
+
+        if self._stage_completed("start_evaluation"):
+            return
+
+        checkpoint.begin(fingerprint)
         print("🚀 Iniciando processo de avaliação de agents com gabaritos...")
         
         # Verificar se as pastas existem
@@ -30,12 +86,23 @@ class AgentEvaluationFlow(Flow[EvaluationState]):
         self.state.response_files = []
         self.state.report_generated = False
         self.state.summary = None
+        self.state.metrics = None
+        get_artifact_store().clear()
         print("✅ Pastas de arquivos encontradas")
         print("📁 Iniciando escaneamento de arquivos...")
+        self._save_stage("start_evaluation")
 
     @listen(start_evaluation)
     def run_evaluation_crew(self):
-        """Executa a crew de avaliação completa"""
+        """Executa a crew de avaliação completa (ou as ferramentas diretamente, no modo 'direct')"""
+        if self._stage_completed("run_evaluation_crew"):
+            return
+
+        if self.state.execution_mode == "direct":
+            self.run_direct_evaluation()
+            self._save_stage("run_evaluation_crew", "report_generated")
+            return
+
         print("🤖 Executando crew de avaliação...")
         
         try:
@@ -48,26 +115,131 @@ class AgentEvaluationFlow(Flow[EvaluationState]):
             
             # Marcar como concluído
             self.state.report_generated = True
+            self._save_stage("run_evaluation_crew", "report_generated")
             
         except Exception as e:
             print(f"❌ Erro na execução da crew: {str(e)}")
             raise
 
+    def run_direct_evaluation(self):
+        """
+        Executa a avaliação de forma determinística, sem LLM: encadeia
+        JSONFileReaderTool, o motor de métricas (acurácia e TP/FP/FN em uma
+        única passada) e ReportGeneratorTool, com o mesmo relatório final da
+        crew. Pares sem mudança desde a última execução vêm do cache de
+        avaliações do ExactMatchTool; só os demais são comparados, e gravados
+        no cache em seguida. Com EVALUATION_WORKERS > 1, os pares são
+        avaliados em shards em paralelo e os parciais combinados (resultado
+        idêntico ao de um processo). Com EVALUATION_REPORT_TOP_K, o relatório traz só as piores
+        avaliações e divergências por campo, com o detalhamento completo em
+        arquivo à parte; com EVALUATION_REPORT_INCREMENTAL=1, o relatório é
+        atualizado a partir do estado salvo, renderizando só as avaliações
+        novas. Com EVALUATION_SUMMARY_STATE, o estado do resumo é gravado
+        nesse arquivo para ser combinado com o de outras execuções
+        (merge_summaries). Escaneamento, avaliação e relatório têm checkpoints
+        próprios: uma falha no relatório não refaz as anteriores.
+        """
+        print("⚙️ Executando avaliação direta (sem LLM)...")
+
+        if not self._stage_completed("direct_scan"):
+            scan = JSONFileReaderTool()._run("files", "groundedtruths")
+            if "error" in scan:
+                raise RuntimeError(scan["error"])
+            self.state.matched_pairs = get_artifact_store().get(scan["matched_pairs_handle"])
+            self._save_stage("direct_scan", "matched_pairs")
+        print(f"📁 {len(self.state.matched_pairs)} pares encontrados")
+
+        if not self._stage_completed("direct_evaluate"):
+            normalizer = compile_spec() if os.getenv("EVALUATION_TOLERANT", "0") == "1" else None
+            min_similarity = DEFAULT_MIN_SIMILARITY if os.getenv("EVALUATION_SIMILARITY", "0") == "1" else None
+            workers = int(os.getenv("EVALUATION_WORKERS", "1"))
+            evaluator = ExactMatchTool(tolerant=normalizer is not None, similarity=min_similarity is not None)
+            cached, cache_keys = evaluator.lookup_cache(self.state.matched_pairs)
+            hits = sum(1 for result in cached if result is not None)
+            if hits:
+                print(f"💾 {hits} avaliações reaproveitadas do cache")
+            self.state.evaluation_results, accumulator = evaluate_sharded(
+                self.state.matched_pairs, normalizer, min_similarity, workers, cached=cached
+            )
+            evaluator.store_cache(
+                (cache_key, result)
+                for cache_key, result, cached_result in zip(cache_keys, self.state.evaluation_results, cached)
+                if cached_result is None
+            )
+            # A chave do cache identifica o conteúdo do par e as opções de
+            # comparação: o relatório incremental compara com ela (resumida),
+            # sem serializar os resultados
+            self.state.evaluation_digests = {
+                result.id: result_digest(cache_key) for result, cache_key in zip(self.state.evaluation_results, cache_keys)
+            }
+            self.state.metrics = accumulator.report()
+            self.state.summary = accumulator.summary()
+            summary_state_file = os.getenv("EVALUATION_SUMMARY_STATE")
+            if summary_state_file:
+                source = os.path.basename(summary_state_file).removesuffix(SUMMARY_STATE_SUFFIX)
+                SummaryState.from_accumulator(accumulator, source).save(summary_state_file)
+            self._save_stage("direct_evaluate", "evaluation_results", "evaluation_digests", "metrics", "summary")
+
+        if not self._stage_completed("direct_report"):
+            top_k = os.getenv("EVALUATION_REPORT_TOP_K")
+            incremental = os.getenv("EVALUATION_REPORT_INCREMENTAL", "0") == "1"
+            report_tool = ReportGeneratorTool(top_k=int(top_k) if top_k else None, incremental=incremental)
+            # No modo incremental, só as avaliações novas são renderizadas; se
+            # alguma foi alterada ou removida desde o último relatório (digests
+            # diferentes dos salvos), o writer descarta o estado e refaz o
+            # relatório do zero, na mesma passada
+            report = report_tool._run(
+                self.state.evaluation_results,
+                metrics=self.state.metrics.dict(),
+                summary=self.state.summary.dict(),
+                digests=(self.state.evaluation_digests or None) if incremental else None,
+            )
+            if incremental and report["success"]:
+                mode = "atualizado" if report["incremental"] else "gerado do zero"
+                print(f"📝 Relatório {mode}: {report['new_evaluations']} avaliações renderizadas")
+            if not report["success"]:
+                raise RuntimeError(report["error"])
+            self._save_stage("direct_report")
+
+        print(f"✅ Avaliação direta concluída: {len(self.state.evaluation_results)} avaliações, "
+              f"acurácia geral {self.state.summary.overall_accuracy}%")
+        print(f"🎯 F1 micro {self.state.metrics.micro.f1_score:.4f} | F1 macro {self.state.metrics.macro.f1_score:.4f}")
+        self.state.report_generated = True
+
     @listen(run_evaluation_crew)
     def finalize_evaluation(self):
         """Finaliza o processo de avaliação"""
+        if self._stage_completed("finalize_evaluation"):
+            return
+
         if self.state.report_generated:
             print("🎉 Processo de avaliação concluído com sucesso!")
             print("📋 Relatório gerado: EVALUATION_REPORT.md")
             print("💡 Verifique o arquivo para ver os resultados detalhados")
+            self._save_stage("finalize_evaluation", "report_generated")
         else:
             print("⚠️ Processo de avaliação não foi concluído corretamente")
 
 
 def kickoff():
-    """Executa o flow de avaliação"""
+    """Executa o flow de avaliação (modo definido por EVALUATION_MODE: 'crew' ou 'direct')"""
+    evaluation_flow = AgentEvaluationFlow()
+    evaluation_flow.kickoff(inputs={"execution_mode": os.getenv("EVALUATION_MODE", "crew")})
+
+
+def kickoff_direct():
+    """Executa o flow de avaliação no modo direto (sem LLM)"""
+    evaluation_flow = AgentEvaluationFlow()
+    evaluation_flow.kickoff(inputs={"execution_mode": "direct"})
+
+
+def kickoff_resume():
+    """
+    Retoma o flow de avaliação a partir do checkpoint (modo definido por
+    EVALUATION_MODE), pulando as etapas já concluídas para as mesmas entradas
+    """
     evaluation_flow = AgentEvaluationFlow()
-    evaluation_flow.kickoff()
+    evaluation_flow.kickoff(inputs={"execution_mode": os.getenv("EVALUATION_MODE", "crew"), "resume": True})
 
 
 def plot():
@@ -0,0 +1,185 @@
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..models.evaluation_models import EvaluationSummary, ExactMatchResult
+
+
+def error_type(field: str, expected: Any, actual: Any) -> str:
+    """Classificação de uma divergência nos padrões de erro do relatório."""
+    if expected is None and actual is not None:
+        return f"Campo '{field}': valor não esperado fornecido"
+    elif expected is not None and actual is None:
+        return f"Campo '{field}': valor esperado ausente"
+    elif isinstance(expected, str) and isinstance(actual, str):
+        return f"Campo '{field}': divergência textual"
+    elif isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+        return f"Campo '{field}': divergência numérica"
+    else:
+        return f"Campo '{field}': divergência de tipo/formato"
+
+
+def error_patterns(field_counter: Counter, type_counter: Counter) -> List[str]:
+    """Top 5 campos e tipos de erro (empates na ordem da primeira ocorrência)."""
+    patterns = []
+
+    # Top 5 campos com mais erros
+    if field_counter:
+        patterns.append("Campos com mais erros:")
+        for field, count in field_counter.most_common(5):
+            patterns.append(f"  • {field}: {count} ocorrências")
+
+    # Top 5 tipos de erro mais comuns
+    if type_counter:
+        patterns.append("Tipos de erro mais comuns:")
+        for error, count in type_counter.most_common(5):
+            patterns.append(f"  • {error}: {count} ocorrências")
+
+    return patterns
+
+
+class ResultAggregator:
+    """
+    Agregação em streaming dos ExactMatchResult: consome os resultados um a
+    um (de uma lista, gerador ou store) e mantém apenas contadores, então a
+    memória não cresce com o número de avaliações (só com o número de campos
+    e tipos de erro distintos).
+
+    Os contadores são inteiros (acurácia e similaridade somadas em
+    centésimos), então agregadores de partes consecutivas do conjunto,
+    combinados com merge() na ordem das partes, dão o mesmo resumo que uma
+    passada única (a ordem só decide os empates entre padrões de erro).
+    """
+
+    def __init__(self):
+        self.total_evaluations = 0
+        self.accuracy_hundredths = 0
+        self.perfect_matches = 0
+        self.complete_mismatches = 0
+        self.similarity_hundredths = 0
+        self.similarity_count = 0
+        self.error_fields: Counter = Counter()
+        self.error_types: Counter = Counter()
+
+    def add(self, result: ExactMatchResult) -> None:
+        """Acumula um resultado."""
+        self.total_evaluations += 1
+        self.accuracy_hundredths += round(result.accuracy_percentage * 100)
+        if result.accuracy_percentage == 100:
+            self.perfect_matches += 1
+        elif result.accuracy_percentage == 0:
+            self.complete_mismatches += 1
+
+        if result.similarity_percentage is not None:
+            self.similarity_hundredths += round(result.similarity_percentage * 100)
+            self.similarity_count += 1
+
+        for field, mismatch in result.mismatched_fields.items():
+            self.error_fields[field] += 1
+            self.error_types[error_type(field, mismatch.get('expected'), mismatch.get('actual'))] += 1
+
+    def add_all(self, results: Iterable[ExactMatchResult]) -> "ResultAggregator":
+        for result in results:
+            self.add(result)
+        return self
+
+    def merge(self, other: "ResultAggregator") -> "ResultAggregator":
+        """Soma os contadores de outro agregador (ex.: de outro shard) a este."""
+        self.total_evaluations += other.total_evaluations
+        self.accuracy_hundredths += other.accuracy_hundredths
+        self.perfect_matches += other.perfect_matches
+        self.complete_mismatches += other.complete_mismatches
+        self.similarity_hundredths += other.similarity_hundredths
+        self.similarity_count += other.similarity_count
+        self.error_fields.update(other.error_fields)
+        self.error_types.update(other.error_types)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Estado serializável em JSON (os contadores mantêm a ordem de primeira ocorrência)."""
+        return {
+            "total_evaluations": self.total_evaluations,
+            "accuracy_hundredths": self.accuracy_hundredths,
+            "perfect_matches": self.perfect_matches,
+            "complete_mismatches": self.complete_mismatches,
+            "similarity_hundredths": self.similarity_hundredths,
+            "similarity_count": self.similarity_count,
+            "error_fields": dict(self.error_fields),
+            "error_types": dict(self.error_types),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ResultAggregator":
+        aggregator = cls()
+        for name in ("total_evaluations", "accuracy_hundredths", "perfect_matches", "complete_mismatches",
+                     "similarity_hundredths", "similarity_count"):
+            setattr(aggregator, name, data[name])
+        aggregator.error_fields = Counter(data["error_fields"])
+        aggregator.error_types = Counter(data["error_types"])
+        return aggregator
+
+    @property
+    def partial_matches(self) -> int:
+        return self.total_evaluations - self.perfect_matches - self.complete_mismatches
+
+    @property
+    def overall_accuracy(self) -> float:
+        """Média da acurácia por avaliação (0-100), sem arredondamento."""
+        return self.accuracy_hundredths / 100 / self.total_evaluations if self.total_evaluations else 0
+
+    @property
+    def average_similarity(self) -> Optional[float]:
+        """Média da similaridade dos campos de texto por avaliação (0-100), se houver."""
+        return self.similarity_hundredths / 100 / self.similarity_count if self.similarity_count else None
+
+    def summary(self) -> EvaluationSummary:
+        """Resumo quantitativo das avaliações acumuladas."""
+        return EvaluationSummary(
+            total_evaluations=self.total_evaluations,
+            overall_accuracy=round(self.overall_accuracy, 2),
+            perfect_matches=self.perfect_matches,
+            partial_matches=self.partial_matches,
+            complete_mismatches=self.complete_mismatches,
+            common_error_patterns=error_patterns(self.error_fields, self.error_types),
+        )
+
+    def qualitative_analysis(self) -> Dict[str, Any]:
+        """Análise qualitativa das avaliações acumuladas."""
+        analysis = {
+            "performance_assessment": "",
+            "key_findings": [],
+            "recommendations": []
+        }
+
+        total = self.total_evaluations
+        perfect_rate = self.perfect_matches / total * 100 if total else 0
+        overall_avg = self.overall_accuracy
+
+        # Avaliação geral de performance
+        if overall_avg >= 90:
+            analysis["performance_assessment"] = "EXCELENTE - O agent demonstra alta precisão e consistência."
+        elif overall_avg >= 75:
+            analysis["performance_assessment"] = "BOM - O agent apresenta boa performance com espaço para melhorias."
+        elif overall_avg >= 50:
+            analysis["performance_assessment"] = "REGULAR - O agent precisa de ajustes significativos."
+        else:
+            analysis["performance_assessment"] = "CRÍTICO - O agent requer revisão completa da implementação."
+
+        # Principais achados
+        analysis["key_findings"].append(f"Taxa de acerto perfeito: {perfect_rate:.1f}%")
+        analysis["key_findings"].append(f"Acurácia média geral: {overall_avg:.1f}%")
+
+        if perfect_rate < 30:
+            analysis["key_findings"].append("Baixa taxa de acertos perfeitos indica problemas sistemáticos")
+
+        # Recomendações
+        if overall_avg < 75:
+            analysis["recommendations"].append("Revisar prompts e instruções dos agents")
+            analysis["recommendations"].append("Implementar validação de saída mais rigorosa")
+
+        if perfect_rate < 50:
+            analysis["recommendations"].append("Investigar padrões de erro específicos")
+            analysis["recommendations"].append("Considerar fine-tuning ou ajuste de parâmetros")
+
+        analysis["recommendations"].append("Aumentar conjunto de dados de teste para melhor cobertura")
+
+        return analysis
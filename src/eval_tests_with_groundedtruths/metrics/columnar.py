@@ -0,0 +1,237 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .normalizers import FieldNormalizer
+from ..models.evaluation_models import ExactMatchResult
+from ..tools.exact_match_tool import values_match
+
+
+# Esquema fixo dos documentos de OCR (faturas AFIP). Define a ordem das colunas;
+# campos fora do esquema continuam sendo avaliados, depois destes.
+OCR_FIELDS = (
+    "cuit_emisor",
+    "cuit_receptor",
+    "razon_social",
+    "punto_de_venta",
+    "nro_comprobante",
+    "fecha_comprobante",
+    "codigo_afip",
+    "letra_afip",
+    "orden_compra",
+    "importe",
+    "moneda",
+)
+
+_TEXT_TYPES = {str, type(None)}
+
+
+def _is_text_column(*columns: List[Any]) -> bool:
+    """Indica se as colunas só têm str/None (caso vetorizável)."""
+    return all(set(map(type, column)) <= _TEXT_TYPES for column in columns)
+
+
+def _text_match_masks(responses: List[Optional[str]], expected: List[Optional[str]]):
+    """
+    Máscaras de uma coluna de texto: (match de values_match, valor presente na
+    resposta, valor presente no gabarito, ambos None).
+
+    A igualdade direta é vetorizada sobre a coluna inteira; strip/lower (com
+    os métodos de str do Python, para manter a semântica do caminho escalar)
+    só rodam nas células que diferem.
+    """
+    response_array = np.array(responses, dtype=object)
+    expected_array = np.array(expected, dtype=object)
+    response_none = response_array == None  # noqa: E711 (comparação elemento a elemento)
+    expected_none = expected_array == None  # noqa: E711
+
+    lowered_equal = response_array == expected_array
+    differing = np.flatnonzero(~lowered_equal)
+    response_stripped = ["" if value is None else value.strip() for value in response_array[differing]]
+    expected_stripped = ["" if value is None else value.strip() for value in expected_array[differing]]
+    lowered_equal[differing] = [r.lower() == e.lower() for r, e in zip(response_stripped, expected_stripped)]
+
+    both_none = response_none & expected_none
+    match = both_none | (~response_none & ~expected_none & lowered_equal)
+    response_present = ~response_none & (response_array != "")
+    expected_present = ~expected_none & (expected_array != "")
+    return match, response_present, expected_present, both_none
+
+
+def _generic_match_masks(responses: List[Any], expected: List[Any]):
+    """Mesmas máscaras de _text_match_masks, célula a célula (listas, números, tipos mistos)."""
+    size = len(responses)
+    match = np.fromiter((values_match(r, e) for r, e in zip(responses, expected)), dtype=bool, count=size)
+    response_present = np.fromiter((r is not None and r != "" for r in responses), dtype=bool, count=size)
+    expected_present = np.fromiter((e is not None and e != "" for e in expected), dtype=bool, count=size)
+    both_none = np.fromiter((r is None and e is None for r, e in zip(responses, expected)), dtype=bool, count=size)
+    return match, response_present, expected_present, both_none
+
+
+def _prf(tp: int, fp: int, fn: int) -> Dict[str, float]:
+    """Precision, Recall e F1 com as mesmas proteções de calculate_extraction_metrics."""
+    precision = 0.0 if (tp + fp) == 0 else tp / (tp + fp)
+    recall = 0.0 if (tp + fn) == 0 else tp / (tp + fn)
+    f1_score = 0.0 if (precision + recall) == 0 else 2 * (precision * recall) / (precision + recall)
+    return {"TP": tp, "FP": fp, "FN": fn, "Precision": precision, "Recall": recall, "F1_Score": f1_score}
+
+
+class ColumnarEvaluation:
+    """
+    Avaliação de um lote de documentos em colunas alinhadas por campo.
+
+    Todas as matrizes têm forma (documentos, campos), na ordem de `ids` e
+    `fields`:
+      - present: o campo existe (como chave) na resposta ou no gabarito,
+        ou seja, entra em total_fields do ExactMatchTool
+      - match: resultado de field_matches (match do ExactMatchTool, exato ou
+        após a normalização no modo tolerante)
+      - tp / fp / fn: classificação do MetricsAccumulator (metrics.engine),
+        com o mesmo critério de acerto de `match`; as contagens por campo e
+        micro são as mesmas de MetricsAccumulator.report()
+    """
+
+    def __init__(self, ids: Sequence[str], fields: Sequence[str], responses: Sequence[Dict[str, Any]],
+                 expected: Sequence[Dict[str, Any]], present: np.ndarray, match: np.ndarray,
+                 tp: np.ndarray, fp: np.ndarray, fn: np.ndarray):
+        self.ids = list(ids)
+        self.fields = list(fields)
+        self.responses = responses
+        self.expected = expected
+        self.present = present
+        self.match = match
+        self.tp = tp
+        self.fp = fp
+        self.fn = fn
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def total_fields(self) -> np.ndarray:
+        return self.present.sum(axis=1)
+
+    def matching_fields(self) -> np.ndarray:
+        return (self.match & self.present).sum(axis=1)
+
+    def field_accuracy(self) -> Dict[str, float]:
+        """Percentual de acerto por campo, sobre os documentos em que o campo aparece."""
+        present_counts = self.present.sum(axis=0)
+        match_counts = (self.match & self.present).sum(axis=0)
+        return {
+            field: (int(matches) / int(total) * 100) if total > 0 else 0
+            for field, matches, total in zip(self.fields, match_counts, present_counts)
+        }
+
+    def to_exact_match_results(self) -> List[ExactMatchResult]:
+        """ExactMatchResult por documento, idênticos aos de compare_pair."""
+        totals = self.total_fields().tolist()
+        matches = self.matching_fields().tolist()
+        mismatched = [{} for _ in self.ids]
+        for row, column in zip(*np.nonzero(self.present & ~self.match)):
+            field = self.fields[column]
+            mismatched[row][field] = {
+                "expected": self.expected[row].get(field),
+                "actual": self.responses[row].get(field),
+            }
+
+        return [
+            ExactMatchResult(
+                id=evaluation_id,
+                total_fields=total,
+                matching_fields=matching,
+                accuracy_percentage=round((matching / total * 100) if total > 0 else 0, 2),
+                mismatched_fields=mismatched_fields,
+            )
+            for evaluation_id, total, matching, mismatched_fields in zip(self.ids, totals, matches, mismatched)
+        ]
+
+    def extraction_metrics(self) -> List[Dict[str, float]]:
+        """TP/FP/FN e Precision/Recall/F1 por documento (no formato de calculate_extraction_metrics)."""
+        tp = self.tp.sum(axis=1).tolist()
+        fp = self.fp.sum(axis=1).tolist()
+        fn = self.fn.sum(axis=1).tolist()
+        return [_prf(*counts) for counts in zip(tp, fp, fn)]
+
+    def micro_extraction_metrics(self) -> Dict[str, float]:
+        """Métricas agregadas (micro-average) sobre todos os campos de todos os documentos."""
+        return _prf(int(self.tp.sum()), int(self.fp.sum()), int(self.fn.sum()))
+
+    def field_extraction_metrics(self) -> Dict[str, Dict[str, float]]:
+        """TP/FP/FN e Precision/Recall/F1 por campo."""
+        counts = zip(self.tp.sum(axis=0).tolist(), self.fp.sum(axis=0).tolist(), self.fn.sum(axis=0).tolist())
+        return {field: _prf(*field_counts) for field, field_counts in zip(self.fields, counts)}
+
+
+def collect_fields(responses: Sequence[Dict[str, Any]], expected: Sequence[Dict[str, Any]]) -> List[str]:
+    """União dos campos do lote: os de OCR_FIELDS primeiro, os demais em ordem alfabética."""
+    seen = set().union(*responses, *expected)
+    return [field for field in OCR_FIELDS if field in seen] + sorted(seen.difference(OCR_FIELDS))
+
+
+def evaluate_columnar(responses: Sequence[Dict[str, Any]], expected: Sequence[Dict[str, Any]],
+                      ids: Optional[Sequence[str]] = None,
+                      normalizer: Optional[FieldNormalizer] = None) -> ColumnarEvaluation:
+    """
+    Avalia o lote inteiro por colunas: extrai cada campo de todos os
+    documentos uma única vez e calcula as máscaras de match e de TP/FP/FN
+    com operações vetorizadas. Colunas com valores que não sejam str/None
+    (listas, números, dicts) caem para a comparação célula a célula, então o
+    resultado é sempre o mesmo do caminho escalar.
+
+    Args:
+        responses: response_data de cada documento
+        expected: expected_response correspondente (mesma ordem)
+        ids: IDs das avaliações (padrão: posição no lote)
+        normalizer: normalização por campo do modo tolerante (ver metrics.normalizers)
+    """
+    if len(responses) != len(expected):
+        raise ValueError(f"Lotes desalinhados: {len(responses)} respostas e {len(expected)} gabaritos")
+    if ids is None:
+        ids = [str(position) for position in range(len(responses))]
+
+    size = len(responses)
+    fields = collect_fields(responses, expected)
+    present_columns, match_columns, tp_columns, fp_columns, fn_columns = [], [], [], [], []
+
+    for field in fields:
+        response_values = [document.get(field) for document in responses]
+        expected_values = [document.get(field) for document in expected]
+
+        masks = _text_match_masks if _is_text_column(response_values, expected_values) else _generic_match_masks
+        match, response_present, expected_present, both_none = masks(response_values, expected_values)
+
+        # O campo conta em total_fields se existir como chave em um dos lados;
+        # só é preciso consultar as chaves onde os dois valores são None
+        present = ~both_none
+        if both_none.any():
+            present |= np.fromiter((field in document for document in responses), dtype=bool, count=size)
+            present |= np.fromiter((field in document for document in expected), dtype=bool, count=size)
+
+        if normalizer is not None:
+            # Modo tolerante, como em field_matches: match exato ou após a
+            # normalização; a presença (TP/FP/FN) é sobre os valores normalizados
+            response_values = [normalizer(field, value) for value in response_values]
+            expected_values = [normalizer(field, value) for value in expected_values]
+            masks = _text_match_masks if _is_text_column(response_values, expected_values) else _generic_match_masks
+            normalized_match, response_present, expected_present, _ = masks(response_values, expected_values)
+            match = match | normalized_match
+
+        # Mesmo critério de acerto do MetricsAccumulator: TP exige match
+        tp = expected_present & response_present & match
+        present_columns.append(present)
+        match_columns.append(match)
+        tp_columns.append(tp)
+        fn_columns.append(expected_present & ~tp)
+        fp_columns.append(~expected_present & response_present)
+
+    def stack(columns: List[np.ndarray]) -> np.ndarray:
+        return np.column_stack(columns) if columns else np.zeros((size, 0), dtype=bool)
+
+    return ColumnarEvaluation(
+        ids, fields, responses, expected,
+        present=stack(present_columns),
+        match=stack(match_columns),
+        tp=stack(tp_columns),
+        fp=stack(fp_columns),
+        fn=stack(fn_columns),
+    )
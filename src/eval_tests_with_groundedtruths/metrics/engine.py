@@ -0,0 +1,360 @@
+import gc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..models.evaluation_models import (
+    EvaluationSummary,
+    ExactMatchResult,
+    FieldMetrics,
+    GroundTruthData,
+    MetricsReport,
+    PRFScores,
+    ResponseData,
+)
+from ..tools.exact_match_tool import field_matches, ordered_fields
+from .aggregator import ResultAggregator
+from .normalizers import FieldNormalizer
+from .similarity import is_text_field, similarity_percentage, text_similarity
+
+# Posições dos contadores por campo (similaridade somada em décimos de milésimo)
+TOTAL, MATCHES, TP, FP, FN, SIMILARITY_SUM, SIMILARITY_COUNT = range(7)
+
+
+def prf_scores(tp: int, fp: int, fn: int) -> PRFScores:
+    """Precision/Recall/F1 com as mesmas proteções contra divisão por zero do notebook."""
+    precision = 0.0 if (tp + fp) == 0 else tp / (tp + fp)
+    recall = 0.0 if (tp + fn) == 0 else tp / (tp + fn)
+    f1_score = 0.0 if (precision + recall) == 0 else 2 * (precision * recall) / (precision + recall)
+    return PRFScores(precision=precision, recall=recall, f1_score=f1_score)
+
+
+def _is_present(value: Any) -> bool:
+    return value is not None and value != ""
+
+
+class MetricsAccumulator:
+    """
+    Motor único de métricas: em uma passada por par, calcula o
+    ExactMatchResult (acurácia) e classifica cada campo em TP/FP/FN usando o
+    mesmo critério de acerto (match exato do ExactMatchTool, ou tolerante com
+    `normalizer`):
+      - TP: valor esperado presente, valor extraído presente e com match
+      - FN: valor esperado presente, mas ausente ou sem match na resposta
+      - FP: valor extraído presente sem valor esperado
+    "Presente" segue calculate_extraction_metrics: nem None nem "" (após a
+    normalização, no modo tolerante, em que "N/A" conta como ausente).
+
+    Com `min_similarity` (modo de similaridade), também calcula a
+    similaridade dos campos de texto, como compare_pair.
+
+    Cada resultado também alimenta um ResultAggregator (`results`), de onde
+    saem a acurácia geral e o EvaluationSummary (summary()).
+
+    Os contadores são inteiros (a acurácia é somada em centésimos e a
+    similaridade em décimos de milésimo), então acumuladores de partes
+    consecutivas do conjunto, combinados com merge() na ordem das partes,
+    dão resultado idêntico ao de uma passada única (a ordem só decide os
+    empates entre padrões de erro).
+    """
+
+    def __init__(self, normalizer: Optional[FieldNormalizer] = None, min_similarity: Optional[float] = None):
+        self.normalizer = normalizer
+        self.min_similarity = min_similarity
+        self.fields: Dict[str, List[int]] = {}
+        self.results = ResultAggregator()
+
+    def add(self, response_data: Dict[str, Any], groundtruth_data: Dict[str, Any], evaluation_id: str) -> ExactMatchResult:
+        """Avalia um par, acumula suas métricas e retorna o ExactMatchResult (igual ao de compare_pair)."""
+        normalizer = self.normalizer
+        min_similarity = self.min_similarity
+        matching_fields = 0
+        mismatched_fields = {}
+        field_similarity = {}
+        all_fields = ordered_fields(response_data, groundtruth_data)
+
+        for field in all_fields:
+            response_value = response_data.get(field)
+            expected_value = groundtruth_data.get(field)
+            matched = field_matches(field, response_value, expected_value, normalizer)
+
+            if normalizer is not None:
+                response_present = _is_present(normalizer(field, response_value))
+                expected_present = _is_present(normalizer(field, expected_value))
+            else:
+                response_present = _is_present(response_value)
+                expected_present = _is_present(expected_value)
+
+            counts = self.fields.get(field)
+            if counts is None:
+                counts = self.fields[field] = [0, 0, 0, 0, 0, 0, 0]
+            counts[TOTAL] += 1
+
+            if min_similarity is not None and is_text_field(response_value, expected_value):
+                similarity = 1.0 if matched else text_similarity(response_value, expected_value, min_similarity)
+                field_similarity[field] = similarity
+                counts[SIMILARITY_SUM] += round(similarity * 10_000)
+                counts[SIMILARITY_COUNT] += 1
+
+            if matched:
+                matching_fields += 1
+                counts[MATCHES] += 1
+            else:
+                mismatched_fields[field] = {
+                    "expected": expected_value,
+                    "actual": response_value
+                }
+
+            if expected_present:
+                if response_present and matched:
+                    counts[TP] += 1
+                else:
+                    counts[FN] += 1
+            elif response_present:
+                counts[FP] += 1
+
+        total_fields = len(all_fields)
+        accuracy_percentage = round((matching_fields / total_fields * 100) if total_fields > 0 else 0, 2)
+
+        result = ExactMatchResult(
+            id=evaluation_id,
+            total_fields=total_fields,
+            matching_fields=matching_fields,
+            accuracy_percentage=accuracy_percentage,
+            mismatched_fields=mismatched_fields,
+            field_similarity=field_similarity,
+            similarity_percentage=similarity_percentage(field_similarity)
+        )
+        self.results.add(result)
+        return result
+
+    def add_result(self, response_data: Dict[str, Any], groundtruth_data: Dict[str, Any],
+                   result: ExactMatchResult) -> ExactMatchResult:
+        """
+        Acumula um par já avaliado (ex.: resultado do cache de avaliações) sem
+        compará-lo de novo: o acerto de cada campo e a similaridade vêm do
+        resultado, e dos valores só se verifica a presença para TP/FP/FN.
+        Os contadores ficam iguais aos de add() para o mesmo par.
+        """
+        normalizer = self.normalizer
+        mismatched_fields = result.mismatched_fields
+        field_similarity = result.field_similarity
+
+        for field in ordered_fields(response_data, groundtruth_data):
+            response_value = response_data.get(field)
+            expected_value = groundtruth_data.get(field)
+            matched = field not in mismatched_fields
+
+            if normalizer is not None:
+                response_present = _is_present(normalizer(field, response_value))
+                expected_present = _is_present(normalizer(field, expected_value))
+            else:
+                response_present = _is_present(response_value)
+                expected_present = _is_present(expected_value)
+
+            counts = self.fields.get(field)
+            if counts is None:
+                counts = self.fields[field] = [0, 0, 0, 0, 0, 0, 0]
+            counts[TOTAL] += 1
+
+            similarity = field_similarity.get(field)
+            if similarity is not None:
+                counts[SIMILARITY_SUM] += round(similarity * 10_000)
+                counts[SIMILARITY_COUNT] += 1
+
+            if matched:
+                counts[MATCHES] += 1
+
+            if expected_present:
+                if response_present and matched:
+                    counts[TP] += 1
+                else:
+                    counts[FN] += 1
+            elif response_present:
+                counts[FP] += 1
+
+        self.results.add(result)
+        return result
+
+    def merge(self, other: "MetricsAccumulator") -> "MetricsAccumulator":
+        """Soma os contadores de outro acumulador (ex.: de outro shard) a este."""
+        for field, other_counts in other.fields.items():
+            counts = self.fields.setdefault(field, [0, 0, 0, 0, 0, 0, 0])
+            for position, value in enumerate(other_counts):
+                counts[position] += value
+        self.results.merge(other.results)
+        return self
+
+    def summary(self) -> EvaluationSummary:
+        """EvaluationSummary do conjunto acumulado (mesmo formato do ReportGeneratorTool)."""
+        return self.results.summary()
+
+    def report(self) -> MetricsReport:
+        """Consolida os contadores em acurácia e métricas micro, macro e por campo."""
+        per_field = {}
+        for field in sorted(self.fields):
+            total, matches, tp, fp, fn, similarity_sum, similarity_count = self.fields[field]
+            per_field[field] = FieldMetrics(
+                total=total,
+                matches=matches,
+                accuracy_percentage=round(matches / total * 100, 2) if total > 0 else 0,
+                tp=tp,
+                fp=fp,
+                fn=fn,
+                scores=prf_scores(tp, fp, fn),
+                similarity=round(similarity_sum / similarity_count / 10_000, 4) if similarity_count else None,
+            )
+
+        tp = sum(counts[TP] for counts in self.fields.values())
+        fp = sum(counts[FP] for counts in self.fields.values())
+        fn = sum(counts[FN] for counts in self.fields.values())
+
+        # Macro: média simples sobre os campos com algum TP/FP/FN
+        scored = [metrics.scores for metrics in per_field.values() if metrics.tp + metrics.fp + metrics.fn > 0]
+        macro = PRFScores(
+            precision=sum(score.precision for score in scored) / len(scored) if scored else 0.0,
+            recall=sum(score.recall for score in scored) / len(scored) if scored else 0.0,
+            f1_score=sum(score.f1_score for score in scored) / len(scored) if scored else 0.0,
+        )
+
+        return MetricsReport(
+            total_evaluations=self.results.total_evaluations,
+            overall_accuracy=round(self.results.overall_accuracy, 2),
+            perfect_matches=self.results.perfect_matches,
+            complete_mismatches=self.results.complete_mismatches,
+            tp=tp,
+            fp=fp,
+            fn=fn,
+            micro=prf_scores(tp, fp, fn),
+            macro=macro,
+            per_field=per_field,
+        )
+
+
+def evaluate_with_metrics(
+    matched_pairs: Iterable[Tuple[ResponseData, GroundTruthData]],
+    normalizer: Optional[FieldNormalizer] = None,
+    min_similarity: Optional[float] = None,
+) -> Tuple[List[ExactMatchResult], MetricsReport]:
+    """
+    Avalia os pares (resposta, gabarito) em uma única passada e retorna os
+    ExactMatchResult e as métricas consolidadas.
+    """
+    accumulator = MetricsAccumulator(normalizer, min_similarity)
+    results = [
+        accumulator.add(response.response_data, groundtruth.expected_response, response.id)
+        for response, groundtruth in matched_pairs
+    ]
+    return results, accumulator.report()
+
+
+# Pares do fan-out (e resultados já em cache), definidos em cada processo do
+# pool pelo initializer. Com o start method 'fork' eles são herdados sem
+# serialização; cada tarefa só envia o intervalo (início, fim) do seu shard.
+_shard_source: Optional[Tuple[List[Tuple[Dict[str, Any], Dict[str, Any], str]], Optional[FieldNormalizer], Optional[float],
+                              Optional[List[Optional[ExactMatchResult]]]]] = None
+
+# Campos do ExactMatchResult, na ordem das tuplas devolvidas pelos processos
+_RESULT_FIELDS = tuple(ExactMatchResult.model_fields)
+
+
+def _evaluate_shard(args: Tuple[List[Tuple[Dict[str, Any], Dict[str, Any], str]], Optional[FieldNormalizer], Optional[float],
+                                Optional[List[Optional[ExactMatchResult]]]]
+                    ) -> Tuple[List[ExactMatchResult], MetricsAccumulator]:
+    """
+    Avalia um shard e devolve os resultados e o acumulador parcial. Pares com
+    resultado em `cached` (alinhado com os pares) só são acumulados.
+    """
+    pairs, normalizer, min_similarity, cached = args
+    accumulator = MetricsAccumulator(normalizer, min_similarity)
+    if cached is None:
+        results = [accumulator.add(response_data, expected_response, evaluation_id)
+                   for response_data, expected_response, evaluation_id in pairs]
+    else:
+        results = [
+            accumulator.add(response_data, expected_response, evaluation_id) if result is None
+            else accumulator.add_result(response_data, expected_response, result)
+            for (response_data, expected_response, evaluation_id), result in zip(pairs, cached)
+        ]
+    return results, accumulator
+
+
+def _init_shard_worker(pairs: List[Tuple[Dict[str, Any], Dict[str, Any], str]], normalizer: Optional[FieldNormalizer],
+                       min_similarity: Optional[float], cached: Optional[List[Optional[ExactMatchResult]]]) -> None:
+    global _shard_source
+    _shard_source = (pairs, normalizer, min_similarity, cached)
+
+
+def _evaluate_shard_range(bounds: Tuple[int, int]) -> Tuple[List[Tuple[Any, ...]], MetricsAccumulator]:
+    """
+    Avalia o shard [início, fim) no processo do pool. Só os resultados
+    novos (fora do cache) voltam, como tuplas (mais baratas de serializar).
+    """
+    start, stop = bounds
+    pairs, normalizer, min_similarity, cached = _shard_source
+    shard_cached = cached[start:stop] if cached is not None else None
+    results, accumulator = _evaluate_shard((pairs[start:stop], normalizer, min_similarity, shard_cached))
+    if shard_cached is not None:
+        results = [result for result, cached_result in zip(results, shard_cached) if cached_result is None]
+    return [tuple(getattr(result, field) for field in _RESULT_FIELDS) for result in results], accumulator
+
+
+def evaluate_sharded(
+    matched_pairs: List[Tuple[ResponseData, GroundTruthData]],
+    normalizer: Optional[FieldNormalizer] = None,
+    min_similarity: Optional[float] = None,
+    workers: int = 1,
+    shards_per_worker: int = 4,
+    cached: Optional[List[Optional[ExactMatchResult]]] = None,
+) -> Tuple[List[ExactMatchResult], MetricsAccumulator]:
+    """
+    Fan-out/fan-in: divide os pares em shards consecutivos, avalia cada um em
+    um processo (com workers > 1) e combina os acumuladores parciais na ordem
+    dos shards. Resultados, métricas (report()) e resumo (summary()) são
+    idênticos aos de uma execução em um único processo.
+
+    Com `cached` (ex.: de ExactMatchTool.lookup_cache), os pares que já têm
+    resultado não são comparados de novo: entram no acumulador na sua
+    posição (add_result), e só os demais são avaliados nos processos.
+
+    Args:
+        matched_pairs: Pares (resposta, gabarito)
+        normalizer: Normalização do modo tolerante (opcional)
+        min_similarity: Ativa o modo de similaridade (opcional)
+        workers: Processos do pool (1 = no próprio processo)
+        shards_per_worker: Shards por processo, para equilibrar a carga
+        cached: Resultados já conhecidos, alinhados com os pares (None nos ausentes)
+    """
+    pairs = [(response.response_data, groundtruth.expected_response, response.id)
+             for response, groundtruth in matched_pairs]
+    misses = len(pairs) if cached is None else sum(1 for result in cached if result is None)
+    if workers <= 1 or misses < 2:
+        return _evaluate_shard((pairs, normalizer, min_similarity, cached))
+
+    shard_count = min(len(pairs), workers * shards_per_worker)
+    shard_size = -(-len(pairs) // shard_count)
+    bounds = [(start, min(start + shard_size, len(pairs))) for start in range(0, len(pairs), shard_size)]
+
+    results: List[ExactMatchResult] = []
+    accumulator = MetricsAccumulator(normalizer, min_similarity)
+    # Objetos congelados não são percorridos pelo GC dos processos filhos,
+    # que assim não copiam (copy-on-write) as páginas dos pares herdados.
+    # O congelamento é desfeito depois que o pool encerra, exceto se quem
+    # chamou já tinha objetos congelados (o estado do GC é dele).
+    caller_frozen = gc.get_freeze_count() > 0
+    gc.freeze()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_shard_worker,
+                                 initargs=(pairs, normalizer, min_similarity, cached)) as executor:
+            # map devolve os shards na ordem de entrada: o fan-in é determinístico
+            for (start, stop), (shard_rows, shard_accumulator) in zip(bounds, executor.map(_evaluate_shard_range, bounds)):
+                rows = iter(shard_rows)
+                results.extend(
+                    ExactMatchResult(**dict(zip(_RESULT_FIELDS, next(rows)))) if cached is None or cached[position] is None
+                    else cached[position]
+                    for position in range(start, stop)
+                )
+                accumulator.merge(shard_accumulator)
+    finally:
+        if not caller_frozen:
+            gc.unfreeze()
+    return results, accumulator
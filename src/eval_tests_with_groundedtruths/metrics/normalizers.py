@@ -0,0 +1,180 @@
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+
+# Versão das regras de normalização. Incrementar sempre que um normalizador
+# mudar, para invalidar avaliações tolerantes em cache.
+NORMALIZERS_VERSION = "2"
+
+# Quantos valores distintos cada normalizador guarda em cache. Os mesmos
+# valores (moeda, CUIT do receptor, N/A, datas) se repetem muito entre faturas.
+NORMALIZER_CACHE_SIZE = 65_536
+
+# Valores tratados como nulos (comparados após strip/lower)
+NULL_TOKENS = frozenset({"n/a", "null", "none"})
+
+# Formatos de data aceitos, na ordem de tentativa
+DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d.%m.%Y", "%Y/%m/%d", "%d/%m/%y")
+
+# Especificação declarativa: campo -> tipo de normalização. Campos fora da
+# especificação usam DEFAULT_KIND.
+DEFAULT_KIND = "text"
+DEFAULT_FIELD_SPEC: Dict[str, str] = {
+    "cuit_emisor": "tax_id",
+    "cuit_receptor": "tax_id",
+    "importe": "decimal",
+    "fecha_comprobante": "date",
+}
+
+_TAX_ID_SEPARATORS = re.compile(r"[\s.\-/]")
+_CURRENCY_SYMBOLS = re.compile(r"[\s$]")
+# Ponto único seguido de exatamente três dígitos: separador de milhares no
+# formato argentino das faturas ('1.234' é mil duzentos e trinta e quatro)
+_LONE_THOUSANDS_DOT = re.compile(r"[+-]?\d+\.\d{3}")
+
+
+def normalize_text(value: Any) -> Any:
+    """strip + lower; tokens de NULL_TOKENS viram None. Não-strings ficam inalteradas."""
+    if not isinstance(value, str):
+        return value
+    text = value.strip().lower()
+    return None if text in NULL_TOKENS else text
+
+
+def normalize_decimal(value: Any) -> Any:
+    """
+    Número em formato canônico ('146,65', '1.234,56' e '1,234.56' viram
+    '146.65' e '1234.56'). Com os dois separadores, o último é o decimal; só
+    com vírgula, a vírgula é decimal; pontos/vírgulas repetidos são milhares.
+    As faturas seguem o formato argentino, então um ponto único seguido de
+    exatamente três dígitos também é de milhares ('1.234' vira '1234'); com
+    outra quantidade de dígitos ('1.5', '1234.56') o ponto é decimal. A regra
+    vale só para strings: int/float já chegam com o ponto decimal.
+    Valores que não são números caem para normalize_text.
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        text = repr(value)
+    elif isinstance(value, str):
+        text = _CURRENCY_SYMBOLS.sub("", value)
+    else:
+        return value
+
+    if "," in text and "." in text:
+        thousands, decimal = (".", ",") if text.rfind(",") > text.rfind(".") else (",", ".")
+        text = text.replace(thousands, "").replace(decimal, ".")
+    elif text.count(",") == 1:
+        text = text.replace(",", ".")
+    elif text.count(",") > 1 or text.count(".") > 1:
+        text = text.replace(",", "").replace(".", "")
+    elif isinstance(value, str) and _LONE_THOUSANDS_DOT.fullmatch(text):
+        text = text.replace(".", "")
+
+    try:
+        number = Decimal(text)
+    except InvalidOperation:
+        return normalize_text(value)
+    if not number.is_finite():
+        return normalize_text(value)
+    return format(number.normalize(), "f")
+
+
+def normalize_tax_id(value: Any) -> Any:
+    """CUIT/CUIL/RUT sem separadores ('30-71559290-4' vira '30715592904')."""
+    if not isinstance(value, str):
+        return value
+    compact = _TAX_ID_SEPARATORS.sub("", value).lower()
+    if compact and compact[:-1].isdigit():
+        # O dígito verificador do RUT pode ser 'k'
+        return compact
+    return normalize_text(value)
+
+
+def normalize_date(value: Any) -> Any:
+    """Data em ISO 8601 ('26/06/2024' vira '2024-06-26'); senão, normalize_text."""
+    if not isinstance(value, str):
+        return value
+    text = value.strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date().isoformat()
+        except ValueError:
+            continue
+    return normalize_text(value)
+
+
+NORMALIZER_KINDS: Dict[str, Callable[[Any], Any]] = {
+    "text": normalize_text,
+    "decimal": normalize_decimal,
+    "tax_id": normalize_tax_id,
+    "date": normalize_date,
+}
+
+_CACHEABLE_TYPES = (str, int, float, bool, type(None))
+
+
+def _cached(normalize: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """Envolve o normalizador em um LRU limitado (só para valores escalares, que são hasheáveis)."""
+    cached = lru_cache(maxsize=NORMALIZER_CACHE_SIZE, typed=True)(normalize)
+
+    def normalize_value(value: Any) -> Any:
+        if isinstance(value, _CACHEABLE_TYPES):
+            return cached(value)
+        return value
+
+    normalize_value.cache_info = cached.cache_info
+    return normalize_value
+
+
+class FieldNormalizer:
+    """
+    Especificação por campo compilada: um normalizador com cache por tipo,
+    compartilhado entre os campos do mesmo tipo. Use compile_spec para obter
+    instâncias (reaproveitadas para especificações iguais). Pode ser enviado
+    a outros processos: é recompilado lá a partir da especificação.
+    """
+
+    def __init__(self, spec: Mapping[str, str], default_kind: str = DEFAULT_KIND):
+        unknown = {kind for kind in list(spec.values()) + [default_kind] if kind not in NORMALIZER_KINDS}
+        if unknown:
+            raise ValueError(f"Tipos de normalização desconhecidos: {sorted(unknown)} (válidos: {sorted(NORMALIZER_KINDS)})")
+
+        self.spec = dict(spec)
+        self.default_kind = default_kind
+        self._by_kind = {kind: _cached(NORMALIZER_KINDS[kind]) for kind in set(self.spec.values()) | {default_kind}}
+        self._by_field = {field: self._by_kind[kind] for field, kind in self.spec.items()}
+        self._default = self._by_kind[default_kind]
+
+    def __call__(self, field: str, value: Any) -> Any:
+        return self._by_field.get(field, self._default)(value)
+
+    def normalize_document(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: self(field, value) for field, value in document.items()}
+
+    @property
+    def signature(self) -> str:
+        """Identifica a especificação (ex.: para chaves de cache de avaliações)."""
+        items = ",".join(f"{field}={kind}" for field, kind in sorted(self.spec.items()))
+        return f"v{NORMALIZERS_VERSION}:{items};*={self.default_kind}"
+
+    def cache_info(self) -> Dict[str, Any]:
+        return {kind: normalize.cache_info() for kind, normalize in self._by_kind.items()}
+
+    def __reduce__(self):
+        return compile_spec, (self.spec, self.default_kind)
+
+
+@lru_cache(maxsize=None)
+def _compile_frozen(spec_items: Tuple[Tuple[str, str], ...], default_kind: str) -> FieldNormalizer:
+    return FieldNormalizer(dict(spec_items), default_kind)
+
+
+def compile_spec(spec: Optional[Mapping[str, str]] = None, default_kind: str = DEFAULT_KIND) -> FieldNormalizer:
+    """Compila (uma única vez por especificação) o FieldNormalizer; sem spec, usa DEFAULT_FIELD_SPEC."""
+    if spec is None:
+        spec = DEFAULT_FIELD_SPEC
+    return _compile_frozen(tuple(sorted(spec.items())), default_kind)
@@ -0,0 +1,137 @@
+from functools import lru_cache
+from math import fsum
+from typing import Any, Dict, Optional
+
+
+# Versão do cálculo de similaridade. Incrementar sempre que ele mudar, para
+# invalidar avaliações com similaridade em cache.
+SIMILARITY_VERSION = "1"
+
+# Similaridade mínima reportada: abaixo dela as strings são consideradas
+# claramente diferentes, o cálculo é interrompido e a similaridade é 0.
+DEFAULT_MIN_SIMILARITY = 0.5
+
+# Quantos pares distintos de valores ficam em cache (razon_social, moeda etc.
+# se repetem muito entre faturas)
+SIMILARITY_CACHE_SIZE = 65_536
+
+
+def bounded_levenshtein(a: str, b: str, max_distance: int) -> int:
+    """
+    Distância de Levenshtein limitada: retorna a distância exata quando ela é
+    no máximo `max_distance` e `max_distance + 1` caso contrário.
+
+    Remove prefixo e sufixo comuns e descarta pela diferença de tamanhos
+    (O(1) para strings claramente diferentes). O restante usa o algoritmo
+    bit-paralelo de Myers/Hyyrö (uma coluna da matriz por operação sobre um
+    inteiro com um bit por caractere) e para assim que a distância não pode
+    mais ficar dentro do limite.
+    """
+    if a == b:
+        return 0
+
+    # Prefixo e sufixo comuns não alteram a distância
+    size = min(len(a), len(b))
+    start = 0
+    while start < size and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < size - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a = a[start:len(a) - end]
+    b = b[start:len(b) - end]
+
+    if len(a) > len(b):
+        a, b = b, a
+    len_a, len_b = len(a), len(b)
+    limit = max_distance + 1
+    if len_b - len_a > max_distance:
+        return limit
+    if len_a == 0:
+        return len_b
+
+    # Máscara de posições de cada caractere de `a`
+    positions = {}
+    bit = 1
+    for char in a:
+        positions[char] = positions.get(char, 0) | bit
+        bit <<= 1
+
+    mask = (1 << len_a) - 1
+    high = 1 << (len_a - 1)
+    plus_vertical = mask
+    minus_vertical = 0
+    distance = len_a
+    remaining = len_b
+    for char in b:
+        equal = positions.get(char, 0)
+        remaining -= 1
+        x_vertical = equal | minus_vertical
+        x_horizontal = (((equal & plus_vertical) + plus_vertical) ^ plus_vertical) | equal
+        plus_horizontal = minus_vertical | (~(x_horizontal | plus_vertical) & mask)
+        minus_horizontal = plus_vertical & x_horizontal
+        if plus_horizontal & high:
+            distance += 1
+        elif minus_horizontal & high:
+            distance -= 1
+        # Cada caractere restante de `b` reduz a distância em no máximo 1
+        if distance - remaining > max_distance:
+            return limit
+        plus_horizontal = ((plus_horizontal << 1) | 1) & mask
+        minus_horizontal = (minus_horizontal << 1) & mask
+        plus_vertical = minus_horizontal | (~(x_vertical | plus_horizontal) & mask)
+        minus_vertical = plus_horizontal & x_vertical
+
+    return distance if distance <= max_distance else limit
+
+
+@lru_cache(maxsize=SIMILARITY_CACHE_SIZE)
+def _similarity(actual: str, expected: str, min_similarity: float) -> float:
+    longest = max(len(actual), len(expected))
+    if longest == 0:
+        return 1.0
+    max_distance = int((1 - min_similarity) * longest)
+    distance = bounded_levenshtein(actual, expected, max_distance)
+    if distance > max_distance:
+        return 0.0
+    return round(1 - distance / longest, 4)
+
+
+def _as_text(value: Any) -> str:
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+def text_similarity(actual: Any, expected: Any, min_similarity: Optional[float] = DEFAULT_MIN_SIMILARITY) -> float:
+    """
+    Similaridade de Levenshtein normalizada (0-1, 4 casas): 1 - distância /
+    tamanho da maior string, após strip/lower (como o match exato). None
+    conta como string vazia. Similaridades abaixo de `min_similarity` viram 0
+    sem calcular a distância inteira; min_similarity=0 (ou None) dá sempre o
+    valor exato.
+    """
+    if not isinstance(actual, str):
+        actual = _as_text(actual)
+    if not isinstance(expected, str):
+        expected = _as_text(expected)
+    return _similarity(actual.strip().lower(), expected.strip().lower(), float(min_similarity or 0.0))
+
+
+def is_text_field(response_value: Any, expected_value: Any) -> bool:
+    """Campos com similaridade: ao menos um dos lados é texto."""
+    return isinstance(response_value, str) or isinstance(expected_value, str)
+
+
+def similarity_percentage(field_similarity: Dict[str, float]) -> Optional[float]:
+    """
+    Média das similaridades por campo em percentual (None sem campos de
+    texto). fsum não depende da ordem dos campos.
+    """
+    if not field_similarity:
+        return None
+    return round(fsum(field_similarity.values()) / len(field_similarity) * 100, 2)
+
+
+def similarity_cache_info():
+    return _similarity.cache_info()
@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..models.evaluation_models import EvaluationSummary, MetricsReport
+from ..reporting.markdown_writer import DEFAULT_REPORT_FILE, write_consolidated_report
+from ..tools.exact_match_tool import COMPARATOR_VERSION
+from .aggregator import ResultAggregator
+from .engine import MetricsAccumulator
+from .similarity import SIMILARITY_VERSION
+
+
+SUMMARY_STATE_SUFFIX = ".summary.json"
+
+# Versão do formato do estado. Incrementar sempre que os contadores ou as opções mudarem,
+# para que estados antigos sejam recusados em vez de combinados errado.
+SUMMARY_STATE_VERSION = "2"
+
+
+def comparison_options(accumulator: MetricsAccumulator) -> Dict[str, Any]:
+    """
+    Opções de comparação de uma avaliação, com as mesmas versões que compõem
+    a chave do cache de avaliações (ExactMatchTool._cache_version): duas
+    especificações de normalização diferentes nunca são combinadas.
+    """
+    normalizer = accumulator.normalizer
+    similarity = accumulator.min_similarity
+    return {
+        "comparator": COMPARATOR_VERSION,
+        "normalizer": normalizer.signature if normalizer is not None else None,
+        "similarity": f"{SIMILARITY_VERSION}:{similarity}" if similarity is not None else None,
+    }
+
+
+class SummaryState:
+    """
+    Estado serializável e combinável do resumo de uma avaliação.
+
+    Guarda só contadores inteiros: os do ResultAggregator (totais, acurácia
+    somada, matches perfeitos/parciais/falhas, erros por campo e por tipo) e
+    os do MetricsAccumulator por campo (TP/FP/FN, similaridade). Estados de
+    partes disjuntas do conjunto (ex.: um job por país ou família de
+    documentos), combinados com merge(), dão o mesmo EvaluationSummary e o
+    mesmo MetricsReport que uma avaliação única do conjunto inteiro, sem
+    recarregar os resultados (a ordem das partes só decide os empates entre
+    padrões de erro).
+
+    `options` registra as opções de comparação (comparison_options: versão
+    do comparador, assinatura da normalização do modo tolerante,
+    similaridade): partes avaliadas com opções diferentes não são
+    combinadas. `sources` registra o nome de cada parte: uma parte já
+    combinada (mesmo nome) é recusada, em vez de contada duas vezes.
+    """
+
+    def __init__(self, accumulator: Optional[MetricsAccumulator] = None, options: Optional[Dict[str, Any]] = None,
+                 sources: Optional[List[Dict[str, Any]]] = None):
+        self.accumulator = accumulator or MetricsAccumulator()
+        self.options = options or {}
+        self.sources = sources or []
+
+    @classmethod
+    def from_accumulator(cls, accumulator: MetricsAccumulator, source: str) -> "SummaryState":
+        """Estado de uma parte, identificada por `source` no relatório consolidado."""
+        return cls(
+            accumulator,
+            comparison_options(accumulator),
+            [{"name": source, "total_evaluations": accumulator.results.total_evaluations}],
+        )
+
+    @property
+    def results(self) -> ResultAggregator:
+        return self.accumulator.results
+
+    def merge(self, other: "SummaryState") -> "SummaryState":
+        """Soma os contadores de outra parte a este estado."""
+        merged_names = {source["name"] for source in self.sources}
+        repeated = [source["name"] for source in other.sources if source["name"] in merged_names]
+        if repeated:
+            raise ValueError(f"Partes já combinadas neste estado: {', '.join(repeated)}")
+        if self.sources and other.options != self.options:
+            raise ValueError(
+                f"Partes avaliadas com opções diferentes: {self.options} e {other.options} "
+                f"({other.sources[0]['name'] if other.sources else 'sem nome'})"
+            )
+        self.options = other.options
+        self.accumulator.merge(other.accumulator)
+        self.sources.extend(other.sources)
+        return self
+
+    def summary(self) -> EvaluationSummary:
+        return self.accumulator.summary()
+
+    def metrics(self) -> MetricsReport:
+        return self.accumulator.report()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": SUMMARY_STATE_VERSION,
+            "options": self.options,
+            "sources": self.sources,
+            "results": self.results.to_dict(),
+            "fields": self.accumulator.fields,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SummaryState":
+        if data.get("version") != SUMMARY_STATE_VERSION:
+            raise ValueError(f"Versão de estado não suportada: {data.get('version')!r} (esperada {SUMMARY_STATE_VERSION!r})")
+        accumulator = MetricsAccumulator()
+        accumulator.results = ResultAggregator.from_dict(data["results"])
+        accumulator.fields = {field: list(counts) for field, counts in data["fields"].items()}
+        return cls(accumulator, data["options"], data["sources"])
+
+    def save(self, path: str) -> None:
+        """Grava o estado em JSON (atomicamente: arquivo temporário + os.replace)."""
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SummaryState":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def merge_summary_states(paths: Iterable[str]) -> SummaryState:
+    """Combina os estados gravados em `paths`, na ordem dada."""
+    merged = SummaryState()
+    for path in paths:
+        merged.merge(SummaryState.load(path))
+    return merged
+
+
+def merge_cli(argv: Optional[List[str]] = None) -> None:
+    """Combina estados de várias partes em um relatório (ex.: uv run merge_summaries ar.summary.json br.summary.json)."""
+    parser = argparse.ArgumentParser(description="Combina estados de resumo de várias avaliações em um relatório consolidado")
+    parser.add_argument("states", nargs="+", help=f"Arquivos de estado ({SUMMARY_STATE_SUFFIX}) das partes")
+    parser.add_argument("--output", default=DEFAULT_REPORT_FILE, help="Relatório Markdown consolidado")
+    parser.add_argument("--state", help="Grava também o estado combinado (para combiná-lo de novo depois)")
+    args = parser.parse_args(argv)
+
+    try:
+        merged = merge_summary_states(args.states)
+    except (OSError, ValueError, KeyError) as e:
+        raise SystemExit(f"Erro ao combinar os estados: {e}")
+    if not merged.results.total_evaluations:
+        raise SystemExit("Nenhuma avaliação nos estados informados")
+
+    summary = write_consolidated_report(args.output, merged.results, merged.metrics().dict(), merged.sources)
+    if args.state:
+        merged.save(args.state)
+    print(f"{len(args.states)} estados combinados: {summary.total_evaluations} avaliações, "
+          f"acurácia geral {summary.overall_accuracy}% -> {args.output}")
@@ -28,6 +28,8 @@ class ExactMatchResult(BaseModel):
     matching_fields: int = Field(..., description="Número de campos que fizeram match exato")
     accuracy_percentage: float = Field(..., description="Percentual de acurácia (0-100)")
     mismatched_fields: Dict[str, Dict[str, Any]] = Field(..., description="Campos que não fizeram match - formato: {campo: {expected, actual}}")
+    field_similarity: Dict[str, float] = Field(default_factory=dict, description="Similaridade de Levenshtein normalizada (0-1) por campo de texto, no modo de similaridade")
+    similarity_percentage: Optional[float] = Field(None, description="Média da similaridade dos campos de texto (0-100), no modo de similaridade")
 
 
 class EvaluationSummary(BaseModel):
@@ -40,11 +42,49 @@ class EvaluationSummary(BaseModel):
     common_error_patterns: List[str] = Field(..., description="Padrões de erro mais comuns identificados")
 
 
+class PRFScores(BaseModel):
+    """Precision, Recall e F1 (0-1)"""
+    precision: float = Field(..., description="TP / (TP + FP)")
+    recall: float = Field(..., description="TP / (TP + FN)")
+    f1_score: float = Field(..., description="Média harmônica de precision e recall")
+
+
+class FieldMetrics(BaseModel):
+    """Métricas de um campo sobre todo o conjunto avaliado"""
+    total: int = Field(..., description="Avaliações em que o campo aparece (resposta ou gabarito)")
+    matches: int = Field(..., description="Avaliações em que o campo fez match")
+    accuracy_percentage: float = Field(..., description="Percentual de acerto do campo (0-100)")
+    tp: int = Field(..., description="True positives: valor esperado extraído corretamente")
+    fp: int = Field(..., description="False positives: valor extraído sem valor esperado")
+    fn: int = Field(..., description="False negatives: valor esperado ausente ou incorreto")
+    scores: PRFScores = Field(..., description="Precision/Recall/F1 do campo")
+    similarity: Optional[float] = Field(None, description="Similaridade média do campo (0-1), no modo de similaridade")
+
+
+class MetricsReport(BaseModel):
+    """Métricas consolidadas de acurácia e extração (micro, macro e por campo)"""
+    total_evaluations: int = Field(..., description="Total de avaliações")
+    overall_accuracy: float = Field(..., description="Média da acurácia por avaliação (0-100)")
+    perfect_matches: int = Field(..., description="Avaliações com 100% de acerto")
+    complete_mismatches: int = Field(..., description="Avaliações com 0% de acerto")
+    tp: int = Field(..., description="Total de true positives")
+    fp: int = Field(..., description="Total de false positives")
+    fn: int = Field(..., description="Total de false negatives")
+    micro: PRFScores = Field(..., description="Precision/Recall/F1 sobre os totais de TP/FP/FN")
+    macro: PRFScores = Field(..., description="Média simples das métricas por campo")
+    per_field: Dict[str, FieldMetrics] = Field(..., description="Métricas por campo")
+
+
 class EvaluationState(BaseModel):
     """Estado do flow de avaliação"""
     response_files: List[str] = Field(default_factory=list, description="Lista de arquivos de resposta encontrados", exclude= True)
     groundtruth_files: List[str] = Field(default_factory=list, description="Lista de arquivos de gabarito encontrados", exclude= True)
     matched_pairs: List[tuple] = Field(default_factory=list, description="Pares de arquivos (resposta, gabarito, exclude= True) com mesmo ID", exclude= True)
     evaluation_results: List[ExactMatchResult] = Field(default_factory=list, description="Resultados das avaliações individuais", exclude= True)
+    evaluation_digests: Dict[str, str] = Field(default_factory=dict, description="Identidade do conteúdo de cada avaliação (chave do cache de avaliações), para o relatório incremental", exclude= True)
     summary: Optional[EvaluationSummary] = Field(None, description="Resumo consolidado da avaliação", exclude= True)
     report_generated: bool = Field(False, description="Flag indicando se o relatório foi gerado", exclude= True)
+    metrics: Optional[MetricsReport] = Field(None, description="Métricas de acurácia e extração (modo direto)", exclude= True)
+    execution_mode: str = Field("crew", description="Modo de execução: 'crew' (agents com LLM) ou 'direct' (ferramentas em processo, sem LLM)", exclude= True)
+    resume: bool = Field(False, description="Retoma do checkpoint em disco, pulando as etapas já concluídas", exclude= True)
+    completed_stages: List[str] = Field(default_factory=list, description="Etapas concluídas (e gravadas no checkpoint) nesta execução ou na retomada", exclude= True)
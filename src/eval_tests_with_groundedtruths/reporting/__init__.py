@@ -0,0 +1 @@
+# Reporting package
@@ -0,0 +1,446 @@
+import gzip
+import heapq
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from datetime import datetime
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..metrics.aggregator import ResultAggregator
+from ..models.evaluation_models import EvaluationSummary, ExactMatchResult
+from .report_state import DIVERGENCES_FILE, ROWS_FILE, ROWS_TEXT_FILE, ReportState, result_digest
+
+
+DEFAULT_REPORT_FILE = "EVALUATION_REPORT.md"
+DETAIL_SUFFIX = ".details.jsonl.gz"
+
+# Linhas do detalhamento por bloco gravado no temporário
+SPOOL_CHUNK_SIZE = 4096
+
+# (id, acurácia, similaridade, campos corretos, total de campos)
+DetailRow = Tuple[str, float, Optional[float], int, int]
+
+REPORT_FOOTER = """
+---
+*Relatório gerado automaticamente pelo sistema de avaliação de agents*
+"""
+
+
+def default_detail_file(output_file: str) -> str:
+    """Arquivo de detalhamento ao lado do relatório (ex.: EVALUATION_REPORT.details.jsonl.gz)."""
+    return f"{os.path.splitext(output_file)[0]}{DETAIL_SUFFIX}"
+
+
+def iter_detail_file(detail_file: str) -> Iterator[ExactMatchResult]:
+    """Lê, um a um, os resultados gravados no arquivo de detalhamento."""
+    with gzip.open(detail_file, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield ExactMatchResult(**json.loads(line))
+
+
+def status_label(accuracy: float) -> str:
+    if accuracy == 100:
+        return "✅ Perfeito"
+    return "⚠️ Parcial" if accuracy > 0 else "❌ Falha"
+
+
+def write_summary_sections(out: IO[str], summary: EvaluationSummary, qualitative: Dict[str, Any],
+                           metrics: Optional[Dict[str, Any]] = None, average_similarity: Optional[float] = None) -> None:
+    """Cabeçalho, resumo quantitativo, análise qualitativa, métricas e padrões de erro do relatório."""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    total = summary.total_evaluations
+
+    out.write(f"""# Relatório de Avaliação de Agents
+
+**Data/Hora**: {timestamp}  
+**Total de Avaliações**: {total}
+
+## 📊 Resumo Quantitativo
+
+| Métrica | Valor |
+|---------|-------|
+| **Acurácia Geral** | {summary.overall_accuracy}% |
+| **Matches Perfeitos** | {summary.perfect_matches} ({summary.perfect_matches/total*100:.1f}%) |
+| **Matches Parciais** | {summary.partial_matches} ({summary.partial_matches/total*100:.1f}%) |
+| **Falhas Completas** | {summary.complete_mismatches} ({summary.complete_mismatches/total*100:.1f}%) |
+""")
+    if average_similarity is not None:
+        out.write(f"| **Similaridade Média (campos de texto)** | {average_similarity:.2f}% |\n")
+
+    out.write(f"""
+## 🎯 Análise Qualitativa
+
+### Performance Geral
+**{qualitative['performance_assessment']}**
+
+### Principais Achados
+""")
+    out.writelines(f"- {finding}\n" for finding in qualitative['key_findings'])
+    out.write("\n### Recomendações\n")
+    out.writelines(f"- {rec}\n" for rec in qualitative['recommendations'])
+
+    if metrics:
+        out.write(metrics_section(metrics))
+
+    out.write("\n## 🔍 Padrões de Erro Identificados\n\n")
+    out.writelines(f"### {pattern}\n" if pattern.endswith(':') else f"{pattern}\n"
+                   for pattern in summary.common_error_patterns)
+
+def metrics_section(metrics: Dict[str, Any]) -> str:
+    """Seção de métricas de extração (micro, macro e por campo)."""
+    micro = metrics['micro']
+    macro = metrics['macro']
+    section = f"""
+## 🧮 Métricas de Extração
+
+| Média | Precision | Recall | F1 |
+|-------|-----------|--------|----|
+| **Micro** (TP={metrics['tp']}, FP={metrics['fp']}, FN={metrics['fn']}) | {micro['precision']:.4f} | {micro['recall']:.4f} | {micro['f1_score']:.4f} |
+| **Macro** | {macro['precision']:.4f} | {macro['recall']:.4f} | {macro['f1_score']:.4f} |
+
+"""
+    with_similarity = any(field_metrics.get('similarity') is not None for field_metrics in metrics['per_field'].values())
+    if with_similarity:
+        section += "| Campo | Acurácia | TP | FP | FN | Precision | Recall | F1 | Similaridade |\n"
+        section += "|-------|----------|----|----|----|-----------|--------|----|--------------|\n"
+    else:
+        section += "| Campo | Acurácia | TP | FP | FN | Precision | Recall | F1 |\n"
+        section += "|-------|----------|----|----|----|-----------|--------|----|\n"
+
+    for field, field_metrics in metrics['per_field'].items():
+        scores = field_metrics['scores']
+        row = (
+            f"| {field} | {field_metrics['accuracy_percentage']}% | {field_metrics['tp']} | {field_metrics['fp']} | "
+            f"{field_metrics['fn']} | {scores['precision']:.4f} | {scores['recall']:.4f} | {scores['f1_score']:.4f} |"
+        )
+        if with_similarity:
+            similarity = field_metrics.get('similarity')
+            row += f" {similarity:.4f} |" if similarity is not None else " - |"
+        section += row + "\n"
+    return section
+
+
+def write_consolidated_report(output_file: str, aggregator: ResultAggregator, metrics: Optional[Dict[str, Any]] = None,
+                              sources: Iterable[Dict[str, Any]] = ()) -> EvaluationSummary:
+    """
+    Relatório só com as seções de resumo, a partir de um agregador já
+    consolidado (ex.: estados de várias máquinas combinados), sem os
+    resultados individuais: no lugar do detalhamento, lista as partes.
+    """
+    summary = aggregator.summary()
+    with open(output_file, "w", encoding="utf-8") as out:
+        write_summary_sections(out, summary, aggregator.qualitative_analysis(), metrics, aggregator.average_similarity)
+        out.write("\n## 🧩 Partes Consolidadas\n\n| Parte | Avaliações |\n|-------|------------|\n")
+        out.writelines(f"| {source['name']} | {source['total_evaluations']} |\n" for source in sources)
+        out.write("\n*Detalhamento por avaliação disponível nos relatórios de cada parte.*\n")
+        out.write(REPORT_FOOTER)
+    return summary
+
+
+class MarkdownReportWriter:
+    """
+    Relatório de avaliação em Markdown escrito em streaming.
+
+    Os resultados são consumidos um a um com add(): o ResultAggregator mantém
+    o resumo e o detalhamento vai para arquivos temporários (as linhas da
+    tabela em blocos de pickle, já que a coluna de similaridade só é
+    conhecida no fim, e as divergências já em Markdown). write() grava o
+    relatório seção a seção direto no arquivo de saída, copiando os
+    temporários, sem montar o relatório inteiro em memória.
+
+    Com `top_k`, o Markdown fica limitado: só as `top_k` avaliações de pior
+    acurácia e, por campo, as `top_k` divergências de menor similaridade
+    (e acurácia), selecionadas com heaps de tamanho `top_k`. O detalhamento
+    completo vai para `detail_file` (JSON Lines com gzip, um ExactMatchResult
+    por linha; ver iter_detail_file).
+
+    Com `state_dir`, os arquivos do detalhamento e o estado (agregador,
+    heaps, digests dos resultados) persistem entre execuções (ver
+    ReportState): com `resume`, o writer continua do relatório anterior,
+    ignora resultados já incluídos e renderiza só os novos, então atualizar
+    o relatório custa proporcionalmente ao que mudou. Um resultado já
+    incluído com conteúdo diferente (execução que não é só de acréscimos)
+    gera ValueError: o relatório deve ser refeito com resume=False.
+
+    `digests` ({id: identidade do conteúdo}, ex.: as chaves do cache de
+    avaliações) descreve o conjunto atual inteiro. Com ele, os resultados
+    não precisam ser serializados para comparar com o estado, e avaliações
+    removidas ou alteradas são detectadas já ao abrir o estado salvo, que
+    então é descartado: o relatório é refeito do zero na mesma passada.
+    """
+
+    def __init__(self, output_file: str = DEFAULT_REPORT_FILE, top_k: Optional[int] = None,
+                 detail_file: Optional[str] = None, state_dir: Optional[str] = None, resume: bool = True,
+                 digests: Optional[Dict[str, str]] = None):
+        self.output_file = output_file
+        self.top_k = top_k
+        self.detail_file = detail_file or (default_detail_file(output_file) if top_k is not None else None)
+        self.aggregator = ResultAggregator()
+        self.added = 0
+        self._count = 0
+        # Heaps com a chave negada: a raiz é o "melhor" item retido, o primeiro a sair
+        self._worst: List[Tuple[Tuple[float, int], DetailRow]] = []
+        self._divergences: Dict[str, List[Tuple[Tuple[float, float, int], Tuple[str, Dict[str, Any], Optional[float]]]]] = {}
+
+        self.state = ReportState(state_dir) if state_dir else None
+        self.resumed = False
+        self._given_digests = digests
+        self._digests: Optional[Dict[str, str]] = None
+        self._rows_with_similarity: Optional[bool] = None
+        if self.state is not None:
+            saved = self.state.load(self._settings()) if resume else None
+            if saved is not None and digests is not None and any(
+                digests.get(evaluation_id) != digest for evaluation_id, digest in saved["digests"].items()
+            ):
+                saved = None
+            if saved is None:
+                self.state.reset()
+                self._digests = {}
+            else:
+                self._restore(saved)
+
+        self._rows: Optional[IO[bytes]] = None
+        self._rows_start = 0
+        self._pending_rows: List[DetailRow] = []
+        self._divergence_text: Optional[IO[str]] = None
+        if top_k is None:
+            if self.state is not None:
+                self._rows = open(self.state.path(ROWS_FILE), "a+b")
+                self._rows_start = self._rows.seek(0, os.SEEK_END)
+                self._divergence_text = open(self.state.path(DIVERGENCES_FILE), "a+", encoding="utf-8")
+            else:
+                self._rows = tempfile.TemporaryFile()
+                self._divergence_text = tempfile.TemporaryFile("w+", encoding="utf-8")
+
+        # Só a continuação de um estado salvo acrescenta direto ao detalhamento
+        # publicado (ReportState.load o trunca de volta numa falha); do zero, ele
+        # é escrito em um temporário e só substitui o anterior em write()
+        self._details: Optional[IO[str]] = None
+        self._details_temporary = not self.resumed
+        if self.detail_file:
+            if self._details_temporary:
+                self._details = gzip.open(f"{self.detail_file}.tmp", "wt", encoding="utf-8", compresslevel=6)
+            else:
+                self._details = gzip.open(self.detail_file, "at", encoding="utf-8", compresslevel=6)
+
+    def _settings(self) -> Dict[str, Any]:
+        """Opções que precisam ser as mesmas para continuar um estado salvo."""
+        return {"top_k": self.top_k, "detail_file": self.detail_file,
+                "digests": "given" if self._given_digests is not None else "result"}
+
+    def _restore(self, saved: Dict[str, Any]) -> None:
+        self.resumed = True
+        self.aggregator = ResultAggregator.from_dict(saved["aggregator"])
+        self._count = saved["count"]
+        self._digests = saved["digests"]
+        self._rows_with_similarity = saved["rows_with_similarity"]
+        self._worst = [(tuple(key), tuple(row)) for key, row in saved["worst"]]
+        self._divergences = {
+            field: [(tuple(key), tuple(item)) for key, item in heap]
+            for field, heap in saved["divergences"].items()
+        }
+
+    def _save_state(self, with_similarity: bool) -> None:
+        paths = [self.state.path(name) for name in (ROWS_FILE, ROWS_TEXT_FILE, DIVERGENCES_FILE)
+                 if os.path.exists(self.state.path(name))]
+        if self.detail_file:
+            paths.append(self.detail_file)
+        self.state.save(self._settings(), {
+            "count": self._count,
+            "aggregator": self.aggregator.to_dict(),
+            "digests": self._digests,
+            "rows_with_similarity": with_similarity if self.top_k is None else None,
+            "worst": self._worst,
+            "divergences": self._divergences,
+        }, paths)
+
+    def __enter__(self) -> "MarkdownReportWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add(self, result: ExactMatchResult) -> None:
+        """Acumula um resultado no resumo e no detalhamento."""
+        serialized = None
+        if self._digests is not None:
+            if self._given_digests is not None:
+                # Digest informado: resultados já incluídos nem são serializados
+                digest = self._given_digests.get(result.id)
+                if digest is None:
+                    raise ValueError(f"Avaliação {result.id} ausente dos digests informados")
+            else:
+                serialized = result.model_dump_json()
+                digest = result_digest(serialized)
+            known = self._digests.get(result.id)
+            if known == digest:
+                return
+            if known is not None:
+                raise ValueError(f"O resultado da avaliação {result.id} mudou desde o último relatório; "
+                                 f"gere o relatório completo")
+            self._digests[result.id] = digest
+
+        self.aggregator.add(result)
+        self.added += 1
+        sequence = self._count
+        self._count += 1
+
+        if self._details is not None:
+            self._details.write((serialized or result.model_dump_json()) + "\n")
+
+        row = (result.id, result.accuracy_percentage, result.similarity_percentage,
+               result.matching_fields, result.total_fields)
+        if self._rows is not None:
+            self._pending_rows.append(row)
+            if len(self._pending_rows) >= SPOOL_CHUNK_SIZE:
+                self._flush_rows()
+            if result.mismatched_fields:
+                self._divergence_text.write(f"### Avaliação {result.id}\n")
+                for field, mismatch in result.mismatched_fields.items():
+                    self._divergence_text.write(f"- **{field}**\n")
+                    self._divergence_text.write(self._mismatch_lines(mismatch, result.field_similarity.get(field)))
+            return
+
+        if result.accuracy_percentage < 100:
+            self._keep(self._worst, (-result.accuracy_percentage, -sequence), row)
+        for field, mismatch in result.mismatched_fields.items():
+            similarity = result.field_similarity.get(field)
+            key = (-(similarity or 0.0), -result.accuracy_percentage, -sequence)
+            self._keep(self._divergences.setdefault(field, []), key, (result.id, mismatch, similarity))
+
+    def _keep(self, heap: List[Tuple[Any, Any]], key: Tuple, item: Any) -> None:
+        """Mantém em `heap` os `top_k` itens de menor chave (recebida negada)."""
+        if len(heap) < self.top_k:
+            heapq.heappush(heap, (key, item))
+        elif heap and key > heap[0][0]:
+            heapq.heapreplace(heap, (key, item))
+
+    def _flush_rows(self) -> None:
+        pickle.dump(self._pending_rows, self._rows, pickle.HIGHEST_PROTOCOL)
+        self._pending_rows = []
+
+    def _iter_rows(self, start: int = 0) -> Iterator[DetailRow]:
+        self._flush_rows()
+        self._rows.seek(start)
+        while True:
+            try:
+                yield from pickle.load(self._rows)
+            except EOFError:
+                return
+
+    def write(self, summary: Optional[EvaluationSummary] = None, qualitative: Optional[Dict[str, Any]] = None,
+              metrics: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Grava o relatório. `summary` e `qualitative` são calculados do
+        agregador quando omitidos (ex.: resumo já consolidado pelos shards).
+        """
+        summary = summary or self.aggregator.summary()
+        qualitative = qualitative or self.aggregator.qualitative_analysis()
+        with_similarity = self.aggregator.average_similarity is not None
+
+        with open(self.output_file, "w", encoding="utf-8") as out:
+            write_summary_sections(out, summary, qualitative, metrics, self.aggregator.average_similarity)
+            if self._rows is not None:
+                self._write_full_detail(out, with_similarity)
+            else:
+                self._write_bounded_detail(out, with_similarity)
+            out.write(REPORT_FOOTER)
+
+        if self._details is not None:
+            self._details.close()
+            self._details = None
+            if self._details_temporary:
+                os.replace(f"{self.detail_file}.tmp", self.detail_file)
+        if self.state is not None:
+            self._close_files()
+            self._save_state(with_similarity)
+
+    def _close_files(self) -> None:
+        if self._rows is not None:
+            self._rows.close()
+            self._divergence_text.close()
+            self._rows = self._divergence_text = None
+
+    def close(self) -> None:
+        """
+        Libera os arquivos. O detalhamento só é publicado (ou, com estado,
+        registrado no state.json) por write(); sem ele, o que foi escrito é
+        descartado.
+        """
+        self._close_files()
+        if self._details is not None:
+            self._details.close()
+            self._details = None
+            if self._details_temporary:
+                os.remove(f"{self.detail_file}.tmp")
+
+    @staticmethod
+    def _detail_header(with_similarity: bool) -> str:
+        if with_similarity:
+            return ("| ID | Acurácia | Similaridade | Campos Corretos | Total Campos | Status |\n"
+                    "|-----|----------|--------------|----------------|--------------|---------|\n")
+        return ("| ID | Acurácia | Campos Corretos | Total Campos | Status |\n"
+                "|-----|----------|----------------|--------------|---------|\n")
+
+    @staticmethod
+    def _detail_row(row: DetailRow, with_similarity: bool) -> str:
+        evaluation_id, accuracy, similarity, matching_fields, total_fields = row
+        column = ""
+        if with_similarity:
+            column = f" {similarity}% |" if similarity is not None else " - |"
+        return f"| {evaluation_id} | {accuracy}% |{column} {matching_fields} | {total_fields} | {status_label(accuracy)} |\n"
+
+    @staticmethod
+    def _mismatch_lines(mismatch: Dict[str, Any], similarity: Optional[float]) -> str:
+        lines = f"  - Esperado: `{mismatch.get('expected', 'N/A')}`\n  - Obtido: `{mismatch.get('actual', 'N/A')}`\n"
+        if similarity is not None:
+            lines += f"  - Similaridade: {similarity:.4f}\n"
+        if mismatch.get('paths'):
+            lines += f"  - Diferenças em: {', '.join(f'`{path}`' for path in mismatch['paths'])}\n"
+        return lines + "\n"
+
+    def _write_full_detail(self, out: IO[str], with_similarity: bool) -> None:
+        """Detalhamento de todas as avaliações, na ordem em que foram recebidas."""
+        out.write("\n## 📋 Detalhamento por Avaliação\n\n")
+        out.write(self._detail_header(with_similarity))
+        if self.state is None:
+            out.writelines(self._detail_row(row, with_similarity) for row in self._iter_rows())
+        else:
+            rows_text = self.state.path(ROWS_TEXT_FILE)
+            self._update_rows_text(rows_text, with_similarity)
+            with open(rows_text, "r", encoding="utf-8") as f:
+                shutil.copyfileobj(f, out)
+
+        out.write("\n## 🔧 Campos com Divergências\n\n")
+        self._divergence_text.seek(0)
+        shutil.copyfileobj(self._divergence_text, out)
+
+    def _update_rows_text(self, rows_text: str, with_similarity: bool) -> None:
+        """Acrescenta as linhas novas à tabela salva; todas são refeitas se a coluna de similaridade mudou."""
+        if self._rows_with_similarity == with_similarity:
+            mode, start = "a", self._rows_start
+        else:
+            mode, start = "w", 0
+        with open(rows_text, mode, encoding="utf-8") as f:
+            f.writelines(self._detail_row(row, with_similarity) for row in self._iter_rows(start))
+
+    def _write_bounded_detail(self, out: IO[str], with_similarity: bool) -> None:
+        """Piores avaliações e piores divergências por campo; o restante fica no arquivo de detalhamento."""
+        worst = sorted(self._worst, reverse=True)
+        imperfect = self.aggregator.total_evaluations - self.aggregator.perfect_matches
+        out.write("\n## 📋 Detalhamento por Avaliação\n\n")
+        out.write(f"*{len(worst)} de {imperfect} avaliações com divergências (pior acurácia primeiro); "
+                  f"detalhamento completo em `{self.detail_file}`.*\n\n")
+        out.write(self._detail_header(with_similarity))
+        out.writelines(self._detail_row(row, with_similarity) for _, row in worst)
+
+        out.write("\n## 🔧 Campos com Divergências\n\n")
+        out.write(f"*Até {self.top_k} divergências por campo (menor similaridade e acurácia primeiro).*\n\n")
+        for field, count in self.aggregator.error_fields.most_common():
+            divergences = sorted(self._divergences.get(field, []), reverse=True)
+            out.write(f"### {field} ({len(divergences)} de {count})\n")
+            for _, (evaluation_id, mismatch, similarity) in divergences:
+                out.write(f"- **Avaliação {evaluation_id}**\n")
+                out.write(self._mismatch_lines(mismatch, similarity))
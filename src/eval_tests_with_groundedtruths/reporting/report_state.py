@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import shutil
+from typing import Any, Dict, Iterable, Optional
+
+
+STATE_SUFFIX = ".state"
+STATE_FILE = "state.json"
+ROWS_FILE = "rows.pkl"
+ROWS_TEXT_FILE = "rows.md"
+DIVERGENCES_FILE = "divergences.md"
+
+# Versão do formato do estado. Incrementar sempre que ele (ou a renderização
+# dos fragmentos) mudar, para que o próximo relatório seja refeito do zero.
+REPORT_STATE_VERSION = "1"
+
+
+def default_state_dir(output_file: str) -> str:
+    """Estado ao lado do relatório (ex.: EVALUATION_REPORT.state/)."""
+    return f"{os.path.splitext(output_file)[0]}{STATE_SUFFIX}"
+
+
+def result_digest(serialized_result: str) -> str:
+    """Identifica o conteúdo de um resultado (ExactMatchResult.model_dump_json())."""
+    return hashlib.blake2b(serialized_result.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ReportState:
+    """
+    Estado persistido de um relatório, para atualizá-lo incrementalmente.
+
+    O diretório guarda os fragmentos já renderizados do detalhamento (só
+    recebem acréscimos) e o 'state.json' com o estado do agregador, os
+    digests dos resultados já incluídos e o tamanho de cada arquivo. O
+    state.json é gravado por último e de forma atômica; ao carregar, os
+    arquivos são truncados de volta aos tamanhos registrados, descartando
+    acréscimos de uma atualização interrompida.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def load(self, settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Estado salvo, ou None se não existe, é de outra versão ou foi gerado com outras opções."""
+        try:
+            with open(self.path(STATE_FILE), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if data.get("version") != REPORT_STATE_VERSION or data.get("settings") != settings:
+            return None
+
+        sizes = data["sizes"]
+        if any(not os.path.exists(path) or os.path.getsize(path) < size for path, size in sizes.items()):
+            return None
+        for path, size in sizes.items():
+            os.truncate(path, size)
+        return data
+
+    def reset(self) -> None:
+        """Descarta o estado salvo e prepara o diretório vazio."""
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+        os.makedirs(self.directory)
+
+    def save(self, settings: Dict[str, Any], data: Dict[str, Any], paths: Iterable[str]) -> None:
+        """Grava o estado com os tamanhos atuais de `paths` (arquivos já fechados)."""
+        state = {
+            "version": REPORT_STATE_VERSION,
+            "settings": settings,
+            "sizes": {path: os.path.getsize(path) for path in paths},
+            **data,
+        }
+        temporary = f"{self.path(STATE_FILE)}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, separators=(",", ":"), default=str)
+        os.replace(temporary, self.path(STATE_FILE))
@@ -0,0 +1,58 @@
+import threading
+import uuid
+from typing import Any, Dict, List
+
+
+HANDLE_PREFIX = "artifact://"
+
+
+class ArtifactStore:
+    """
+    Registro em memória dos artefatos produzidos pelas ferramentas (pares
+    matcheados, resultados de avaliação, ...), endereçados por handle.
+
+    As ferramentas gravam aqui o conteúdo volumoso e devolvem aos agents
+    apenas um resumo e o handle (ex.: 'artifact://matched_pairs/3f2a9c1e');
+    a ferramenta seguinte lê o artefato pelo handle. Assim o dataset não
+    passa pelo contexto do LLM. Vale apenas dentro do processo atual.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._artifacts: Dict[str, Any] = {}
+
+    def put(self, kind: str, artifact: Any) -> str:
+        """Guarda o artefato e retorna seu handle."""
+        handle = f"{HANDLE_PREFIX}{kind}/{uuid.uuid4().hex[:8]}"
+        with self._lock:
+            self._artifacts[handle] = artifact
+        return handle
+
+    def get(self, handle: str) -> Any:
+        with self._lock:
+            if handle not in self._artifacts:
+                raise KeyError(f"Artefato {handle!r} não encontrado (handles válidos: {sorted(self._artifacts)})")
+            return self._artifacts[handle]
+
+    def __contains__(self, handle: str) -> bool:
+        return handle in self._artifacts
+
+    def handles(self) -> List[str]:
+        with self._lock:
+            return list(self._artifacts)
+
+    def discard(self, handle: str) -> None:
+        with self._lock:
+            self._artifacts.pop(handle, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._artifacts.clear()
+
+
+_default_store = ArtifactStore()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Store compartilhado pelas ferramentas do processo."""
+    return _default_store
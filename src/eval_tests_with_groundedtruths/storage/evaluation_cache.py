@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+DEFAULT_CACHE_FILE = ".evaluation_cache.jsonl"
+
+
+def content_hash(data: Any) -> str:
+    """Hash estável de um objeto JSON (independente da ordem das chaves)."""
+    canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class EvaluationCache:
+    """
+    Cache persistente de avaliações, em JSON Lines append-only.
+
+    A chave combina a versão do comparador com os hashes de `response_data` e
+    `expected_response`; o valor é o ExactMatchResult sem o `id`. Pares que não
+    mudaram entre execuções reaproveitam o resultado, e alterar a lógica de
+    comparação (nova versão) invalida todas as entradas antigas.
+    """
+
+    def __init__(self, cache_file: str = DEFAULT_CACHE_FILE):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    @staticmethod
+    def make_key(response_data: Dict[str, Any], expected_response: Dict[str, Any], comparator_version: str) -> str:
+        return f"{comparator_version}:{content_hash(response_data)}:{content_hash(expected_response)}"
+
+    def _load(self) -> None:
+        if not os.path.exists(self.cache_file):
+            return
+        with open(self.cache_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Última linha truncada por uma queda durante a escrita
+                    continue
+                self._entries[entry["key"]] = entry["result"]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._entries.get(key)
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Registra o resultado (sem o id da avaliação) e o acrescenta ao arquivo."""
+        with self._lock:
+            if self._entries.get(key) == result:
+                return
+            self._entries[key] = result
+            with open(self.cache_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "result": result}, ensure_ascii=False, default=str) + "\n")
+
+    def put_many(self, items: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """Registra vários resultados com uma única abertura do arquivo."""
+        with self._lock:
+            lines = []
+            for key, result in items:
+                if self._entries.get(key) == result:
+                    continue
+                self._entries[key] = result
+                lines.append(json.dumps({"key": key, "result": result}, ensure_ascii=False, default=str) + "\n")
+            if lines:
+                with open(self.cache_file, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
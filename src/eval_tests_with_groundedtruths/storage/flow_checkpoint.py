@@ -0,0 +1,169 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..models.evaluation_models import (
+    EvaluationState,
+    EvaluationSummary,
+    ExactMatchResult,
+    GroundTruthData,
+    MetricsReport,
+    ResponseData,
+)
+
+
+DEFAULT_CHECKPOINT_DIR = ".evaluation_checkpoint"
+MANIFEST_FILE = "manifest.json"
+STAGE_SUFFIX = ".json.gz"
+
+# Versão do formato em disco. Incrementar sempre que a serialização mudar,
+# para que checkpoints antigos sejam descartados em vez de lidos errado.
+CHECKPOINT_VERSION = "1"
+
+
+def _encode_pairs(pairs: List[Tuple[ResponseData, GroundTruthData]]) -> List[List[Dict[str, Any]]]:
+    return [[response.model_dump(mode="json"), groundtruth.model_dump(mode="json")] for response, groundtruth in pairs]
+
+
+def _decode_pairs(pairs: List[List[Dict[str, Any]]]) -> List[Tuple[ResponseData, GroundTruthData]]:
+    return [(ResponseData(**response), GroundTruthData(**groundtruth)) for response, groundtruth in pairs]
+
+
+def _optional(model) -> Tuple[Callable[[Any], Any], Callable[[Any], Any]]:
+    return (
+        lambda value: None if value is None else value.model_dump(mode="json"),
+        lambda value: None if value is None else model(**value),
+    )
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+# Campo do EvaluationState -> (serializar, desserializar). Os campos do
+# estado são excluídos do model_dump (ver EvaluationState), por isso a
+# conversão é explícita.
+STATE_CODECS: Dict[str, Tuple[Callable[[Any], Any], Callable[[Any], Any]]] = {
+    "response_files": (_identity, _identity),
+    "groundtruth_files": (_identity, _identity),
+    "matched_pairs": (_encode_pairs, _decode_pairs),
+    "evaluation_results": (
+        lambda results: [result.model_dump(mode="json") for result in results],
+        lambda results: [ExactMatchResult(**result) for result in results],
+    ),
+    "evaluation_digests": (_identity, _identity),
+    "summary": _optional(EvaluationSummary),
+    "metrics": _optional(MetricsReport),
+    "report_generated": (_identity, _identity),
+}
+
+
+def inputs_fingerprint(directories: Iterable[str], options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Identifica as entradas da avaliação: nome, tamanho e data de modificação
+    dos arquivos das pastas, mais as opções de execução. Um checkpoint só é
+    retomado se a impressão digital não mudou.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(options or {}, sort_keys=True, default=str).encode("utf-8"))
+    for directory in directories:
+        digest.update(f"\0{directory}\0".encode("utf-8"))
+        if not os.path.isdir(directory):
+            continue
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                relative = os.path.relpath(os.path.join(root, name), directory)
+                digest.update(f"{relative}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class FlowCheckpoint:
+    """
+    Checkpoint em disco de um flow, etapa por etapa.
+
+    Cada etapa concluída grava apenas os campos do estado que produziu, em
+    JSON compactado com gzip ('<etapa>.json.gz'); o manifesto lista as etapas
+    concluídas, em ordem, com a impressão digital das entradas. As gravações
+    são atômicas (arquivo temporário + os.replace), então uma queda no meio
+    de uma etapa deixa o checkpoint na etapa anterior.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CHECKPOINT_DIR):
+        self.directory = directory
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, MANIFEST_FILE)
+
+    def _stage_path(self, stage: str) -> str:
+        return os.path.join(self.directory, f"{stage}{STAGE_SUFFIX}")
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.manifest_path):
+            return None
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if manifest.get("version") != CHECKPOINT_VERSION:
+            return None
+        return manifest
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)
+
+    def begin(self, fingerprint: str) -> None:
+        """Descarta o checkpoint anterior e inicia um novo para estas entradas."""
+        self.clear()
+        os.makedirs(self.directory, exist_ok=True)
+        self._write_manifest({"version": CHECKPOINT_VERSION, "fingerprint": fingerprint, "stages": []})
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        self._write_atomic(self.manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+
+    def completed_stages(self, fingerprint: Optional[str] = None) -> List[str]:
+        """Etapas concluídas; vazio sem checkpoint ou se as entradas mudaram (`fingerprint`)."""
+        manifest = self._read_manifest()
+        if manifest is None:
+            return []
+        if fingerprint is not None and manifest.get("fingerprint") != fingerprint:
+            return []
+        return list(manifest["stages"])
+
+    def is_completed(self, stage: str) -> bool:
+        return stage in self.completed_stages()
+
+    def save(self, stage: str, state: EvaluationState, fields: Iterable[str] = ()) -> None:
+        """Grava os campos `fields` do estado e marca a etapa como concluída."""
+        manifest = self._read_manifest()
+        if manifest is None:
+            raise RuntimeError(f"Checkpoint em {self.directory!r} não iniciado (chame begin antes de save)")
+
+        payload = {field: STATE_CODECS[field][0](getattr(state, field)) for field in fields}
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+        self._write_atomic(self._stage_path(stage), gzip.compress(data, compresslevel=6))
+
+        if stage not in manifest["stages"]:
+            manifest["stages"].append(stage)
+        self._write_manifest(manifest)
+
+    def restore(self, stage: str, state: EvaluationState) -> List[str]:
+        """Aplica ao estado os campos gravados pela etapa e retorna os nomes restaurados."""
+        with gzip.open(self._stage_path(stage), "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+        for field, value in payload.items():
+            setattr(state, field, STATE_CODECS[field][1](value))
+        return list(payload)
+
+    def clear(self) -> None:
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
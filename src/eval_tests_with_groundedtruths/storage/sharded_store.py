@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+
+INDEX_FILE = "index.jsonl"
+SHARD_PREFIX = "shard-"
+SHARD_SUFFIX = ".jsonl"
+DEFAULT_SHARD_MAX_RECORDS = 10_000
+
+
+class ShardedJSONLStore:
+    """
+    Armazena registros JSON (com campo 'id') em shards JSON Lines append-only,
+    com um índice id -> (shard, offset, tamanho) também append-only.
+
+    Substitui um arquivo JSON por documento: 100k registros viram ~10 shards
+    em vez de 100k arquivos. Regravar um id apenas acrescenta uma nova linha;
+    a última versão prevalece na leitura. Seguro para várias threads do mesmo
+    processo, mas não para vários processos escrevendo no mesmo diretório.
+    """
+
+    def __init__(self, directory: str, shard_max_records: int = DEFAULT_SHARD_MAX_RECORDS):
+        self.directory = directory
+        self.shard_max_records = shard_max_records
+        self._lock = threading.Lock()
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._shard_counts: Dict[str, int] = {}
+        self._load_index()
+
+    @staticmethod
+    def is_store(directory: str) -> bool:
+        """Indica se o diretório contém um store (identificado pelo arquivo de índice)."""
+        return os.path.isfile(os.path.join(directory, INDEX_FILE))
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def _shard_path(self, shard: str) -> str:
+        return os.path.join(self.directory, shard)
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Última linha truncada por uma queda durante a escrita
+                    continue
+                self._index[entry["id"]] = entry
+                self._shard_counts[entry["shard"]] = self._shard_counts.get(entry["shard"], 0) + 1
+
+    def _current_shard(self) -> str:
+        shards = sorted(self._shard_counts)
+        if shards and self._shard_counts[shards[-1]] < self.shard_max_records:
+            return shards[-1]
+        return f"{SHARD_PREFIX}{len(shards):05d}{SHARD_SUFFIX}"
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Acrescenta (ou substitui, se o id já existir) um registro."""
+        self.append_many([record])
+
+    def append_many(self, records: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            for record in records:
+                record_id = str(record["id"])
+                shard = self._current_shard()
+                line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+                with open(self._shard_path(shard), "ab") as f:
+                    offset = f.tell()
+                    f.write(line)
+
+                entry = {"id": record_id, "shard": shard, "offset": offset, "length": len(line)}
+                with open(self.index_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+                self._index[record_id] = entry
+                self._shard_counts[shard] = self._shard_counts.get(shard, 0) + 1
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self._index
+
+    def ids(self) -> List[str]:
+        return list(self._index)
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        """Lê um único registro pelo id (um seek direto no shard)."""
+        entry = self._index.get(record_id)
+        if entry is None:
+            return None
+        with open(self._shard_path(entry["shard"]), "rb") as f:
+            f.seek(entry["offset"])
+            return json.loads(f.read(entry["length"]))
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Percorre a versão mais recente de cada registro, lendo cada shard sequencialmente."""
+        live_offsets: Dict[str, set] = {}
+        for entry in self._index.values():
+            live_offsets.setdefault(entry["shard"], set()).add(entry["offset"])
+
+        for shard in sorted(live_offsets):
+            offsets = live_offsets[shard]
+            with open(self._shard_path(shard), "rb") as f:
+                offset = 0
+                for line in f:
+                    if offset in offsets:
+                        yield json.loads(line)
+                    offset += len(line)
+
+    def export_to_files(self, output_dir: str, filename_template: str = "{id}.json") -> int:
+        """
+        Exporta o store para o layout de um arquivo JSON (indent=2) por registro,
+        por exemplo para edição manual de gabaritos. Retorna o número de arquivos.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        count = 0
+        for record in self.iter_records():
+            output_file = os.path.join(output_dir, filename_template.format(id=record["id"]))
+            with open(output_file, "w", encoding="utf-8") as f:
+                json.dump(record, f, indent=2, ensure_ascii=False)
+            count += 1
+        return count
+
+
+def export_cli(argv: Optional[List[str]] = None) -> None:
+    """Exporta um store para arquivos individuais (ex.: uv run export_store groundedtruths gabaritos_editaveis)."""
+    parser = argparse.ArgumentParser(description="Exporta um store JSONL para um arquivo JSON por registro")
+    parser.add_argument("store_dir", help="Diretório do store (contém index.jsonl)")
+    parser.add_argument("output_dir", help="Diretório de saída dos arquivos individuais")
+    parser.add_argument(
+        "--filename-template",
+        default="{id}.json",
+        help="Nome dos arquivos gerados, ex.: 'ocr_ground_truth_{id}.json'",
+    )
+    args = parser.parse_args(argv)
+
+    if not ShardedJSONLStore.is_store(args.store_dir):
+        raise SystemExit(f"Diretório {args.store_dir} não contém um store ({INDEX_FILE} não encontrado)")
+
+    count = ShardedJSONLStore(args.store_dir).export_to_files(args.output_dir, args.filename_template)
+    print(f"{count} registros exportados para {args.output_dir}")
@@ -0,0 +1,81 @@
+from typing import Dict, Any, Optional
+from crewai.tools import BaseTool
+from pydantic import Field
+
+from ..models.evaluation_models import ResponseData, GroundTruthData
+from ..storage.artifact_store import get_artifact_store
+from ..storage.evaluation_cache import DEFAULT_CACHE_FILE
+from .exact_match_tool import ExactMatchTool
+from .json_reader_tool import JSONFileReaderTool, match_by_id
+
+
+class BatchExactMatchTool(BaseTool):
+    name: str = "Batch Exact Match Evaluation Tool"
+    description: str = (
+        "Ferramenta para avaliar de uma só vez todos os pares (resposta, gabarito) "
+        "das pastas informadas, com match exato campo por campo. Recebe apenas os "
+        "diretórios ou o matched_pairs_handle do JSON File Reader Tool e retorna um "
+        "resumo e o handle dos resultados (evaluation_results_handle)."
+    )
+    max_workers: int = Field(default=1, description="Processos para as comparações (1 = laço no próprio processo)")
+    tolerant: bool = Field(default=False, description="Normaliza os valores por campo antes de comparar (ver ExactMatchTool)")
+    similarity: bool = Field(default=False, description="Reporta a similaridade dos campos de texto (ver ExactMatchTool)")
+    cache_file: Optional[str] = Field(
+        default=DEFAULT_CACHE_FILE,
+        description="Cache persistente de avaliações por hash do par (None desativa)"
+    )
+
+    def _run(self, files_dir: str = "files", groundtruths_dir: str = "groundedtruths",
+             matched_pairs_handle: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Avalia todos os pares: os do artefato `matched_pairs_handle`, se
+        informado, ou os obtidos carregando e fazendo o matching das pastas.
+
+        Args:
+            files_dir: Diretório com arquivos de resposta
+            groundtruths_dir: Diretório com arquivos de gabarito
+            matched_pairs_handle: Handle dos pares no artifact store (opcional)
+
+        Returns:
+            Resumo do lote e o handle dos resultados (lista de ExactMatchResult)
+        """
+        try:
+            store = get_artifact_store()
+            extra = {}
+            if matched_pairs_handle:
+                matched_pairs = store.get(matched_pairs_handle)
+            else:
+                load_errors = []
+                reader = JSONFileReaderTool()
+                responses = reader._load_json_files(files_dir, ResponseData, load_errors)
+                groundtruths = reader._load_json_files(groundtruths_dir, GroundTruthData, load_errors)
+                match = match_by_id(responses, groundtruths)
+                matched_pairs = match.matched_pairs
+                extra = {
+                    "unmatched_responses_count": len(match.unmatched_responses),
+                    "unmatched_groundtruths_count": len(match.unmatched_groundtruths),
+                    "load_errors_count": len(load_errors)
+                }
+
+            evaluator = ExactMatchTool(max_workers=self.max_workers, cache_file=self.cache_file, tolerant=self.tolerant,
+                                       similarity=self.similarity)
+            results = evaluator.evaluate_batch(matched_pairs)
+
+            perfect = sum(1 for result in results if result.accuracy_percentage == 100)
+            failed = sum(1 for result in results if result.accuracy_percentage == 0)
+            return {
+                "success": True,
+                "evaluation_results_handle": store.put("evaluation_results", results),
+                "evaluations_count": len(results),
+                "summary": (
+                    f"{len(results)} pares avaliados: {perfect} perfeitos, "
+                    f"{len(results) - perfect - failed} parciais, {failed} falhas"
+                ),
+                **extra
+            }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Erro na avaliação em lote: {str(e)}"
+            }
@@ -1,8 +1,217 @@
-from typing import Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from crewai.tools import BaseTool
-from pydantic import Field
+from pydantic import Field, PrivateAttr
 
+from ..metrics.normalizers import FieldNormalizer, compile_spec
+from ..metrics.similarity import (
+    DEFAULT_MIN_SIMILARITY,
+    SIMILARITY_VERSION,
+    is_text_field,
+    similarity_percentage,
+    text_similarity,
+)
 from ..models.evaluation_models import ResponseData, GroundTruthData, ExactMatchResult
+from ..storage.evaluation_cache import DEFAULT_CACHE_FILE, EvaluationCache
+
+
+# Versão da lógica de comparação. Incrementar sempre que _values_match ou o
+# cálculo de acurácia mudarem, para invalidar o cache de avaliações.
+COMPARATOR_VERSION = "1"
+
+
+def _scalar_match(value1: Any, value2: Any) -> Optional[bool]:
+    """
+    Regras de match para valores escalares. Retorna None quando os dois são
+    listas ou dois dicts (o chamador compara os elementos).
+    """
+    # Tratamento para valores None
+    if value1 is None and value2 is None:
+        return True
+    if value1 is None or value2 is None:
+        return False
+
+    # Tratamento para strings (case-insensitive e trim)
+    if isinstance(value1, str) and isinstance(value2, str):
+        return value1.strip().lower() == value2.strip().lower()
+
+    # Tratamento para números (com tolerância para floats)
+    if isinstance(value1, (int, float)) and isinstance(value2, (int, float)):
+        if isinstance(value1, float) or isinstance(value2, float):
+            return abs(float(value1) - float(value2)) < 1e-10
+        return value1 == value2
+
+    # Listas e dicionários: comparados elemento a elemento pelo chamador
+    if isinstance(value1, list) and isinstance(value2, list):
+        return None
+    if isinstance(value1, dict) and isinstance(value2, dict):
+        return None
+
+    # Comparação direta para outros tipos
+    return value1 == value2
+
+
+def values_match(value1: Any, value2: Any) -> bool:
+    """
+    Compara dois valores para verificar se fazem match exato.
+
+    Iterativo (sem limite de profundidade): percorre listas e dicts em
+    profundidade, na ordem natural, com uma pilha de iteradores, e para na
+    primeira diferença. Dicts são comparados sem depender da ordem das
+    chaves e sem alocar conjuntos de chaves a cada nível.
+
+    Args:
+        value1: Primeiro valor para comparação
+        value2: Segundo valor para comparação
+
+    Returns:
+        True se os valores fazem match exato, False caso contrário
+    """
+    # Valores escalares (o caso comum nos campos de OCR) dispensam a pilha
+    if not isinstance(value1, (list, dict)):
+        return _scalar_match(value1, value2)
+
+    stack = [iter(((value1, value2),))]
+    while stack:
+        for left, right in stack[-1]:
+            # Mesmas regras de _scalar_match, sem uma chamada de função por par
+            if left is None or right is None:
+                if left is not right:
+                    return False
+            elif isinstance(left, str) and isinstance(right, str):
+                if left != right and left.strip().lower() != right.strip().lower():
+                    return False
+            elif isinstance(left, list) and isinstance(right, list):
+                if len(left) != len(right):
+                    return False
+                stack.append(zip(left, right))
+                break
+            elif isinstance(left, dict) and isinstance(right, dict):
+                # Comparação de dict_keys: sem depender da ordem e sem criar sets
+                if left.keys() != right.keys():
+                    return False
+                stack.append(zip(left.values(), map(right.__getitem__, left)))
+                break
+            elif isinstance(left, (int, float)) and isinstance(right, (int, float)):
+                if isinstance(left, float) or isinstance(right, float):
+                    if not abs(float(left) - float(right)) < 1e-10:
+                        return False
+                elif left != right:
+                    return False
+            elif not left == right:
+                return False
+        else:
+            stack.pop()
+    return True
+
+
+def diff_paths(actual: Any, expected: Any, root: str = "", max_paths: int = 50) -> List[str]:
+    """
+    Caminhos das diferenças entre dois valores, no formato 'items[12].precio'
+    (mesmas regras de values_match). Chaves ou posições presentes em apenas
+    um dos lados também são reportadas. Para depois de `max_paths` caminhos.
+    """
+    paths = []
+    stack = [(root, actual, expected)]
+    while stack and len(paths) < max_paths:
+        path, left, right = stack.pop()
+        matched = _scalar_match(left, right)
+        if matched is None:
+            if isinstance(left, list):
+                children = [(f"{path}[{index}]", left[index], right[index]) for index in range(min(len(left), len(right)))]
+                paths_only = [f"{path}[{index}]" for index in range(min(len(left), len(right)), max(len(left), len(right)))]
+            else:
+                children = [(f"{path}.{key}" if path else str(key), left[key], right[key]) for key in left if key in right]
+                paths_only = [f"{path}.{key}" if path else str(key) for key in left if key not in right]
+                paths_only += [f"{path}.{key}" if path else str(key) for key in right if key not in left]
+            # Ordem de saída: a natural (a pilha é LIFO)
+            stack.extend(reversed(children))
+            paths.extend(paths_only[:max_paths - len(paths)])
+        elif not matched:
+            paths.append(path)
+    return paths
+
+
+def ordered_fields(response_data: Dict[str, Any], groundtruth_data: Dict[str, Any]) -> Dict[str, None]:
+    """
+    União dos campos dos dois objetos em ordem determinística (os da resposta
+    e depois os que só estão no gabarito), para que mismatched_fields tenha a
+    mesma ordem em qualquer processo.
+    """
+    return dict.fromkeys(chain(response_data, groundtruth_data))
+
+
+def field_matches(field: str, response_value: Any, expected_value: Any,
+                  normalizer: Optional[FieldNormalizer] = None) -> bool:
+    """Match de um campo: exato (values_match) ou, no modo tolerante, após normalizar os dois valores."""
+    if values_match(response_value, expected_value):
+        return True
+    if normalizer is None:
+        return False
+    return values_match(normalizer(field, response_value), normalizer(field, expected_value))
+
+
+def compare_pair(response_data: Dict[str, Any], groundtruth_data: Dict[str, Any], evaluation_id: str,
+                 normalizer: Optional[FieldNormalizer] = None,
+                 include_diff_paths: bool = False,
+                 min_similarity: Optional[float] = None) -> ExactMatchResult:
+    """
+    Compara resposta e gabarito campo por campo (sem cache). Função de módulo
+    para poder rodar em processos (evaluate_batch com max_workers > 1).
+    Com `normalizer` (modo tolerante), um campo que não faz match exato é
+    comparado de novo após normalizar os dois valores; mismatched_fields
+    mantém os valores originais. Com `include_diff_paths`, campos com listas
+    ou dicts divergentes recebem também "paths" (ver diff_paths), calculado
+    só para esses campos. Com `min_similarity` (modo de similaridade), cada
+    campo de texto recebe sua similaridade em field_similarity: 1.0 quando
+    faz match, senão a de text_similarity (0 abaixo de min_similarity).
+    """
+    # Inicializar contadores
+    matching_fields = 0
+    mismatched_fields = {}
+    field_similarity = {}
+
+    # Obter todos os campos únicos dos dois objetos
+    all_fields = ordered_fields(response_data, groundtruth_data)
+    total_fields = len(all_fields)
+
+    # Comparar cada campo
+    for field in all_fields:
+        response_value = response_data.get(field)
+        expected_value = groundtruth_data.get(field)
+
+        matched = field_matches(field, response_value, expected_value, normalizer)
+        if min_similarity is not None and is_text_field(response_value, expected_value):
+            field_similarity[field] = 1.0 if matched else text_similarity(response_value, expected_value, min_similarity)
+
+        if matched:
+            matching_fields += 1
+        else:
+            mismatched_fields[field] = {
+                "expected": expected_value,
+                "actual": response_value
+            }
+            if include_diff_paths and isinstance(response_value, (list, dict)) and isinstance(expected_value, (list, dict)):
+                mismatched_fields[field]["paths"] = diff_paths(response_value, expected_value, field)
+
+    # Calcular percentual de acurácia
+    accuracy_percentage = (matching_fields / total_fields * 100) if total_fields > 0 else 0
+
+    # Criar resultado estruturado
+    return ExactMatchResult(
+        id=evaluation_id,
+        total_fields=total_fields,
+        matching_fields=matching_fields,
+        accuracy_percentage=round(accuracy_percentage, 2),
+        mismatched_fields=mismatched_fields,
+        field_similarity=field_similarity,
+        similarity_percentage=similarity_percentage(field_similarity)
+    )
+
+
+def _compare_pair_args(args: Tuple[Dict[str, Any], Dict[str, Any], str, Optional[FieldNormalizer], bool, Optional[float]]) -> ExactMatchResult:
+    return compare_pair(*args)
 
 
 class ExactMatchTool(BaseTool):
@@ -11,6 +220,33 @@ class ExactMatchTool(BaseTool):
         "Ferramenta para avaliar a precisão exata comparando respostas de agents "
         "com gabaritos campo por campo, calculando percentuais de acerto."
     )
+    cache_file: Optional[str] = Field(
+        default=DEFAULT_CACHE_FILE,
+        description="Cache persistente de avaliações por hash do par (None desativa)"
+    )
+    max_workers: int = Field(default=1, description="Processos para evaluate_batch (1 = laço no próprio processo)")
+    tolerant: bool = Field(
+        default=False,
+        description="Modo tolerante: normaliza os valores por campo (números, CUIT, datas, N/A) antes de comparar"
+    )
+    normalization_spec: Optional[Dict[str, str]] = Field(
+        default=None,
+        description="Especificação campo -> tipo de normalização do modo tolerante (padrão: DEFAULT_FIELD_SPEC)"
+    )
+    include_diff_paths: bool = Field(
+        default=False,
+        description="Inclui em mismatched_fields os caminhos das diferenças em listas/dicts (ex.: items[12].precio)"
+    )
+    similarity: bool = Field(
+        default=False,
+        description="Modo de similaridade: reporta a similaridade de Levenshtein normalizada dos campos de texto"
+    )
+    min_similarity: float = Field(
+        default=DEFAULT_MIN_SIMILARITY,
+        description="Similaridade mínima reportada; abaixo dela o cálculo é interrompido e a similaridade é 0"
+    )
+
+    _cache: Optional[EvaluationCache] = PrivateAttr(default=None)
 
     def _run(self, response_data: Dict[str, Any], groundtruth_data: Dict[str, Any], evaluation_id: str) -> Dict[str, Any]:
         """
@@ -25,44 +261,12 @@ class ExactMatchTool(BaseTool):
             Resultado da avaliação de match exato
         """
         try:
-            # Inicializar contadores
-            total_fields = 0
-            matching_fields = 0
-            mismatched_fields = {}
-            
-            # Obter todos os campos únicos dos dois objetos
-            all_fields = set(response_data.keys()) | set(groundtruth_data.keys())
-            total_fields = len(all_fields)
-            
-            # Comparar cada campo
-            for field in all_fields:
-                response_value = response_data.get(field)
-                expected_value = groundtruth_data.get(field)
-                
-                if self._values_match(response_value, expected_value):
-                    matching_fields += 1
-                else:
-                    mismatched_fields[field] = {
-                        "expected": expected_value,
-                        "actual": response_value
-                    }
-            
-            # Calcular percentual de acurácia
-            accuracy_percentage = (matching_fields / total_fields * 100) if total_fields > 0 else 0
-            
-            # Criar resultado estruturado
-            result = ExactMatchResult(
-                id=evaluation_id,
-                total_fields=total_fields,
-                matching_fields=matching_fields,
-                accuracy_percentage=round(accuracy_percentage, 2),
-                mismatched_fields=mismatched_fields
-            )
+            result = self.evaluate(response_data, groundtruth_data, evaluation_id)
             
             return {
                 "success": True,
                 "evaluation_result": result.dict(),
-                "summary": f"Avaliação ID {evaluation_id}: {matching_fields}/{total_fields} campos corretos ({accuracy_percentage:.1f}% acurácia)"
+                "summary": f"Avaliação ID {evaluation_id}: {result.matching_fields}/{result.total_fields} campos corretos ({result.accuracy_percentage:.1f}% acurácia)"
             }
             
         except Exception as e:
@@ -72,50 +276,122 @@ class ExactMatchTool(BaseTool):
                 "evaluation_id": evaluation_id
             }
     
-    def _values_match(self, value1: Any, value2: Any) -> bool:
+    def evaluate(self, response_data: Dict[str, Any], groundtruth_data: Dict[str, Any], evaluation_id: str) -> ExactMatchResult:
         """
-        Compara dois valores para verificar se fazem match exato.
-        
-        Args:
-            value1: Primeiro valor para comparação
-            value2: Segundo valor para comparação
-            
-        Returns:
-            True se os valores fazem match exato, False caso contrário
+        Avalia um par, reaproveitando o resultado do cache quando o conteúdo
+        do par e a versão do comparador não mudaram desde a última execução.
         """
-        # Tratamento para valores None
-        if value1 is None and value2 is None:
-            return True
-        if value1 is None or value2 is None:
-            return False
-            
-        # Tratamento para strings (case-insensitive e trim)
-        if isinstance(value1, str) and isinstance(value2, str):
-            return value1.strip().lower() == value2.strip().lower()
-        
-        # Tratamento para números (com tolerância para floats)
-        if isinstance(value1, (int, float)) and isinstance(value2, (int, float)):
-            if isinstance(value1, float) or isinstance(value2, float):
-                return abs(float(value1) - float(value2)) < 1e-10
-            return value1 == value2
-            
-        # Tratamento para listas
-        if isinstance(value1, list) and isinstance(value2, list):
-            if len(value1) != len(value2):
-                return False
-            for v1, v2 in zip(value1, value2):
-                if not self._values_match(v1, v2):
-                    return False
-            return True
-            
-        # Tratamento para dicionários
-        if isinstance(value1, dict) and isinstance(value2, dict):
-            if set(value1.keys()) != set(value2.keys()):
-                return False
-            for key in value1.keys():
-                if not self._values_match(value1[key], value2[key]):
-                    return False
-            return True
-        
-        # Comparação direta para outros tipos
-        return value1 == value2
+        cache = self._get_cache()
+        cache_key = None
+        if cache is not None:
+            cache_key = EvaluationCache.make_key(response_data, groundtruth_data, self._cache_version())
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return ExactMatchResult(id=evaluation_id, **cached)
+
+        result = self._compare(response_data, groundtruth_data, evaluation_id)
+
+        if cache is not None:
+            cache.put(cache_key, result.dict(exclude={"id"}))
+        return result
+
+    def evaluate_batch(self, matched_pairs: List[Tuple[ResponseData, GroundTruthData]]) -> List[ExactMatchResult]:
+        """
+        Avalia todos os pares (resposta, gabarito) de uma vez, na ordem de
+        entrada. Consulta o cache para o lote inteiro, compara apenas os pares
+        ausentes (em um pool de processos quando max_workers > 1) e grava os
+        novos resultados no cache com uma única escrita.
+        """
+        normalizer = self._get_normalizer()
+        results, cache_keys = self.lookup_cache(matched_pairs)
+        pending = [
+            (position, (response.response_data, groundtruth.expected_response, response.id, normalizer,
+                        self.include_diff_paths, self._get_min_similarity()))
+            for position, (response, groundtruth) in enumerate(matched_pairs)
+            if results[position] is None
+        ]
+
+        compared = self._compare_many([args for _, args in pending])
+        for (position, _), result in zip(pending, compared):
+            results[position] = result
+
+        self.store_cache((cache_keys[position], result) for (position, _), result in zip(pending, compared))
+        return results
+
+    def lookup_cache(self, matched_pairs: List[Tuple[ResponseData, GroundTruthData]]
+                     ) -> Tuple[List[Optional[ExactMatchResult]], List[Optional[str]]]:
+        """
+        Consulta o cache para o lote inteiro, na ordem de entrada: devolve os
+        resultados encontrados (None nos pares ausentes) e a chave de cada
+        par, para gravar depois os que forem comparados (None sem cache).
+        """
+        cache = self._get_cache()
+        if cache is None:
+            return [None] * len(matched_pairs), [None] * len(matched_pairs)
+
+        cache_version = self._cache_version()
+        results: List[Optional[ExactMatchResult]] = []
+        cache_keys: List[Optional[str]] = []
+        for response, groundtruth in matched_pairs:
+            cache_key = EvaluationCache.make_key(response.response_data, groundtruth.expected_response, cache_version)
+            cached = cache.get(cache_key)
+            results.append(ExactMatchResult(id=response.id, **cached) if cached is not None else None)
+            cache_keys.append(cache_key)
+        return results, cache_keys
+
+    def store_cache(self, keyed_results: Iterable[Tuple[Optional[str], ExactMatchResult]]) -> None:
+        """Grava no cache, com uma única escrita, os resultados comparados (chaves de lookup_cache)."""
+        cache = self._get_cache()
+        if cache is not None:
+            cache.put_many((cache_key, result.dict(exclude={"id"})) for cache_key, result in keyed_results)
+
+    def _compare_many(self, pairs: List[Tuple[Dict[str, Any], Dict[str, Any], str, Optional[FieldNormalizer], bool, Optional[float]]]) -> List[ExactMatchResult]:
+        """Compara os pares em laço direto ou, com max_workers > 1, em um pool de processos."""
+        if self.max_workers <= 1 or len(pairs) <= 1:
+            return [compare_pair(*args) for args in pairs]
+
+        chunksize = max(1, len(pairs) // (self.max_workers * 4))
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(_compare_pair_args, pairs, chunksize=chunksize))
+
+    def _get_normalizer(self) -> Optional[FieldNormalizer]:
+        """Normalizador compilado do modo tolerante (None no modo exato)."""
+        if not self.tolerant:
+            return None
+        return compile_spec(self.normalization_spec)
+
+    def _cache_version(self) -> str:
+        """
+        Versão usada na chave do cache; o modo tolerante inclui a
+        especificação de normalização; caminhos de diferença e similaridade
+        mudam o conteúdo do resultado.
+        """
+        version = COMPARATOR_VERSION
+        normalizer = self._get_normalizer()
+        if normalizer is not None:
+            version = f"{version}+{normalizer.signature}"
+        if self.include_diff_paths:
+            version = f"{version}+paths"
+        if self.similarity:
+            version = f"{version}+sim{SIMILARITY_VERSION}:{self.min_similarity}"
+        return version
+
+    def _get_min_similarity(self) -> Optional[float]:
+        """Similaridade mínima do modo de similaridade (None com o modo desligado)."""
+        return self.min_similarity if self.similarity else None
+
+    def _get_cache(self) -> Optional[EvaluationCache]:
+        if self.cache_file is None:
+            return None
+        if self._cache is None:
+            self._cache = EvaluationCache(self.cache_file)
+        return self._cache
+
+    def _compare(self, response_data: Dict[str, Any], groundtruth_data: Dict[str, Any], evaluation_id: str) -> ExactMatchResult:
+        """Compara os dois objetos campo a campo (sem cache)."""
+        return compare_pair(response_data, groundtruth_data, evaluation_id, self._get_normalizer(),
+                            self.include_diff_paths, self._get_min_similarity())
+
+    def _values_match(self, value1: Any, value2: Any) -> bool:
+        """Compara dois valores para verificar se fazem match exato (ver values_match)."""
+        return values_match(value1, value2)
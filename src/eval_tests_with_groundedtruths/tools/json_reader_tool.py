@@ -1,10 +1,107 @@
 import json
 import os
-from typing import List, Dict, Any, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, NamedTuple
 from crewai.tools import BaseTool
-from pydantic import Field
+from pydantic import Field, TypeAdapter, ValidationError
 
 from ..models.evaluation_models import ResponseData, GroundTruthData
+from ..storage.artifact_store import get_artifact_store
+from ..storage.sharded_store import ShardedJSONLStore
+
+
+# Quantos IDs (órfãos, duplicados) listar no retorno; o restante vai só na contagem
+MAX_LISTED_IDS = 20
+
+
+class MatchResult(NamedTuple):
+    """Resultado do matching por ID entre respostas e gabaritos."""
+    matched_pairs: List[Tuple[ResponseData, GroundTruthData]]
+    unmatched_responses: List[str]
+    unmatched_groundtruths: List[str]
+    duplicate_response_ids: Dict[str, int]
+    duplicate_groundtruth_ids: Dict[str, int]
+
+
+def index_by_id(items: List[Any]) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """
+    Indexa os itens pelo campo 'id', mantendo a primeira ocorrência.
+    Retorna (índice, {id duplicado: total de ocorrências}).
+    """
+    index = {}
+    duplicates = {}
+    for item in items:
+        if item.id in index:
+            duplicates[item.id] = duplicates.get(item.id, 1) + 1
+        else:
+            index[item.id] = item
+    return index, duplicates
+
+
+def match_by_id(responses: List[ResponseData], groundtruths: List[GroundTruthData]) -> MatchResult:
+    """
+    Faz o join por ID em tempo linear (hash join) e identifica órfãos e IDs
+    duplicados. Para IDs duplicados, o par usa a primeira ocorrência de cada
+    lado e o ID é reportado em duplicate_*_ids.
+    """
+    response_index, duplicate_response_ids = index_by_id(responses)
+    groundtruth_index, duplicate_groundtruth_ids = index_by_id(groundtruths)
+
+    matched_pairs = []
+    unmatched_responses = []
+    for response_id, response in response_index.items():
+        groundtruth = groundtruth_index.get(response_id)
+        if groundtruth is None:
+            unmatched_responses.append(response_id)
+        else:
+            matched_pairs.append((response, groundtruth))
+
+    unmatched_groundtruths = [g_id for g_id in groundtruth_index if g_id not in response_index]
+
+    return MatchResult(
+        matched_pairs=matched_pairs,
+        unmatched_responses=unmatched_responses,
+        unmatched_groundtruths=unmatched_groundtruths,
+        duplicate_response_ids=duplicate_response_ids,
+        duplicate_groundtruth_ids=duplicate_groundtruth_ids,
+    )
+
+
+def read_json_file(filepath: str) -> Tuple[Optional[Any], Optional[str]]:
+    """Lê um arquivo JSON. Retorna (dados, erro); função de módulo para poder rodar em processos."""
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return json.load(f), None
+    except Exception as e:
+        return None, str(e)
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model_class) -> TypeAdapter:
+    return TypeAdapter(List[model_class])
+
+
+def validate_batch(model_class, records: List[Any]) -> Tuple[List[Any], List[Tuple[int, str]]]:
+    """
+    Valida uma lista de dicts de uma vez só (um único TypeAdapter para a lista,
+    sem o custo por chamada de model_class(**data)). Se algum registro for
+    inválido, cai para a validação individual apenas para isolar os erros.
+    Retorna (objetos válidos, [(posição, erro)]).
+    """
+    try:
+        return _list_adapter(model_class).validate_python(records), []
+    except ValidationError:
+        pass
+
+    validated = []
+    errors = []
+    for position, data in enumerate(records):
+        try:
+            validated.append(model_class.model_validate(data))
+        except Exception as e:
+            errors.append((position, str(e)))
+    return validated, errors
 
 
 class JSONFileReaderTool(BaseTool):
@@ -13,6 +110,8 @@ class JSONFileReaderTool(BaseTool):
         "Ferramenta para ler e carregar arquivos JSON das pastas de respostas "
         "e gabaritos, fazendo o matching por ID entre os arquivos."
     )
+    max_workers: int = Field(default=8, description="Número de workers para ler os arquivos (1 = sequencial)")
+    executor_type: str = Field(default="thread", description="Tipo de pool para a leitura: 'thread' ou 'process'")
 
     def _run(self, files_dir: str = "files", groundtruths_dir: str = "groundedtruths") -> Dict[str, Any]:
         """
@@ -23,28 +122,41 @@ class JSONFileReaderTool(BaseTool):
             groundtruths_dir: Diretório com arquivos de gabarito
             
         Returns:
-            Dicionário com arquivos encontrados e pares matcheados
+            Resumo compacto do carregamento e o handle dos pares matcheados
+            (matched_pairs_handle) no artifact store
         """
         try:
+            load_errors = []
+
             # Ler arquivos de resposta
-            response_files = self._load_json_files(files_dir, ResponseData)
+            response_files = self._load_json_files(files_dir, ResponseData, load_errors)
             
             # Ler arquivos de gabarito  
-            groundtruth_files = self._load_json_files(groundtruths_dir, GroundTruthData)
+            groundtruth_files = self._load_json_files(groundtruths_dir, GroundTruthData, load_errors)
             
             # Fazer matching por ID
-            matched_pairs = self._match_files_by_id(response_files, groundtruth_files)
-            print(f"[MATCHED] = {matched_pairs}")
+            match = match_by_id(response_files, groundtruth_files)
+            matched_pairs = match.matched_pairs
+            print(f"[MATCHED] {len(matched_pairs)} pares")
+            if match.duplicate_response_ids or match.duplicate_groundtruth_ids:
+                print(f"[DUPLICADOS] respostas={len(match.duplicate_response_ids)} gabaritos={len(match.duplicate_groundtruth_ids)}")
+
+            # Os pares completos ficam no artifact store; o agent recebe só o handle
+            matched_pairs_handle = get_artifact_store().put("matched_pairs", matched_pairs)
             
             result = {
                 "response_files_count": len(response_files),
                 "groundtruth_files_count": len(groundtruth_files),
                 "matched_pairs_count": len(matched_pairs),
-                "response_files": [{"id": r.id, "agent_name": r.agent_name, "file_name": getattr(r, 'file_name', None)} for r in response_files],
-                "groundtruth_files": [{"id": g.id, "file_name": getattr(g, 'file_name', None), "description": getattr(g, 'description', None)} for g in groundtruth_files],
-                "matched_pairs": matched_pairs,
-                "unmatched_responses": [r.id for r in response_files if not any(r.id == pair[0].id for pair in matched_pairs)],
-                "unmatched_groundtruths": [g.id for g in groundtruth_files if not any(g.id == pair[1].id for pair in matched_pairs)]
+                "matched_pairs_handle": matched_pairs_handle,
+                "unmatched_responses_count": len(match.unmatched_responses),
+                "unmatched_responses": match.unmatched_responses[:MAX_LISTED_IDS],
+                "unmatched_groundtruths_count": len(match.unmatched_groundtruths),
+                "unmatched_groundtruths": match.unmatched_groundtruths[:MAX_LISTED_IDS],
+                "duplicate_response_ids": dict(list(match.duplicate_response_ids.items())[:MAX_LISTED_IDS]),
+                "duplicate_groundtruth_ids": dict(list(match.duplicate_groundtruth_ids.items())[:MAX_LISTED_IDS]),
+                "load_errors_count": len(load_errors),
+                "load_errors": load_errors[:MAX_LISTED_IDS]
             }
             
             return result
@@ -52,35 +164,60 @@ class JSONFileReaderTool(BaseTool):
         except Exception as e:
             return {"error": f"Erro ao processar arquivos JSON: {str(e)}"}
     
-    def _load_json_files(self, directory: str, model_class) -> List[Any]:
-        """Carrega todos os arquivos JSON de um diretório usando o modelo especificado."""
-        files = []
+    def _load_json_files(self, directory: str, model_class, errors: Optional[List[Dict[str, str]]] = None) -> List[Any]:
+        """
+        Carrega todos os arquivos JSON de um diretório usando o modelo especificado.
+        Se o diretório contiver um store JSONL (ShardedJSONLStore), seus registros
+        também são carregados, além de eventuais arquivos JSON individuais.
+
+        A listagem usa os.scandir e a leitura roda em um pool (max_workers /
+        executor_type), com resultados em ordem determinística (store, depois
+        arquivos por nome). Erros por arquivo são acrescentados em `errors`
+        como {"file", "error"} em vez de interromper a carga.
+        """
+        if errors is None:
+            errors = []
         
         if not os.path.exists(directory):
             raise FileNotFoundError(f"Diretório {directory} não encontrado")
-            
-        for filename in os.listdir(directory):
-            if filename.endswith('.json'):
-                filepath = os.path.join(directory, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        validated_data = model_class(**data)
-                        files.append(validated_data)
-                except Exception as e:
-                    print(f"Erro ao processar arquivo {filepath}: {e}")
-                    continue
+
+        sources = []
+        records = []
+
+        if ShardedJSONLStore.is_store(directory):
+            for data in ShardedJSONLStore(directory).iter_records():
+                sources.append(f"{directory}#{data.get('id')}")
+                records.append(data)
+
+        with os.scandir(directory) as entries:
+            filepaths = sorted(
+                entry.path for entry in entries
+                if entry.name.endswith('.json') and entry.is_file()
+            )
+
+        for filepath, (data, error) in zip(filepaths, self._read_files(filepaths)):
+            if error is not None:
+                errors.append({"file": filepath, "error": error})
+                continue
+            sources.append(filepath)
+            records.append(data)
+
+        validated, validation_errors = validate_batch(model_class, records)
+        for position, error in validation_errors:
+            errors.append({"file": sources[position], "error": error})
                     
-        return files
+        return validated
+
+    def _read_files(self, filepaths: List[str]) -> List[Tuple[Optional[Any], Optional[str]]]:
+        """Lê os arquivos em paralelo preservando a ordem de entrada."""
+        if self.max_workers <= 1 or len(filepaths) <= 1:
+            return [read_json_file(filepath) for filepath in filepaths]
+
+        executor_class = ProcessPoolExecutor if self.executor_type == "process" else ThreadPoolExecutor
+        with executor_class(max_workers=self.max_workers) as executor:
+            chunksize = max(1, len(filepaths) // (self.max_workers * 4)) if self.executor_type == "process" else 1
+            return list(executor.map(read_json_file, filepaths, chunksize=chunksize))
     
     def _match_files_by_id(self, responses: List[ResponseData], groundtruths: List[GroundTruthData]) -> List[Tuple[ResponseData, GroundTruthData]]:
         """Faz o matching entre arquivos de resposta e gabarito pelo ID."""
-        matched_pairs = []
-        
-        for response in responses:
-            for groundtruth in groundtruths:
-                if response.id == groundtruth.id:
-                    matched_pairs.append((response, groundtruth))
-                    break
-                    
-        return matched_pairs
+        return match_by_id(responses, groundtruths).matched_pairs